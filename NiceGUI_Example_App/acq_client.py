@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import numpy as np
+from frame_ring import FrameRing
+
+DEFAULT_SOCKET = "/tmp/fli_acquire.sock"
+
+
+class DaemonClient:
+    """Client for the acquisition daemon's Unix socket control API.
+
+    Requests and replies are single JSON lines. Each client keeps one
+    connection for requests; frames() opens its own subscriber connection.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.socket_path = socket_path
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise RuntimeError(f"Cannot reach the acquisition daemon at {self.socket_path}: {e}")
+        return sock, sock.makefile("rb")
+
+    def close(self):
+        if self.sock:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+    def request(self, cmd, **params):
+        """Sends one command and returns its reply; raises RuntimeError if the daemon reports an error."""
+        with self.lock:
+            if self.sock is None:
+                self.sock, self.reader = self._connect()
+            try:
+                self.sock.sendall(json.dumps(dict(params, cmd=cmd)).encode() + b"\n")
+                line = self.reader.readline()
+            except OSError:
+                self.close()
+                raise
+            if not line:
+                self.close()
+                raise RuntimeError("Acquisition daemon closed the connection.")
+        reply = json.loads(line)
+        if not reply.pop("ok"):
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def status(self):
+        return self.request("status")
+
+    def stats(self):
+        return self.request("stats")
+
+    def configure(self, width, height):
+        return self.request("configure", width=width, height=height)
+
+    def start(self, mode="viewer"):
+        return self.request("start", mode=mode)
+
+    def stop(self):
+        return self.request("stop")
+
+    def wait(self):
+        """Blocks until the daemon's current recording is saved; returns status with last_record."""
+        return self.request("wait")
+
+    def record(self, frames, output, fps=0.0, settings=None, fmt=None, stream=False,
+               chunk_frames=256, chunks=16, wait=True, codec=None):
+        """Records `frames` frames (0 = until stop(), with stream) to `output` on the daemon's host.
+
+        With wait=True the reply arrives when the file is saved; otherwise the
+        daemon replies at once and status()["last_record"] has the result later.
+        """
+        return self.request("record", frames=frames, output=os.path.abspath(output), fps=fps,
+                            settings=settings or {}, format=fmt, stream=stream,
+                            chunk_frames=chunk_frames, chunks=chunks, wait=wait, codec=codec)
+
+    def frames(self, max_fps=30.0, every_frame=False, stop_event=None):
+        """Yields (frame, header) for live viewer frames from a separate subscriber connection.
+
+        Only the latest frame is sent at up to `max_fps`, unless every_frame is
+        set. The generator ends when the daemon closes the stream or
+        `stop_event` is set.
+        """
+        sock, reader = self._connect()
+        try:
+            sock.sendall(json.dumps({"cmd": "subscribe", "max_fps": max_fps,
+                                     "every_frame": every_frame}).encode() + b"\n")
+            reply = json.loads(reader.readline() or b'{"ok": false, "error": "no reply"}')
+            if not reply.pop("ok"):
+                raise RuntimeError(reply["error"])
+            while stop_event is None or not stop_event.is_set():
+                line = reader.readline()
+                if not line:
+                    return
+                header = json.loads(line)
+                payload = reader.read(header["nbytes"])
+                if len(payload) < header["nbytes"]:
+                    return
+                frame = np.frombuffer(payload, dtype=np.uint16).reshape(header["height"], header["width"])
+                yield frame, header
+        finally:
+            reader.close()
+            sock.close()
+
+
+class RemoteStats:
+    """Stands in for AcquisitionStats with the texts last reported by the daemon."""
+
+    def __init__(self):
+        self.summary_text = ""
+        self.report_text = ""
+
+    def summary(self):
+        return self.summary_text
+
+    def report(self):
+        return self.report_text
+
+
+class RemoteCamera:
+    """Camera stand-in for the GUI that drives a running acquisition daemon.
+
+    The daemon keeps the SDK and camera context open. Live frames arrive over a
+    subscriber connection and are copied into a local FrameRing, so CameraViewer
+    reads them exactly as it does from a local Camera. Recordings are done by
+    the daemon through record().
+    """
+    RING_BUFFER_SIZE = 10
+    is_remote = True
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, max_fps=30.0):
+        self.client = DaemonClient(socket_path)
+        self.max_fps = max_fps
+        self.width = 640
+        self.height = 512
+        self.viewer_ring = None
+        self.stats = RemoteStats()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def configure_acquisition(self, width, height):
+        self.width = width
+        self.height = height
+        self.client.configure(width, height)
+
+    def initialize_camera_context(self):
+        """Checks that the daemon is up; it already holds the camera context."""
+        status = self.client.status()
+        self.stats.summary_text = status["summary"]
+
+    def start_acquisition(self, mode="viewer"):
+        if mode != "viewer":
+            raise RuntimeError("Recordings through the daemon use record().")
+        self.client.start("viewer")
+        ring = self.viewer_ring
+        if ring is None or (ring.height, ring.width) != (self.height, self.width):
+            self.viewer_ring = FrameRing(self.RING_BUFFER_SIZE, self.height, self.width)
+        else:
+            ring.reset()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._subscriber_loop, name="RemoteCamera", daemon=True)
+        self.thread.start()
+        print("Remote acquisition started.")
+
+    def stop_acquisition(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.client.stop()  # Ends the subscriber stream as well
+            self.thread.join()
+            self.thread = None
+        print("Remote acquisition stopped.")
+
+    def _subscriber_loop(self):
+        for frame, header in self.client.frames(self.max_fps, stop_event=self.stop_event):
+            self.viewer_ring.write_frame(frame.ctypes.data, header["status"])
+            self.stats.summary_text = header["summary"]
+
+    def get_latest_frame(self, copy=True):
+        if self.viewer_ring is None:
+            return None, -1, 0
+        return self.viewer_ring.get_latest_frame(copy)
+
+    def get_frames_since(self, seq, max_frames=None, out=None):
+        return self.viewer_ring.get_frames_since(seq, max_frames, out)
+
+    async def record(self, num_frames, output_file, fps=0.0, settings=None):
+        """Has the daemon record `num_frames` frames to `output_file`; returns its reply."""
+        result = await asyncio.to_thread(self.client.record, num_frames, output_file, fps, settings)
+        self.stats.summary_text = result["summary"]
+        self.stats.report_text = result["report"]
+        return result
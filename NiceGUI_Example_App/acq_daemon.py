@@ -0,0 +1,321 @@
+"""Long-running acquisition daemon that keeps the SDK and camera context open.
+
+Clients talk to it over a Unix socket, one JSON object per line:
+
+    {"cmd": "status"}                              state, geometry, live summary
+    {"cmd": "stats"}                               full statistics report
+    {"cmd": "configure", "width": W, "height": H}
+    {"cmd": "start", "mode": "viewer"}             live acquisition for subscribers
+    {"cmd": "stop"}                                stops viewer mode or a recording
+    {"cmd": "wait"}                                replies when the current recording is saved
+    {"cmd": "record", "frames": N, "output": path, "fps": f, "settings": {...},
+     "format": "raw"|"flr"|"flz"|null, "codec": "zlib"|"zstd"|"lz4"|null,
+     "stream": bool, "wait": bool}
+    {"cmd": "subscribe", "max_fps": f, "every_frame": bool}
+
+Every reply is {"ok": true, ...} or {"ok": false, "error": "..."}. After a
+subscribe reply the connection carries frames, each as a JSON header line
+(seq, timestamp_ns, status, width, height, nbytes, summary) followed by nbytes
+of uint16 pixels. acq_client.DaemonClient wraps the protocol.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from acq_client import DEFAULT_SOCKET
+from camera import Camera
+from camera_sdk import fli_usb, select_backend
+from frame_bus import DEFAULT_BUS_NAME
+from recording import RecordingWriter
+from compression import CompressedRecordingWriter, file_format
+from camera_settings import nominal_fps
+from stream_writer import StreamWriter
+
+
+class AcquisitionDaemon:
+    """Serves control requests for one warm camera."""
+
+    def __init__(self, camera, socket_path=DEFAULT_SOCKET):
+        self.camera = camera
+        self.socket_path = socket_path
+        self.mode = None  # None (idle), "viewer" or "recording"
+        self.stop_requested = asyncio.Event()
+        self.record_task = None
+        self.last_record = None
+        self.server = None
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)  # Left over from a daemon that did not shut down cleanly
+            else:
+                raise RuntimeError(f"Another acquisition daemon is already serving {self.socket_path}")
+            finally:
+                probe.close()
+        self.server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        print(f"Acquisition daemon listening on {self.socket_path}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    cmd = request.pop("cmd")
+                    if cmd == "subscribe":
+                        await self.send_reply(writer, {"ok": True})
+                        await self.stream_frames(writer, **request)
+                        break
+                    handler = getattr(self, f"cmd_{cmd}", None)
+                    if handler is None:
+                        raise RuntimeError(f"Unknown command '{cmd}'")
+                    reply = await handler(**request)
+                    reply["ok"] = True
+                except Exception as e:  # Report to the client, keep serving
+                    reply = {"ok": False, "error": str(e)}
+                await self.send_reply(writer, reply)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def send_reply(self, writer, reply):
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    def _require_idle(self):
+        if self.mode is not None:
+            raise RuntimeError(f"Camera is busy ({self.mode}); stop it first.")
+
+    async def cmd_status(self):
+        camera = self.camera
+        writer = camera.writer
+        return {
+            "state": self.mode or "idle",
+            "camera": camera.index,
+            "tty": camera.tty_name,
+            "width": camera.width,
+            "height": camera.height,
+            "frames": camera.stats.frames,
+            "stored": camera.idx.value,
+            "summary": camera.stats.summary(),
+            "writer": writer.status() if writer is not None else None,
+            "last_record": self.last_record,
+        }
+
+    async def cmd_stats(self):
+        stats = self.camera.stats
+        return {
+            "frames": stats.frames,
+            "achieved_fps": stats.achieved_fps,
+            "bad_status": stats.bad_status,
+            "tag_missing": stats.missed_frames,
+            "errors": stats.errors,
+            "warnings": stats.warnings,
+            "summary": stats.summary(),
+            "report": stats.report(),
+        }
+
+    async def cmd_configure(self, width, height):
+        self._require_idle()
+        self.camera.configure_acquisition(int(width), int(height))
+        return {"width": self.camera.width, "height": self.camera.height}
+
+    async def cmd_start(self, mode="viewer"):
+        if mode != "viewer":
+            raise RuntimeError("Use the record command for recordings.")
+        if self.mode == "viewer":
+            return {"state": self.mode}
+        self._require_idle()
+        self.camera.start_acquisition("viewer")
+        self.mode = "viewer"
+        return {"state": self.mode}
+
+    async def cmd_stop(self):
+        if self.mode == "viewer":
+            self.camera.stop_acquisition()
+            self.mode = None
+        elif self.mode == "recording":
+            self.stop_requested.set()
+            await asyncio.shield(self.record_task)
+        return {"state": self.mode or "idle"}
+
+    async def cmd_wait(self):
+        if self.mode == "recording":
+            try:
+                await asyncio.shield(self.record_task)
+            except Exception:
+                pass  # Reported in last_record
+        return {"state": self.mode or "idle", "last_record": self.last_record}
+
+    async def cmd_record(self, frames, output, fps=0.0, settings=None, format=None, stream=False,
+                         chunk_frames=256, chunks=16, wait=True, codec=None):
+        self._require_idle()
+        frames = int(frames)
+        if frames <= 0 and not stream:
+            raise RuntimeError("frames = 0 (record until stopped) requires stream")
+        camera = self.camera
+        fmt = format or file_format(output)
+        compression = {"codec": codec} if codec else None
+        settings = dict(settings or {}, source="acq_daemon.py", camera_index=camera.index, tty=camera.tty_name)
+        if fmt in ("flr", "flz"):
+            fps = await asyncio.get_running_loop().run_in_executor(None, nominal_fps, fps, camera.tty_name)
+
+        if stream:
+            sink = output
+            if fmt == "flr":
+                sink = RecordingWriter(output, camera.width, camera.height, fps, settings, chunk_frames)
+            elif fmt == "flz":
+                sink = CompressedRecordingWriter(output, camera.width, camera.height, fps, settings, chunk_frames,
+                                                 **(compression or {}))
+            writer = StreamWriter(sink, camera.width * camera.height * 2, chunk_frames, chunks)
+            camera.prepare_stream(writer, frames)
+            writer.start()
+        else:
+            camera.prepare_recording(frames)
+
+        self.stop_requested.clear()
+        self.mode = "recording"
+        try:
+            camera.start_acquisition("record")
+        except RuntimeError:
+            self.mode = None
+            if camera.writer is not None:
+                camera.writer.close()
+                camera.writer = None
+            raise
+        print(f"Recording {frames or 'unbounded'} frames to {output}")
+        self.record_task = asyncio.create_task(self._finish_recording(frames, output, fmt, fps, settings, compression))
+        if not wait:
+            return {"output": output, "state": self.mode}
+        return dict(await asyncio.shield(self.record_task))
+
+    async def _finish_recording(self, frames, output, fmt, fps, settings, compression=None):
+        camera = self.camera
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            # Woken by the callback on the last frame, or by a stop request
+            stop_requested = asyncio.ensure_future(self.stop_requested.wait())
+            await asyncio.wait({camera.frames_future(), stop_requested}, return_when=asyncio.FIRST_COMPLETED)
+            stop_requested.cancel()
+            camera.stop_acquisition()
+
+            # Saving can take seconds; keep serving status requests meanwhile
+            stored = min(camera.idx.value, frames) if frames else camera.idx.value
+            if camera.writer is not None:
+                writer = camera.writer
+                try:
+                    await loop.run_in_executor(None, lambda: writer.close(measured_fps=camera.stats.achieved_fps))
+                finally:
+                    camera.writer = None
+                clock = getattr(writer.sink, "metadata", {}).get("clock")
+            else:
+                clock = await loop.run_in_executor(None, camera.save_data_to_file, output,
+                                                   fps, settings, fmt, compression)
+                clock = clock.to_dict() if clock is not None else None
+            self.last_record = {
+                "output": output,
+                "frames": stored,
+                "achieved_fps": camera.stats.achieved_fps,
+                "elapsed_s": time.perf_counter() - started,
+                "summary": camera.stats.summary(),
+                "report": camera.stats.report(),
+                "clock": clock,
+            }
+        except Exception as e:
+            self.last_record = {"output": output, "error": str(e)}
+            raise
+        finally:
+            self.mode = None
+        return self.last_record
+
+    async def stream_frames(self, writer, max_fps=30.0, every_frame=False):
+        """Sends viewer frames to one subscriber until it disconnects or acquisition stops."""
+        camera = self.camera
+        interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        last_seq = -1
+        while self.mode == "viewer":
+            ring = camera.viewer_ring
+            if every_frame and last_seq >= 0:
+                frames, first, timestamps = ring.get_frames_since(last_seq)
+                batch = [(frames[i], first + i, int(timestamps[i])) for i in range(len(frames))]
+            else:
+                frame, seq, timestamp = ring.get_latest_frame()
+                batch = [(frame, seq, timestamp)] if frame is not None and seq != last_seq else []
+            for frame, seq, timestamp in batch:
+                header = {
+                    "seq": seq,
+                    "timestamp_ns": timestamp,
+                    "status": int(ring.statuses[seq % ring.num_slots]),
+                    "width": frame.shape[1],
+                    "height": frame.shape[0],
+                    "nbytes": frame.nbytes,
+                    "summary": camera.stats.summary(),
+                }
+                writer.write(json.dumps(header).encode() + b"\n")
+                writer.write(frame.tobytes())
+                last_seq = seq
+            await writer.drain()
+            await asyncio.sleep(interval or 0.001)
+
+
+def handle_sigterm(signum, frame):
+    raise KeyboardInterrupt  # Shut down like Ctrl+C: stop acquisition, close the camera, remove the socket
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition daemon keeping one FLI camera open for fast captures.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Control socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--camera", type=int, default=0, help="Index of the camera to open (default: 0)")
+    parser.add_argument("-W", "--width", type=int, default=640, help="Initial frame width (default: 640)")
+    parser.add_argument("-H", "--height", type=int, default=512, help="Initial frame height (default: 512)")
+    parser.add_argument("--check-tags", action="store_true", help="Count missed frames from the frame counter in the image tag")
+    parser.add_argument("--backend", choices=["sdk", "sim"], default=os.environ.get("FLI_USB_BACKEND", "sdk"),
+                        help="SDK backend (default: sdk)")
+    parser.add_argument("--sim-fps", type=float, default=9500.0, help="Frame rate of the simulated camera (default: 9500)")
+    parser.add_argument("--frame-bus", nargs="?", const=DEFAULT_BUS_NAME, default=None,
+                        help=f"Also publish frames to shared memory for other processes (name, default: {DEFAULT_BUS_NAME})")
+    parser.add_argument("--batched-ingest", action="store_true",
+                        help="Copy frames in the SDK callback only and do the rest in batches (for small, fast frames)")
+    args = parser.parse_args()
+
+    if args.backend == "sim":
+        select_backend("sim", fps=args.sim_fps)
+    else:
+        select_backend("sdk")
+
+    camera = Camera(args.check_tags, args.camera)
+    camera.configure_acquisition(args.width, args.height)
+    if args.frame_bus:
+        camera.enable_frame_bus(args.frame_bus)
+    if args.batched_ingest:
+        camera.enable_batched_ingest()
+    camera.initialize_camera_context()
+    daemon = AcquisitionDaemon(camera, args.socket)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        if daemon.mode is not None:
+            camera.stop_acquisition()
+        camera.close_camera_context()
+        fli_usb.fli_usb_exit()
+        if daemon.server is not None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
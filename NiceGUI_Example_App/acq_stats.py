@@ -0,0 +1,218 @@
+import array
+import math
+import time
+import numpy as np
+from camera_sdk import FLI_USB_ERROR_LEVEL_ERROR, FLI_USB_ERROR_LEVEL_WARNING, TAG_MODULO, frame_tag, tags_count_frames
+
+STATUS_OK = 0
+ARRIVAL_BINS = 40  # log2 buckets of inter-arrival time in ns, bucket k holds [2**(k-1), 2**k)
+DURATION_SAMPLES = 8192  # Most recent callback durations kept for percentiles
+
+
+class AcquisitionStats:
+    """Counts frames, bad statuses, tag gaps, arrival jitter and callback cost.
+
+    record() is called once per frame from the SDK data callback, so everything
+    lives in preallocated arrays and integer counters; percentiles and rates are
+    only computed when a report is requested. With batched ingest the callback
+    records nothing and record_batch() is called from the consumer thread
+    instead; callback durations are not measured then.
+
+    With check_tags enabled, the frame counter is read from each frame's
+    image tag (see camera_sdk.TAG_PIXELS) and jumps in it are counted as
+    missed frames. If the tags turn out not to count frames (most steps are
+    not +1), missed_frames is None and the reports say so instead.
+    """
+
+    def __init__(self, check_tags=False):
+        self.check_tags = check_tags
+        self.arrival_histogram = array.array("q", bytes(8 * ARRIVAL_BINS))
+        self.durations = array.array("q", bytes(8 * DURATION_SAMPLES))
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.bad_status = 0
+        self.last_bad_status = STATUS_OK
+        self.tag_gaps = 0
+        self.tag_missing = 0
+        self.tag_out_of_order = 0
+        self.last_tag = None
+        self.errors = 0
+        self.warnings = 0
+        self.first_arrival = 0
+        self.last_arrival = 0
+        self.arrival_sum = 0
+        self.arrival_sum_sq = 0
+        self.arrival_min = 0
+        self.arrival_max = 0
+        self.duration_max = 0
+        self.batched_frames = 0
+        for i in range(ARRIVAL_BINS):
+            self.arrival_histogram[i] = 0
+
+    def record(self, frame, status, start_ns):
+        """Records one frame. `start_ns` is time.perf_counter_ns() taken on callback entry."""
+        n = self.frames
+        if n:
+            dt = start_ns - self.last_arrival
+            self.arrival_histogram[min(dt.bit_length(), ARRIVAL_BINS - 1)] += 1
+            self.arrival_sum += dt
+            self.arrival_sum_sq += dt * dt
+            if dt < self.arrival_min or n == 1:
+                self.arrival_min = dt
+            if dt > self.arrival_max:
+                self.arrival_max = dt
+        else:
+            self.first_arrival = start_ns
+        self.last_arrival = start_ns
+
+        if status != STATUS_OK:
+            self.bad_status += 1
+            self.last_bad_status = status
+
+        if self.check_tags:
+            tag = frame_tag(frame)
+            if self.last_tag is not None:
+                step = (tag - self.last_tag) % TAG_MODULO
+                if step != 1:
+                    if step == 0 or step > TAG_MODULO // 2:
+                        self.tag_out_of_order += 1
+                    else:
+                        self.tag_gaps += 1
+                        self.tag_missing += step - 1
+            self.last_tag = tag
+
+        self.frames = n + 1
+        duration = time.perf_counter_ns() - start_ns
+        self.durations[n % DURATION_SAMPLES] = duration
+        if duration > self.duration_max:
+            self.duration_max = duration
+
+    def record_batch(self, arrivals, statuses, tags=None):
+        """Records a batch of frames from arrays of arrival times (ns), statuses and, with check_tags, image tags."""
+        n = len(arrivals)
+        if not n:
+            return
+        arrivals = np.asarray(arrivals, dtype=np.int64)
+        if self.frames:
+            dts = np.diff(arrivals, prepend=self.last_arrival)
+        else:
+            self.first_arrival = int(arrivals[0])
+            dts = np.diff(arrivals)
+        if len(dts):
+            # bit_length() of each interval, as in record()
+            bits = np.zeros(len(dts), dtype=np.int64)
+            positive = dts > 0
+            bits[positive] = np.floor(np.log2(dts[positive])).astype(np.int64) + 1
+            counts = np.bincount(np.minimum(bits, ARRIVAL_BINS - 1), minlength=ARRIVAL_BINS)
+            for k in np.flatnonzero(counts):
+                self.arrival_histogram[k] += int(counts[k])
+            self.arrival_sum += int(dts.sum())
+            self.arrival_sum_sq += int(np.dot(dts.astype(np.float64), dts))
+            low, high = int(dts.min()), int(dts.max())
+            if low < self.arrival_min or self.frames <= 1:
+                self.arrival_min = low
+            if high > self.arrival_max:
+                self.arrival_max = high
+        self.last_arrival = int(arrivals[-1])
+
+        bad = np.flatnonzero(np.asarray(statuses) != STATUS_OK)
+        if len(bad):
+            self.bad_status += len(bad)
+            self.last_bad_status = int(statuses[bad[-1]])
+
+        if self.check_tags and tags is not None:
+            tags = np.asarray(tags, dtype=np.int64)
+            if self.last_tag is None:
+                steps = np.diff(tags) % TAG_MODULO
+            else:
+                steps = np.diff(tags, prepend=self.last_tag) % TAG_MODULO
+            steps = steps[steps != 1]
+            backwards = (steps == 0) | (steps > TAG_MODULO // 2)
+            self.tag_out_of_order += int(backwards.sum())
+            self.tag_gaps += int((~backwards).sum())
+            self.tag_missing += int((steps[~backwards] - 1).sum())
+            self.last_tag = int(tags[-1])
+
+        self.frames += n
+        self.batched_frames += n
+
+    def record_message(self, level):
+        """Counts an SDK error callback message by severity."""
+        if level & FLI_USB_ERROR_LEVEL_ERROR:
+            self.errors += 1
+        elif level & FLI_USB_ERROR_LEVEL_WARNING:
+            self.warnings += 1
+
+    @property
+    def tags_valid(self):
+        """False once the image tags have turned out not to hold a frame counter."""
+        return tags_count_frames(max(self.frames - 1, 0), self.tag_gaps + self.tag_out_of_order)
+
+    @property
+    def missed_frames(self):
+        """Frames missing according to the tag counter, or None without a usable counter."""
+        return self.tag_missing if self.check_tags and self.tags_valid else None
+
+    @property
+    def achieved_fps(self):
+        elapsed = self.last_arrival - self.first_arrival
+        return (self.frames - 1) * 1e9 / elapsed if self.frames > 1 and elapsed > 0 else 0.0
+
+    def arrival_stats(self):
+        """Returns (mean, std, min, max) inter-arrival time in microseconds."""
+        n = self.frames - 1
+        if n <= 0:
+            return 0.0, 0.0, 0.0, 0.0
+        mean = self.arrival_sum / n
+        variance = max(self.arrival_sum_sq / n - mean * mean, 0.0)
+        return mean / 1e3, math.sqrt(variance) / 1e3, self.arrival_min / 1e3, self.arrival_max / 1e3
+
+    def duration_percentiles(self, percentiles=(50, 99)):
+        """Returns callback duration percentiles in microseconds over the recent samples."""
+        count = min(self.frames - self.batched_frames, DURATION_SAMPLES)
+        if not count:
+            return [0.0 for _ in percentiles]
+        samples = sorted(self.durations[:count])
+        return [samples[min(int(p / 100 * count), count - 1)] / 1e3 for p in percentiles]
+
+    def arrival_histogram_text(self):
+        """Returns the non-empty inter-arrival buckets as 'range: count' lines."""
+        lines = []
+        for k, count in enumerate(self.arrival_histogram):
+            if count:
+                low = (1 << (k - 1)) if k else 0
+                lines.append(f"  {low / 1e3:>10.1f} - {(1 << k) / 1e3:<10.1f} us: {count}")
+        return "\n".join(lines)
+
+    def summary(self):
+        """Returns a one-line summary for live display."""
+        text = f"{self.frames} frames at {self.achieved_fps:.1f} Hz, {self.bad_status} bad status"
+        if self.check_tags:
+            text += f", {self.tag_missing} missed ({self.tag_gaps} gaps)" if self.tags_valid else ", no tag counter"
+        return text
+
+    def report(self):
+        """Returns a multi-line report for the end of an acquisition."""
+        mean, std, low, high = self.arrival_stats()
+        p50, p99 = self.duration_percentiles()
+        lines = [
+            f"Frames received: {self.frames}",
+            f"Achieved rate: {self.achieved_fps:.1f} Hz",
+            f"Non-OK status: {self.bad_status}" + (f" (last {self.last_bad_status})" if self.bad_status else ""),
+            f"SDK errors/warnings: {self.errors}/{self.warnings}",
+        ]
+        if self.check_tags and self.tags_valid:
+            lines.append(f"Tag gaps: {self.tag_gaps}, missed frames: {self.tag_missing}, "
+                         f"out of order: {self.tag_out_of_order}")
+        elif self.check_tags:
+            lines.append("Tag gaps: not counted, the image tags hold no frame counter")
+        lines += [
+            f"Inter-arrival: mean {mean:.1f} us, jitter {std:.1f} us, min {low:.1f} us, max {high:.1f} us",
+            f"Callback duration: p50 {p50:.1f} us, p99 {p99:.1f} us, max {self.duration_max / 1e3:.1f} us"
+            if self.frames > self.batched_frames else "Callback duration: not measured (batched ingest)",
+            "Inter-arrival histogram:",
+            self.arrival_histogram_text(),
+        ]
+        return "\n".join(lines)
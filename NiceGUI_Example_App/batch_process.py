@@ -0,0 +1,445 @@
+"""Offline batch processing of capture files on all cores.
+
+Operations, applied to each input (.raw, .flr or .flz) or, with --combine,
+to all inputs together:
+
+    mean      mean frame, e.g. a master dark from a night's dark captures
+    stack     sum of all frames, in float64
+    convert   the frames themselves, in another file format (with --combine,
+              all inputs one after the other in a single file)
+
+--step N keeps every N-th frame (decimation) for all three. --dark subtracts
+a dark frame (the output of a mean run, or a capture) from mean and stack
+results. Outputs are NPY, FITS or TIFF (TIFF needs the tifffile package).
+
+Each input is split into segments of --segment-frames output frames, and a
+process pool works through the segments of all inputs at once. Workers read
+their segment chunk by chunk through Capture's memory maps, so memory use
+stays at a few chunks per worker however large the files are. convert
+workers write frames straight into the preallocated output file; mean and
+stack workers save the partial sum of their segment, and the parent adds the
+partial sums up when every segment of an output is done.
+
+Every finished segment is appended to a journal next to the output
+(<output>.progress). Running the same command again after an interruption
+skips the segments already in the journal. An output without a journal is
+complete and is skipped unless --overwrite is given.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from capture_reader import Capture
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+OPERATIONS = ("mean", "stack", "convert")
+OUTPUT_DTYPES = {"mean": np.float32, "stack": np.float64, "convert": np.uint16}
+FORMAT_SUFFIXES = {"npy": ".npy", "fits": ".fits", "tiff": ".tif"}
+JOURNAL_SUFFIX = ".progress"
+PARTIAL_SUFFIX = ".partial"
+
+FITS_BLOCK = 2880
+FITS_CARD = 80
+FITS_TYPES = {np.dtype(np.uint16): 16, np.dtype(np.float32): -32, np.dtype(np.float64): -64}
+FITS_STORED = {16: ">u2", -32: ">f4", -64: ">f8"}  # uint16 is stored signed, offset by BZERO = 32768
+UINT16_ZERO = 0x8000
+
+
+def fits_header(shape, dtype, cards=()):
+    """Primary FITS header for an array of `shape` (frames, height, width) and `dtype`, padded to a block."""
+    bitpix = FITS_TYPES[np.dtype(dtype)]
+    entries = [("SIMPLE", True, "conforms to FITS standard"), ("BITPIX", bitpix, ""), ("NAXIS", len(shape), "")]
+    entries += [(f"NAXIS{i + 1}", int(n), "") for i, n in enumerate(reversed(shape))]
+    if bitpix == 16:
+        entries += [("BZERO", 32768, "unsigned 16-bit data"), ("BSCALE", 1, "")]
+    entries += list(cards)
+    lines = []
+    for key, value, comment in entries:
+        if isinstance(value, bool):
+            text = f"{'T' if value else 'F':>20}"
+        elif isinstance(value, str):
+            text = f"'{value.replace(chr(39), chr(39) * 2)[:66]:8}'".ljust(20)
+        elif isinstance(value, float):
+            text = f"{value:>20.10G}"
+        else:
+            text = f"{value:>20}"
+        line = f"{key:8}= {text}" + (f" / {comment}" if comment else "")
+        lines.append(line[:FITS_CARD].ljust(FITS_CARD))
+    lines.append("END".ljust(FITS_CARD))
+    header = "".join(lines).encode("ascii")
+    return header + b" " * (-len(header) % FITS_BLOCK)
+
+
+def read_fits_header(path):
+    """Returns ({keyword: value}, header size in bytes) of a FITS file's primary header."""
+    cards = {}
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(FITS_BLOCK)
+            if len(block) < FITS_BLOCK:
+                raise ValueError(f"{path} is not a FITS file (no END card).")
+            for i in range(0, FITS_BLOCK, FITS_CARD):
+                card = block[i:i + FITS_CARD].decode("ascii", errors="replace")
+                key = card[:8].strip()
+                if key == "END":
+                    return cards, f.tell()
+                if card[8:10] == "= ":
+                    value = card[10:].split(" /")[0].strip()
+                    cards[key] = value.strip("'").strip() if value.startswith("'") else value
+
+
+def fits_memmap(path, mode="r"):
+    """Memory map of a FITS file's primary data as stored (uint16 data is offset by UINT16_ZERO)."""
+    cards, offset = read_fits_header(path)
+    shape = tuple(int(cards[f"NAXIS{i}"]) for i in range(int(cards["NAXIS"]), 0, -1))
+    return np.memmap(path, dtype=FITS_STORED[int(cards["BITPIX"])], mode=mode, offset=offset, shape=shape)
+
+
+def create_output(path, fmt, shape, dtype, cards=()):
+    """Creates an output file of the given shape, zero-filled (sparse where the filesystem allows)."""
+    dtype = np.dtype(dtype)
+    if fmt == "npy":
+        np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape).flush()
+    elif fmt == "fits":
+        header = fits_header(shape, dtype, cards)
+        size = int(np.prod(shape)) * dtype.itemsize
+        with open(path, "wb") as f:
+            f.write(header)
+            f.truncate(len(header) + size + (-size % FITS_BLOCK))
+    elif fmt == "tiff":
+        if tifffile is None:
+            raise RuntimeError("TIFF output needs the tifffile package (pip install tifffile).")
+        size = int(np.prod(shape)) * dtype.itemsize
+        tifffile.memmap(path, shape=shape, dtype=dtype, photometric="minisblack",
+                        bigtiff=size > 2**32 - 2**25).flush()
+    else:
+        raise ValueError(f"Unknown output format '{fmt}'")
+
+
+def output_view(path, fmt):
+    """Writable memory map of an output file made by create_output()."""
+    if fmt == "npy":
+        return np.load(path, mmap_mode="r+")
+    if fmt == "fits":
+        return fits_memmap(path, "r+")
+    return tifffile.memmap(path, mode="r+")
+
+
+def store(view, fmt, position, frames):
+    """Writes frames into an output view at `position`, in the file's stored representation."""
+    if fmt == "fits" and frames.dtype == np.uint16:
+        frames = np.bitwise_xor(frames, UINT16_ZERO)
+    view[position:position + len(frames)] = frames
+
+
+def load_image(path, width=None, height=None):
+    """Loads a 2-D frame (e.g. a dark) from .npy, .fits or .tif, or the mean frame of a capture."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".npy":
+        image = np.load(path)
+    elif suffix in (".fits", ".fit"):
+        cards, _ = read_fits_header(path)
+        image = np.asarray(fits_memmap(path), dtype=np.float64)
+        if int(cards["BITPIX"]) == 16:
+            image -= UINT16_ZERO
+    elif suffix in (".tif", ".tiff"):
+        if tifffile is None:
+            raise RuntimeError("Reading TIFF needs the tifffile package (pip install tifffile).")
+        image = tifffile.imread(path)
+    else:
+        from processing import mean_frame
+        image = mean_frame(path)
+    image = np.asarray(image, dtype=np.float64)
+    return image.reshape(image.shape[-2:]) if image.ndim > 2 and image.shape[0] == 1 else image
+
+
+_captures = {}  # Captures opened by this worker process, by path
+
+
+def _open_capture(path, width, height):
+    capture = _captures.get(path)
+    if capture is None:
+        capture = Capture(path, width, height)
+        if capture.recording is not None and hasattr(capture.recording, "workers"):
+            capture.recording.workers = 1  # The process pool already uses every core
+        _captures[path] = capture
+    return capture
+
+
+def process_segment(task):
+    """Worker: processes output frames [start, stop) of one input; returns (segment id, frames, bytes, seconds)."""
+    started = time.perf_counter()
+    capture = _open_capture(task["path"], task["width"], task["height"])
+    step = task["step"]
+    convert = task["op"] == "convert"
+    if convert:
+        view = output_view(task["output"], task["format"])
+    else:
+        total = np.zeros((capture.height, capture.width), dtype=np.float64)
+    for first in range(task["start"], task["stop"], task["chunk_frames"]):
+        last = min(first + task["chunk_frames"], task["stop"])
+        frames = capture[first * step:(last - 1) * step + 1:step]
+        if convert:
+            store(view, task["format"], task["offset"] + first, frames)
+        else:
+            total += frames.sum(axis=0, dtype=np.float64)
+    if convert:
+        view.flush()
+        del view
+    else:
+        # Written under a temporary name first, so an interrupted save is never mistaken for a result
+        temporary = task["partial"] + ".tmp.npy"
+        np.save(temporary, total)
+        os.replace(temporary, task["partial"])
+    count = task["stop"] - task["start"]
+    return task["id"], count, count * capture.width * capture.height * 2, time.perf_counter() - started
+
+
+class BatchJob:
+    """One output file: an operation over one input, or over several with --combine."""
+
+    def __init__(self, op, output, fmt, inputs, step=1, dark=None, segment_frames=1024):
+        self.op = op
+        self.output = output
+        self.format = fmt
+        self.inputs = inputs  # Captures opened in the parent, for geometry and frame counts
+        self.step = step
+        self.dark = dark
+        self.segment_frames = segment_frames
+        self.journal_path = output + JOURNAL_SUFFIX
+        self.partial_dir = output + PARTIAL_SUFFIX
+        self.width = inputs[0].width
+        self.height = inputs[0].height
+        for capture in inputs[1:]:
+            if (capture.width, capture.height) != (self.width, self.height):
+                raise ValueError(f"{capture.path} is {capture.width}x{capture.height}, "
+                                 f"not {self.width}x{self.height} like {inputs[0].path}")
+        self.counts = [len(range(0, len(capture), step)) for capture in inputs]
+        self.frames = sum(self.counts)
+        self.done = {}  # Finished segment id ("input:start-stop") -> output frames
+
+    @property
+    def shape(self):
+        if self.op == "convert":
+            return self.frames, self.height, self.width
+        return self.height, self.width
+
+    @property
+    def signature(self):
+        return {"op": self.op, "format": self.format, "step": self.step, "segment_frames": self.segment_frames,
+                "inputs": [[os.path.abspath(c.path), os.path.getsize(c.path)] for c in self.inputs]}
+
+    def fits_cards(self):
+        sources = [os.path.basename(capture.path) for capture in self.inputs]
+        cards = [("OPERATN", self.op, "batch_process.py operation"),
+                 ("NFRAMES", self.frames, "frames used"),
+                 ("STEP", self.step, "every STEP-th frame"),
+                 ("FPS", float(self.inputs[0].fps or 0.0), "")]
+        cards += [("SOURCE", source, "") for source in sources[:50]]
+        if self.dark is not None:
+            cards.append(("DARKSUB", True, "dark frame subtracted"))
+        return cards
+
+    def segment_ranges(self):
+        """Yields (segment id, input index, output offset of the input, start, stop) of every segment."""
+        offset = 0
+        for index, count in enumerate(self.counts):
+            for start in range(0, count, self.segment_frames):
+                stop = min(start + self.segment_frames, count)
+                yield f"{index}:{start}-{stop}", index, offset, start, stop
+            offset += count
+
+    def partial_path(self, segment):
+        return os.path.join(self.partial_dir, segment.replace(":", "_") + ".npy")
+
+    def segments(self, chunk_frames):
+        """Yields the worker tasks of the segments not done yet."""
+        for segment, index, offset, start, stop in self.segment_ranges():
+            if segment not in self.done:
+                capture = self.inputs[index]
+                yield {"id": (self.output, segment), "op": self.op, "path": capture.path,
+                       "width": capture.width, "height": capture.height, "step": self.step,
+                       "start": start, "stop": stop, "chunk_frames": chunk_frames, "offset": offset,
+                       "output": self.output, "format": self.format, "partial": self.partial_path(segment)}
+
+    def prepare(self, overwrite):
+        """Resumes from the journal or starts over; returns False if the output is already complete."""
+        if os.path.exists(self.journal_path) and not overwrite:
+            with open(self.journal_path) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            if entries and entries[0].get("job") == self.signature:
+                self.done = {entry["segment"]: entry["frames"] for entry in entries[1:]}
+                print(f"Resuming {self.output}: {len(self.done)} segment(s) already done")
+                return True
+            print(f"Starting {self.output} over: its journal is for different inputs or options")
+        elif os.path.exists(self.output) and not overwrite:
+            print(f"Skipping {self.output}: already complete (use --overwrite to redo)")
+            return False
+        self.done = {}
+        shutil.rmtree(self.partial_dir, ignore_errors=True)
+        if self.op == "convert":
+            create_output(self.output, self.format, self.shape, OUTPUT_DTYPES[self.op], self.fits_cards())
+        else:
+            os.makedirs(self.partial_dir, exist_ok=True)
+        with open(self.journal_path, "w") as f:
+            f.write(json.dumps({"job": self.signature}) + "\n")
+        return True
+
+    def record(self, segment, frames):
+        """Appends a finished segment to the journal."""
+        self.done[segment] = frames
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps({"segment": segment, "frames": frames}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def complete(self):
+        """True once every segment of the output is in the journal."""
+        return all(segment in self.done for segment, *_ in self.segment_ranges())
+
+    def finish(self):
+        """Writes reduction results, then removes the journal and partial sums."""
+        if self.op != "convert":
+            total = np.zeros(self.shape, dtype=np.float64)
+            for segment, *_ in self.segment_ranges():
+                total += np.load(self.partial_path(segment))
+            if self.op == "mean":
+                result = total / max(self.frames, 1)
+                if self.dark is not None:
+                    result -= self.dark
+            else:
+                result = total
+                if self.dark is not None:
+                    result -= self.frames * self.dark
+            create_output(self.output, self.format, (1,) + self.shape if self.format == "tiff" else self.shape,
+                          OUTPUT_DTYPES[self.op], self.fits_cards())
+            view = output_view(self.output, self.format)
+            view[...] = result.astype(OUTPUT_DTYPES[self.op]).reshape(view.shape)
+            view.flush()
+            del view
+            shutil.rmtree(self.partial_dir, ignore_errors=True)
+        os.remove(self.journal_path)
+
+
+def output_name(path, op, step, fmt, output_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    suffix = f"_step{step}" if step > 1 else ""
+    return os.path.join(output_dir or os.path.dirname(path) or ".", f"{stem}_{op}{suffix}{FORMAT_SUFFIXES[fmt]}")
+
+
+def run(jobs, workers=None, chunk_frames=64, overwrite=False):
+    """Processes every job's remaining segments on a process pool, printing progress; returns the finished jobs."""
+    jobs = [job for job in jobs if job.prepare(overwrite)]
+    by_output = {job.output: job for job in jobs}
+    tasks = [task for job in jobs for task in job.segments(chunk_frames)]
+    pending = {job.output: 0 for job in jobs}  # Submitted tasks not completed yet, per output
+    for task in tasks:
+        pending[task["output"]] += 1
+    for job in jobs:
+        if not pending[job.output]:
+            job.finish()  # Everything was done before an interruption, only the result was missing
+    if not tasks:
+        return jobs
+
+    workers = workers or os.cpu_count() or 1
+    frame_bytes = jobs[0].width * jobs[0].height * 2
+    total_bytes = sum((task["stop"] - task["start"]) * task["width"] * task["height"] * 2 for task in tasks)
+    print(f"{len(tasks)} segment(s) of {len(jobs)} output(s), {total_bytes / 1e9:.2f} GB to read "
+          f"with {workers} worker process(es)")
+    started = time.perf_counter()
+    last_print = started
+    done_tasks = done_frames = done_bytes = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(process_segment, task) for task in tasks]
+        for future in as_completed(futures):
+            (output, segment), frames, nbytes, _ = future.result()
+            job = by_output[output]
+            job.record(segment, frames)
+            pending[output] -= 1
+            done_tasks += 1
+            done_frames += frames
+            done_bytes += nbytes
+            if not pending[output]:
+                job.finish()
+                print(f"Wrote {job.output} ({job.op} of {job.frames} frames)")
+            now = time.perf_counter()
+            if now - last_print >= 1.0 or done_tasks == len(tasks):
+                last_print = now
+                elapsed = now - started
+                rate = done_bytes / elapsed if elapsed else 0.0
+                eta = (total_bytes - done_bytes) / rate if rate else 0.0
+                print(f"{done_tasks}/{len(tasks)} segments, {done_bytes / 1e9:.2f}/{total_bytes / 1e9:.2f} GB, "
+                      f"{rate / 1e6:.0f} MB/s, {rate / frame_bytes:.0f} frames/s, ETA {eta:.0f} s")
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.")
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mean, stack or convert capture files in parallel, resumably.")
+    parser.add_argument("op", choices=OPERATIONS, help="mean (e.g. master dark), stack (sum) or convert")
+    parser.add_argument("inputs", nargs="+", help=".raw, .flr or .flz captures")
+    parser.add_argument("--format", choices=list(FORMAT_SUFFIXES), default="npy", help="Output format (default: npy)")
+    parser.add_argument("--step", type=int, default=1, help="Use every N-th frame (decimation, default: 1)")
+    parser.add_argument("--dark", help="Dark frame (.npy/.fits/.tif or a capture) to subtract from mean/stack results")
+    parser.add_argument("--combine", metavar="NAME",
+                        help="Process all inputs into one output NAME instead of one output per input")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: next to each input)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--segment-frames", type=int, default=1024,
+                        help="Output frames per work unit; also the resume granularity (default: 1024)")
+    parser.add_argument("--chunk-frames", type=int, default=64, help="Frames read at a time by a worker (default: 64)")
+    parser.add_argument("--overwrite", action="store_true", help="Redo outputs that are already complete")
+    parser.add_argument("-W", "--width", type=int, help="Frame width for .raw files without the naming convention")
+    parser.add_argument("-H", "--height", type=int, help="Frame height for .raw files without the naming convention")
+    args = parser.parse_args()
+    if args.dark and args.op == "convert":
+        parser.error("--dark applies to mean and stack only")
+    if args.format == "tiff" and tifffile is None:
+        parser.error("TIFF output needs the tifffile package (pip install tifffile)")
+
+    captures = [Capture(path, args.width, args.height) for path in args.inputs]
+    dark = load_image(args.dark) if args.dark else None
+    if dark is not None and dark.shape != (captures[0].height, captures[0].width):
+        parser.error(f"Dark frame is {dark.shape[1]}x{dark.shape[0]}, "
+                     f"captures are {captures[0].width}x{captures[0].height}")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.combine:
+        output = args.combine
+        if not os.path.splitext(output)[1]:
+            output += FORMAT_SUFFIXES[args.format]
+        jobs = [BatchJob(args.op, os.path.join(args.output_dir or "", output), args.format, captures, args.step, dark,
+                         args.segment_frames)]
+    else:
+        jobs = [BatchJob(args.op, output_name(capture.path, args.op, args.step, args.format, args.output_dir),
+                         args.format, [capture], args.step, dark, args.segment_frames) for capture in captures]
+        outputs = [job.output for job in jobs]
+        duplicates = sorted({output for output in outputs if outputs.count(output) > 1})
+        if duplicates:
+            parser.error(f"Several inputs would be written to {', '.join(duplicates)}; "
+                         "give them different names or use --combine")
+
+    started = time.perf_counter()
+    try:
+        jobs = run(jobs, args.workers, args.chunk_frames, args.overwrite)
+    except KeyboardInterrupt:
+        return
+    print(f"Done: {len(jobs)} output(s) in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,379 @@
+import asyncio
 import ctypes
+import threading
+import time
+import numpy as np
 from ctypes import POINTER, c_uint8, c_int, c_void_p
-from camera_sdk import fli_usb
+from camera_sdk import fli_usb, FLI_USB_ERROR_LEVEL_ERROR, FLI_USB_ERROR_LEVEL_WARNING, FLI_USB_ERROR_LEVEL_INFO, frame_tags
+from frame_ring import FrameRing
+from frame_bus import SharedFrameRing, DEFAULT_BUS_NAME
+from acq_stats import AcquisitionStats
+from ingest import BatchedIngest
+from pretrigger import PretriggerRecorder
+from recording import FrameRecord, RecordingWriter, RECORDING_SUFFIX, FRAME_RECORD_DTYPE
+from compression import CompressedRecordingWriter, file_format
+from timebase import ClockModel
+from profiling import profiler
 
-# Constants for error levels
-FLI_USB_ERROR_LEVEL_ERROR = 0x8000
-FLI_USB_ERROR_LEVEL_WARNING = 0x4000
-FLI_USB_ERROR_LEVEL_INFO = 0x2000
+perf_counter_ns = time.perf_counter_ns
+
+# Profiling stages of the acquisition path, see profiling.py
+SPAN_RECORD_CALLBACK = profiler.stage("camera.record_callback")
+SPAN_VIEWER_CALLBACK = profiler.stage("camera.viewer_callback")
+SPAN_CONTINUOUS_CALLBACK = profiler.stage("camera.continuous_callback")
+SPAN_COPY = profiler.stage("camera.copy")  # memmove into the buffer, or hand-off to the stream writer
+SPAN_PUBLISH = profiler.stage("camera.ring_publish")  # Viewer ring or shared-memory frame bus
+SPAN_INGEST = profiler.stage("camera.ingest_batch")
+SPAN_SAVE = profiler.stage("camera.save")
+
+INGEST_SLAB_BYTES = 64 << 20  # Default batched ingest slab size
+NEVER = 1 << 62  # notify_at when nothing is waiting for a frame count
+
+# The SDK is process-wide: initialized once, however many cameras are opened
+sdk_initialized = False
+
+def initialize_sdk():
+    """Initializes the SDK on first use and returns the number of detected cameras."""
+    global sdk_initialized
+    if not sdk_initialized:
+        if fli_usb.fli_usb_init() != 1:
+            raise RuntimeError("Failed to initialize SDK.")
+        sdk_initialized = True
+        print("SDK initialized successfully.")
+    return fli_usb.fli_usb_detect()
 
 class Camera:
     RING_BUFFER_SIZE = 10  # Size of the viewer ring buffer
 
-    def __init__(self):
+    def __init__(self, check_tags=False, index=0):
+        self.index = index  # SDK camera index passed to fli_usb_open
         self.cam_ctx = None
-        self.sdk_initialized = False
+        self.tty_name = None  # Serial port of this camera, known once opened
         self.acq_buffer = None
+        self.acq_records = None
         self.idx = ctypes.c_int(0)
+        self.writer = None  # StreamWriter used instead of acq_buffer when streaming
+        self.stream_limit = 0  # Frames to stream, 0 = until stopped
         self.width = 640  # Default width
         self.height = 512  # Default height
         
-        # Ring buffer for live viewer frames
-        self.viewer_ring_buffer = [None] * self.RING_BUFFER_SIZE
-        self.buffer_index = 0
+        # Ring buffer for live viewer frames, allocated for the current geometry
+        self.viewer_ring = None
+
+        # Shared-memory ring for other processes, see enable_frame_bus()
+        self.frame_bus_name = None
+        self.frame_bus_slots = 64
+        self.frame_bus = None
+
+        # Batched ingest slab and consumer, see enable_batched_ingest()
+        self.batched_ingest = False
+        self.ingest_slots = 0
+        self.ingest = None
+        self.ingest_mode = None
+
+        # Continuous recording with pre-trigger buffer, see prepare_pretrigger()
+        self.pretrigger = None
+
+        # Record-mode completion and progress, see wait_for_frames()
+        self.target_frames = 0  # Frames to record, 0 = until stopped
+        self.done = threading.Event()  # Set when target_frames are stored or acquisition stops
+        self.notify_at = NEVER  # Stored frame count at which the callback calls _notify()
+        self.progress_listeners = []  # [listener, every, next_count]
+        self.waiters = []  # (loop, future) from frames_future()
+        self.waiter_lock = threading.Lock()
+
+        # Per-frame statistics, reset at every acquisition start
+        self.stats = AcquisitionStats(check_tags)
 
     def initialize_camera_context(self):
         """Initializes SDK and opens the camera context."""
-        if not self.sdk_initialized:
-            if fli_usb.fli_usb_init() != 1:
-                raise RuntimeError("Failed to initialize SDK.")
-            self.sdk_initialized = True
-            print("SDK initialized successfully.")
+        nb_cam = initialize_sdk()
 
         if self.cam_ctx is not None:
             print("Camera context already initialized.")
             return
 
-        nb_cam = fli_usb.fli_usb_detect()
         if nb_cam <= 0:
             raise RuntimeError("No cameras detected")
+        if self.index >= nb_cam:
+            raise RuntimeError(f"Camera {self.index} not found, {nb_cam} camera(s) detected")
 
-        cam_ctx = fli_usb.fli_usb_open(0, error_callback, None)
+        cam_ctx = fli_usb.fli_usb_open(self.index, error_callback, ctypes.py_object(self))
         self.cam_ctx = ctypes.c_void_p(cam_ctx)
         if not self.cam_ctx:
-            raise RuntimeError("Failed to open camera")
-        print(f"Camera opened successfully, cam_ctx: {hex(self.cam_ctx.value)}")
+            self.cam_ctx = None
+            raise RuntimeError(f"Failed to open camera {self.index}")
+        print(f"Camera {self.index} opened successfully, cam_ctx: {hex(self.cam_ctx.value)}")
 
         tty_name = fli_usb.fli_usb_get_associated_tty(self.cam_ctx)
-        print(f"Associated TTY: {tty_name.decode() if tty_name else 'None'}")
+        self.tty_name = tty_name.decode() if tty_name else None
+        print(f"Associated TTY: {self.tty_name or 'None'}")
+
+    def close_camera_context(self):
+        """Closes the camera context; the SDK itself stays initialized."""
+        if self.cam_ctx:
+            fli_usb.fli_usb_close(self.cam_ctx)
+            self.cam_ctx = None
+            self.close_frame_bus()
+            print(f"Camera {self.index} closed.")
 
     def configure_acquisition(self, width, height):
         """Sets the width and height before starting acquisition."""
         self.width = width
         self.height = height
 
+    def prepare_recording(self, num_frames):
+        """Allocates the record-mode buffer and per-frame index for `num_frames` frames.
+
+        A buffer of the same size from the previous recording is reused, which
+        saves allocating and zeroing it again before every capture.
+        """
+        size = self.width * self.height * 2 * num_frames
+        if self.acq_buffer is None or self.acq_buffer._length_ != size:
+            self.acq_buffer = ctypes.create_string_buffer(size)
+        if self.acq_records is None or len(self.acq_records) != num_frames:
+            self.acq_records = (FrameRecord * num_frames)()
+        self.idx.value = 0
+        self.writer = None
+        self._arm_completion(num_frames)
+
+    def prepare_stream(self, writer, max_frames=0):
+        """Streams record-mode frames to `writer` (a StreamWriter) instead of a RAM buffer."""
+        self.writer = writer
+        self.stream_limit = max_frames
+        self.idx.value = 0
+        self._arm_completion(max_frames)
+
+    def _arm_completion(self, target_frames):
+        self.target_frames = target_frames
+        self.done.clear()
+        for listener in self.progress_listeners:
+            listener[2] = listener[1]
+        self.notify_at = self._next_notify()
+
+    def _next_notify(self):
+        counts = [listener[2] for listener in self.progress_listeners]
+        if self.target_frames:
+            counts.append(self.target_frames)
+        return min(counts, default=NEVER)
+
+    def _notify(self):
+        """Calls progress listeners and signals completion; run by the callback when idx reaches notify_at."""
+        frames = self.idx.value
+        complete = self.target_frames and frames >= self.target_frames
+        for listener in self.progress_listeners:
+            if complete or frames >= listener[2]:
+                listener[0](frames, self.target_frames)
+                listener[2] = (frames // listener[1] + 1) * listener[1]
+        if complete:
+            self._finish()
+        else:
+            self.notify_at = self._next_notify()
+
+    def _finish(self):
+        """Sets `done` and resolves the futures waiting for it."""
+        self.notify_at = NEVER
+        with self.waiter_lock:
+            self.done.set()
+            waiters, self.waiters = self.waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(resolve_future, future, self.idx.value)
+
+    def add_progress_listener(self, listener, every=1000):
+        """Calls `listener(frames, target_frames)` every `every` stored frames in record mode, and on completion.
+
+        Listeners run on the acquisition thread, so they must be quick; to touch
+        the UI, hand over with loop.call_soon_threadsafe().
+        """
+        self.progress_listeners.append([listener, every, (self.idx.value // every + 1) * every])
+        self.notify_at = self._next_notify()
+
+    def remove_progress_listener(self, listener):
+        self.progress_listeners = [entry for entry in self.progress_listeners if entry[0] is not listener]
+        self.notify_at = self._next_notify()
+
+    def wait_for_frames(self, timeout=None):
+        """Blocks until the prepared frame count is stored or acquisition stops; False on timeout."""
+        return self.done.wait(timeout)
+
+    def frames_future(self):
+        """Returns an asyncio future for wait_for_frames(), resolved with the stored frame count."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self.waiter_lock:
+            if self.done.is_set():
+                future.set_result(self.idx.value)
+            else:
+                self.waiters.append((loop, future))
+        return future
+
+    def prepare_pretrigger(self, pre_frames, post_frames, output_prefix="event", suffix=RECORDING_SUFFIX,
+                           fps=0.0, settings=None, condition=None):
+        """Sets up continuous recording for start_acquisition("continuous").
+
+        The last `pre_frames` frames are kept in a circular buffer; trigger()
+        (or `condition`, e.g. a pretrigger.ThresholdTrigger, returning True for
+        a frame) saves them with the event frame and `post_frames` more to a
+        new file, without stopping acquisition. A buffer of the same geometry
+        and size is reused.
+        """
+        recorder = self.pretrigger
+        if recorder is None or (recorder.height, recorder.width, recorder.pre_frames, recorder.post_frames) \
+                != (self.height, self.width, pre_frames, post_frames):
+            recorder = PretriggerRecorder(self.height, self.width, pre_frames, post_frames)
+            self.pretrigger = recorder
+        recorder.output_prefix = output_prefix
+        recorder.suffix = suffix
+        recorder.fps = fps
+        recorder.settings = dict(settings or {}, camera_index=self.index, tty=self.tty_name)
+        recorder.condition = condition
+        return recorder
+
+    def trigger(self, source="manual"):
+        """Saves the pre-trigger window around the newest frame in continuous mode; returns the output file or None."""
+        if self.pretrigger is None or self.pretrigger.thread is None:
+            raise RuntimeError("Continuous recording is not running.")
+        return self.pretrigger.trigger(source)
+
+    def enable_frame_bus(self, name=DEFAULT_BUS_NAME, num_slots=64):
+        """Publishes frames to a shared-memory ring that frame_bus.FrameBusClient can read from other processes.
+
+        In viewer mode the bus is the viewer ring itself, so frames still cost a
+        single memmove; in record mode the callback copies each frame to the bus
+        as well as to the record buffer, which also makes record-mode frames
+        available to in-process readers such as processing.Pipeline.
+        """
+        self.frame_bus_name = name
+        self.frame_bus_slots = num_slots
+
+    def _prepare_frame_bus(self):
+        bus = self.frame_bus
+        if bus is not None and (bus.height, bus.width) == (self.height, self.width):
+            bus.reset()
+            return
+        self.close_frame_bus()  # Clients reattach to the block for the new geometry
+        self.frame_bus = SharedFrameRing(self.frame_bus_slots, self.height, self.width, self.frame_bus_name)
+        print(f"Publishing frames to shared memory '{self.frame_bus_name}'")
+
+    def close_frame_bus(self):
+        if self.frame_bus is not None:
+            if self.viewer_ring is self.frame_bus:
+                self.viewer_ring = None
+            self.frame_bus.close()
+            self.frame_bus = None
+
+    def enable_batched_ingest(self, enabled=True, num_slots=0):
+        """Uses the low-overhead BatchedIngest callback instead of viewer_callback/data_callback.
+
+        The callback only copies each frame into a slab of `num_slots` frames
+        (0 sizes it to about INGEST_SLAB_BYTES), which is also the viewer ring;
+        statistics, the record buffer or stream writer and the frame bus are
+        updated in batches by the consumer thread. This pays off for small,
+        fast frames; for large frames the copy dominates and the per-frame
+        callbacks are as fast.
+        """
+        self.batched_ingest = enabled
+        self.ingest_slots = num_slots
+
+    @property
+    def ingest_slab_slots(self):
+        """Slots of the batched ingest slab for the current geometry."""
+        return self.ingest_slots or max(64, min(4096, INGEST_SLAB_BYTES // (self.width * self.height * 2)))
+
+    def _prepare_ingest(self, mode):
+        num_slots = self.ingest_slab_slots
+        ingest = self.ingest
+        if ingest is None or (ingest.height, ingest.width) != (self.height, self.width) \
+                or ingest.num_slots < num_slots:
+            self.ingest = ingest = BatchedIngest(num_slots, self.height, self.width, self._ingest_batch)
+        else:
+            ingest.reset()
+        self.ingest_mode = mode
+        self.viewer_ring = ingest
+        ingest.start()
+        return ingest.callback
+
+    def _ingest_batch(self, first_seq, frames, timestamps, statuses):
+        """Batch handler run on the BatchedIngest consumer thread; does what the per-frame callbacks do."""
+        start_ns = perf_counter_ns()
+        count = len(frames)
+        if self.ingest_mode == "record":
+            if self.writer is not None:
+                if self.stream_limit:
+                    count = min(count, self.stream_limit - self.idx.value)
+                if count > 0:
+                    self.idx.value += self.writer.write_batch(frames[:count], first_seq,
+                                                              timestamps[:count], statuses[:count])
+                if self.writer.error is not None and not self.done.is_set():
+                    self._finish()
+            else:
+                frame_size = self.width * self.height * 2
+                start = self.idx.value
+                count = min(count, self.acq_buffer._length_ // frame_size - start)
+                if count > 0:
+                    buffer = np.frombuffer(self.acq_buffer, dtype=np.uint16).reshape(-1, self.height, self.width)
+                    buffer[start:start + count] = frames[:count]
+                    if self.acq_records is not None:
+                        records = np.frombuffer(self.acq_records, dtype=FRAME_RECORD_DTYPE)[start:start + count]
+                        records["seq"] = np.arange(first_seq, first_seq + count)
+                        records["timestamp_ns"] = timestamps[:count]
+                        records["status"] = statuses[:count]
+                    self.idx.value = start + count
+            if self.idx.value >= self.notify_at:
+                self._notify()
+        if self.frame_bus is not None:
+            self.frame_bus.write_batch(frames, first_seq, timestamps, statuses)
+        self.stats.record_batch(timestamps, statuses, frame_tags(frames) if self.stats.check_tags else None)
+        if profiler.enabled:
+            profiler.record(SPAN_INGEST, start_ns)
+
     def start_acquisition(self, mode="record"):
-        """Starts camera acquisition using the specified mode: 'record' or 'viewer'."""
+        """Starts camera acquisition using the specified mode: 'record', 'viewer' or 'continuous'."""
         if not self.cam_ctx:
             raise RuntimeError("Invalid camera context.")
 
         if fli_usb.fli_usb_checkTagEnable(self.cam_ctx, 1) != 1:
             raise RuntimeError("Failed to enable tag checking.")
 
+        if mode == "continuous":
+            if self.pretrigger is None:
+                raise RuntimeError("Call prepare_pretrigger() before continuous recording.")
+            if self.frame_bus_name is not None:
+                self._prepare_frame_bus()
+            self.pretrigger.reset()
+            self.pretrigger.start()
+            self.viewer_ring = self.pretrigger  # Live view keeps working while recording
+        elif self.batched_ingest:
+            if self.frame_bus_name is not None:
+                self._prepare_frame_bus()  # Published by the consumer, the slab is the in-process ring
+        elif self.frame_bus_name is not None:
+            # The bus doubles as the in-process ring, in record mode too (see get_frames_since)
+            self._prepare_frame_bus()
+            self.viewer_ring = self.frame_bus
+        else:
+            # Record mode publishes to the ring too, so the preview and processing.Pipeline keep working
+            ring = self.viewer_ring
+            if type(ring) is not FrameRing or (ring.num_slots, ring.height, ring.width) != \
+                    (self.RING_BUFFER_SIZE, self.height, self.width):
+                self.viewer_ring = FrameRing(self.RING_BUFFER_SIZE, self.height, self.width)
+            else:
+                ring.reset()
+
+        self.stats.reset()
+
         # Choose the correct callback based on mode
-        callback = viewer_callback if mode == "viewer" else data_callback
+        if mode == "continuous":
+            callback = continuous_callback  # Per frame, so the trigger condition sees every frame as it arrives
+        elif self.batched_ingest:
+            callback = self._prepare_ingest(mode)
+        else:
+            callback = viewer_callback if mode == "viewer" else data_callback
         if fli_usb.fli_usb_startAcquisition(self.cam_ctx, self.width, self.height, callback, ctypes.py_object(self)) != 1:
+            if self.ingest_mode is not None:
+                self.ingest.stop()
+                self.ingest_mode = None
+            if mode == "continuous":
+                self.pretrigger.stop()
             raise RuntimeError("Failed to start acquisition.")
         print("Camera acquisition started.")
 
@@ -72,44 +383,136 @@ class Camera:
             print("Failed to stop acquisition.")
         else:
             print("Camera acquisition stopped.")
+        if self.ingest_mode is not None:
+            self.ingest.stop()  # Handles the frames still in the slab
+            self.ingest_mode = None
+            print(f"Batched ingest: {self.ingest.status()}")
+        if self.pretrigger is not None and self.pretrigger.thread is not None:
+            self.pretrigger.stop()  # Finishes events still being saved
+        if not self.done.is_set():
+            self._finish()  # Releases waiters when stopped before the target
 
-    def get_latest_frame(self):
-        """Returns the latest frame in the ring buffer for live viewing."""
-        latest_frame = self.viewer_ring_buffer[(self.buffer_index - 1) % self.RING_BUFFER_SIZE]
-        return latest_frame
+    def get_latest_frame(self, copy=True):
+        """Returns (frame, frame_number, timestamp_ns) for the latest viewer frame, or (None, -1, 0)."""
+        if self.viewer_ring is None:
+            return None, -1, 0
+        return self.viewer_ring.get_latest_frame(copy)
+
+    def get_frames_since(self, seq, max_frames=None, out=None):
+        """Returns (frames, first_frame_number, timestamps) for viewer frames newer than `seq`."""
+        if self.viewer_ring is None:
+            empty = np.zeros((0, self.height, self.width), dtype=np.uint16)
+            return empty, seq + 1, np.zeros(0, dtype=np.int64)  # Nothing acquired yet
+        return self.viewer_ring.get_frames_since(seq, max_frames, out)
     
-    def save_data_to_file(self, output_file):
-        """Saves acquisition buffer to a file."""
-        with open(output_file, "wb") as outfile:
-            outfile.write(self.acq_buffer.raw)
+    def save_data_to_file(self, output_file, fps=0.0, settings=None, fmt=None, compression=None):
+        """Saves acquisition buffer to a file: a .flr recording with index, a compressed .flz one, or headerless .raw.
+
+        The format follows the file suffix unless `fmt` ('flr', 'flz' or 'raw')
+        is given. `compression` holds CompressedRecordingWriter options (codec,
+        filter, level, workers) for .flz. Returns the recording's fitted
+        timebase.ClockModel, or None for .raw, which has no per-frame index.
+        """
+        start_ns = perf_counter_ns()
+        fmt = fmt or file_format(output_file)
+        if fmt in ("flr", "flz") and self.acq_records is not None:
+            if fmt == "flz":
+                writer = CompressedRecordingWriter(output_file, self.width, self.height, fps, settings,
+                                                   **(compression or {}))
+            else:
+                writer = RecordingWriter(output_file, self.width, self.height, fps, settings)
+            writer.open()
+            writer.write_buffer(self.acq_buffer, self.acq_records, self.idx.value)
+            writer.close(measured_fps=self.stats.achieved_fps)
+            clock = ClockModel.from_dict(writer.metadata["clock"])
+        else:
+            clock = None
+            # Zero what was not captured this time, so a reused buffer never leaks an earlier recording
+            frame_size = self.width * self.height * 2
+            used = self.idx.value * frame_size
+            if used < self.acq_buffer._length_:
+                ctypes.memset(ctypes.addressof(self.acq_buffer) + used, 0, self.acq_buffer._length_ - used)
+            with open(output_file, "wb") as outfile:
+                outfile.write(self.acq_buffer)
+        if profiler.enabled:
+            profiler.record(SPAN_SAVE, start_ns)
+            profiler.count("camera.frames_saved", self.idx.value)
         print(f"Data saved to {output_file}")
+        return clock
+
+def resolve_future(future, frames):
+    if not future.done():
+        future.set_result(frames)
 
 @ctypes.CFUNCTYPE(None, c_void_p, POINTER(c_uint8), c_int)
 def viewer_callback(userctx, frame, status):
     """Callback to store frames in the viewer ring buffer."""
+    start_ns = perf_counter_ns()
     camera = ctypes.cast(userctx, ctypes.py_object).value
-    frame_size = camera.width * camera.height * 2
-
-    # Allocate space for frame data if not already allocated
-    if camera.viewer_ring_buffer[camera.buffer_index] is None:
-        camera.viewer_ring_buffer[camera.buffer_index] = ctypes.create_string_buffer(frame_size)
-
-    # Copy the frame data into the ring buffer slot
-    ctypes.memmove(camera.viewer_ring_buffer[camera.buffer_index], frame, frame_size)
-    camera.buffer_index = (camera.buffer_index + 1) % camera.RING_BUFFER_SIZE
+    camera.viewer_ring.write_frame(frame, status)
+    if profiler.enabled:
+        profiler.record(SPAN_PUBLISH, start_ns)
+    camera.stats.record(frame, status, start_ns)
+    if profiler.enabled:
+        profiler.record(SPAN_VIEWER_CALLBACK, start_ns)
 
 @ctypes.CFUNCTYPE(None, c_void_p, POINTER(c_uint8), c_int)
 def data_callback(userctx, frame, status):
     """Callback to process frame data during acquisition for recording."""
+    start_ns = perf_counter_ns()
     camera = ctypes.cast(userctx, ctypes.py_object).value
-    if camera.idx.value < int(camera.acq_buffer._length_ / (camera.width * camera.height * 2)):
+    profiling = profiler.enabled
+    if camera.writer is not None:
+        if camera.stream_limit == 0 or camera.idx.value < camera.stream_limit:
+            # A full chunk pool drops the frame (counted by the writer); only stored frames count toward the limit
+            if camera.writer.write_frame(frame, camera.stats.frames, status):
+                camera.idx.value += 1
+                if camera.idx.value >= camera.notify_at:
+                    camera._notify()
+            elif camera.writer.error is not None and not camera.done.is_set():
+                camera._finish()  # The disk write failed: wake the waiters instead of dropping every frame
+            if profiling:
+                profiler.record(SPAN_COPY, start_ns)
+    elif camera.idx.value < int(camera.acq_buffer._length_ / (camera.width * camera.height * 2)):
         offset = camera.idx.value * camera.width * camera.height * 2
         ctypes.memmove(ctypes.byref(camera.acq_buffer, offset), frame, camera.width * camera.height * 2)
+        if profiling:
+            profiler.record(SPAN_COPY, start_ns)
+        if camera.acq_records is not None:
+            record = camera.acq_records[camera.idx.value]
+            record.seq = camera.stats.frames
+            record.timestamp_ns = time.monotonic_ns()
+            record.status = status
         camera.idx.value += 1
+        if camera.idx.value >= camera.notify_at:
+            camera._notify()
+    publish_ns = perf_counter_ns() if profiling else 0
+    camera.viewer_ring.write_frame(frame, status)  # The frame bus when there is one, else the in-process ring
+    if profiling:
+        profiler.record(SPAN_PUBLISH, publish_ns)
+    camera.stats.record(frame, status, start_ns)
+    if profiling:
+        profiler.record(SPAN_RECORD_CALLBACK, start_ns)
+
+@ctypes.CFUNCTYPE(None, c_void_p, POINTER(c_uint8), c_int)
+def continuous_callback(userctx, frame, status):
+    """Callback to keep frames in the pre-trigger buffer during continuous recording."""
+    start_ns = perf_counter_ns()
+    camera = ctypes.cast(userctx, ctypes.py_object).value
+    camera.pretrigger.write_frame(frame, status)
+    if profiler.enabled:
+        profiler.record(SPAN_COPY, start_ns)
+    if camera.frame_bus is not None:
+        camera.frame_bus.write_frame(frame, status)
+    camera.stats.record(frame, status, start_ns)
+    if profiler.enabled:
+        profiler.record(SPAN_CONTINUOUS_CALLBACK, start_ns)
 
 @ctypes.CFUNCTYPE(None, c_void_p, c_int, ctypes.c_char_p)
 def error_callback(userctx, error, diag):
     """Error callback function for SDK."""
+    if userctx:
+        ctypes.cast(userctx, ctypes.py_object).value.stats.record_message(error)
     if error & FLI_USB_ERROR_LEVEL_ERROR:
         level = "Critical error"
     elif error & FLI_USB_ERROR_LEVEL_WARNING:
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from camera import Camera, initialize_sdk
+from recording import RecordingWriter, RECORDING_SUFFIX
+from compression import CompressedRecordingWriter, COMPRESSED_SUFFIX, file_format
+from camera_settings import nominal_fps
+from stream_writer import StreamWriter
+
+
+def camera_output_name(output_file, index):
+    """Per-camera file name: output.flr -> output_cam0.flr."""
+    stem, suffix = os.path.splitext(output_file)
+    return f"{stem}_cam{index}{suffix}"
+
+
+def parse_camera_list(text):
+    """Parses 'all' (None) or a comma separated list of camera indices."""
+    if text == "all":
+        return None
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+class CameraManager:
+    """Opens every detected camera (or a chosen subset) and drives them together.
+
+    Each head is a separate Camera with its own SDK context, associated TTY,
+    buffers and statistics; the Camera object is the callback context, so the
+    callbacks of different heads never share state. Start and stop run in one
+    thread per camera released together by a barrier, so slow SDK calls overlap
+    instead of adding up; the spread between the first and last camera to
+    return is kept as start_skew_ns / stop_skew_ns.
+    """
+
+    def __init__(self, indices=None, check_tags=False):
+        self.indices = indices
+        self.check_tags = check_tags
+        self.cameras = []
+        self.start_skew_ns = 0
+        self.stop_skew_ns = 0
+        self.frame_size = 0
+
+    def open_all(self):
+        """Opens the selected cameras (all detected ones by default)."""
+        nb_cam = initialize_sdk()
+        if nb_cam <= 0:
+            raise RuntimeError("No cameras detected")
+        print(f"{nb_cam} camera(s) detected")
+        indices = range(nb_cam) if self.indices is None else self.indices
+        for index in indices:
+            camera = Camera(self.check_tags, index)
+            try:
+                camera.initialize_camera_context()
+            except RuntimeError:
+                self.close_all()
+                raise
+            self.cameras.append(camera)
+        return self.cameras
+
+    @property
+    def tty_names(self):
+        """Associated serial port of each open camera, by camera index."""
+        return {camera.index: camera.tty_name for camera in self.cameras}
+
+    def configure_acquisition(self, width, height):
+        self.frame_size = width * height * 2
+        for camera in self.cameras:
+            camera.configure_acquisition(width, height)
+
+    def prepare_recording(self, num_frames):
+        """Allocates a separate RAM buffer of `num_frames` frames for each camera."""
+        for camera in self.cameras:
+            camera.prepare_recording(num_frames)
+
+    def prepare_streams(self, output_file, num_frames=0, chunk_frames=256, num_chunks=8, fps=0.0, settings=None,
+                        compression=None):
+        """Gives each camera its own StreamWriter writing to a per-camera file (.raw, .flr or .flz)."""
+        for camera in self.cameras:
+            name = camera_output_name(output_file, camera.index)
+            sink = name
+            camera_settings = dict(settings or {}, camera_index=camera.index, tty=camera.tty_name)
+            if name.endswith(RECORDING_SUFFIX):
+                sink = RecordingWriter(name, camera.width, camera.height, nominal_fps(fps, camera.tty_name),
+                                       camera_settings, chunk_frames)
+            elif name.endswith(COMPRESSED_SUFFIX):
+                sink = CompressedRecordingWriter(name, camera.width, camera.height, nominal_fps(fps, camera.tty_name),
+                                                 camera_settings, chunk_frames,
+                                                 **(compression or {}))
+            camera.prepare_stream(StreamWriter(sink, camera.width * camera.height * 2, chunk_frames, num_chunks),
+                                  num_frames)
+
+    def _call_together(self, method, *args):
+        """Calls `method` on every camera at once; returns (failures, skew_ns)."""
+        barrier = threading.Barrier(len(self.cameras))
+        done_ns = {}
+        failures = {}
+
+        def run(camera):
+            barrier.wait()
+            try:
+                getattr(camera, method)(*args)
+            except RuntimeError as e:
+                failures[camera.index] = e
+            done_ns[camera.index] = time.perf_counter_ns()
+
+        threads = [threading.Thread(target=run, args=(camera,), name=f"{method} {camera.index}")
+                   for camera in self.cameras]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return failures, max(done_ns.values()) - min(done_ns.values())
+
+    def start_acquisition(self, mode="record"):
+        """Starts every camera; if one fails, the others are stopped again."""
+        for camera in self.cameras:
+            if camera.writer is not None:
+                camera.writer.start()
+        failures, self.start_skew_ns = self._call_together("start_acquisition", mode)
+        if failures:
+            for camera in self.cameras:
+                if camera.index not in failures:
+                    camera.stop_acquisition()
+            self.finish_streams()
+            raise RuntimeError(f"Failed to start camera(s): {failures}")
+
+    def stop_acquisition(self):
+        _, self.stop_skew_ns = self._call_together("stop_acquisition")
+
+    def frames_done(self, count):
+        """True once every camera has stored `count` frames."""
+        return all(camera.idx.value >= count for camera in self.cameras)
+
+    def wait_for_frames(self, timeout=None):
+        """Blocks until every camera has stored its prepared frame count or stopped; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for camera in self.cameras:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not camera.wait_for_frames(remaining):
+                return False
+        return True
+
+    def save_all(self, output_file, fps=0.0, settings=None, compression=None):
+        """Writes each camera's RAM buffer to its per-camera file, with each camera's nominal fps (see nominal_fps())."""
+        for camera in self.cameras:
+            camera_settings = dict(settings or {}, camera_index=camera.index, tty=camera.tty_name)
+            name = camera_output_name(output_file, camera.index)
+            if file_format(name) != "raw":
+                fps_for_camera = nominal_fps(fps, camera.tty_name)
+            else:
+                fps_for_camera = fps  # A .raw file has no header to store it in
+            camera.save_data_to_file(name, fps_for_camera, camera_settings, compression=compression)
+
+    def finish_streams(self):
+        """Flushes and closes the per-camera stream writers; raises RuntimeError if any of them failed."""
+        errors = []
+        for camera in self.cameras:
+            if camera.writer is not None:
+                try:
+                    camera.writer.close(measured_fps=camera.stats.achieved_fps)
+                except RuntimeError as e:
+                    errors.append(f"camera {camera.index}: {e}")
+                print(f"Camera {camera.index} writer: {camera.writer.status()}")
+                camera.writer = None
+        if errors:
+            raise RuntimeError("; ".join(errors))
+
+    def close_all(self):
+        for camera in self.cameras:
+            camera.close_camera_context()
+        self.cameras = []
+
+    @property
+    def total_frames(self):
+        return sum(camera.stats.frames for camera in self.cameras)
+
+    @property
+    def total_fps(self):
+        return sum(camera.stats.achieved_fps for camera in self.cameras)
+
+    def summary(self):
+        """One line per camera plus the aggregate frame rate and data rate."""
+        lines = [f"Camera {camera.index} ({camera.tty_name}): {camera.stats.summary()}" for camera in self.cameras]
+        lines.append(f"All cameras: {self.total_frames} frames, {self.total_fps:.1f} fps, "
+                     f"{self.total_fps * self.frame_size / 1e6:.1f} MB/s, "
+                     f"start skew {self.start_skew_ns / 1e6:.3f} ms")
+        return "\n".join(lines)
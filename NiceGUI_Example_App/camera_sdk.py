@@ -1,16 +1,125 @@
 # camera_sdk.py
 import ctypes
+import os
+import numpy as np
 
-# Load the shared library for camera SDK
-fli_usb = ctypes.CDLL('/opt/first_light_imaging/fliusbsdk/lib/libfliusbsdk.so')
-
-# Configure function return types for the camera SDK
-fli_usb.fli_usb_init.restype = ctypes.c_int
-fli_usb.fli_usb_exit.restype = ctypes.c_int
-fli_usb.fli_usb_detect.restype = ctypes.c_int
-fli_usb.fli_usb_open.restype = ctypes.c_void_p
-fli_usb.fli_usb_get_associated_tty.restype = ctypes.c_char_p
-fli_usb.fli_usb_checkTagEnable.restype = ctypes.c_int
-fli_usb.fli_usb_startAcquisition.restype = ctypes.c_int
-fli_usb.fli_usb_stopAcquisition.restype = ctypes.c_int
-fli_usb.fli_usb_close.restype = ctypes.c_int
\ No newline at end of file
+SDK_LIBRARY_PATH = '/opt/first_light_imaging/fliusbsdk/lib/libfliusbsdk.so'
+
+# Constants for error levels (from the SDK documentation)
+FLI_USB_ERROR_LEVEL_ERROR = 0x8000
+FLI_USB_ERROR_LEVEL_WARNING = 0x4000
+FLI_USB_ERROR_LEVEL_INFO = 0x2000
+
+# Image tag. With fli_usb_checkTagEnable(ctx, 1) the SDK checks a tag carried in
+# each frame, but its documentation does not give the tag's layout. The layout
+# used here is the one sim_sdk.py writes: a 32-bit frame counter, low word first,
+# in the first TAG_PIXELS pixels. Verify it against your camera before trusting
+# tag-based counts. Everything that reads the counter goes through frame_tag() /
+# frame_tags(), and treats tags that do not count up (tags_count_frames()) as absent.
+TAG_PIXELS = 2
+TAG_MODULO = 1 << 32
+TAG_POINTER = ctypes.POINTER(ctypes.c_uint32)
+
+
+def frame_tag(frame):
+    """Frame counter in the tag of one frame, given as the SDK's frame pointer."""
+    return ctypes.cast(frame, TAG_POINTER)[0]
+
+
+def frame_tags(frames):
+    """Frame counters in the tags of an (n, H, W) uint16 array, as int64."""
+    tags = np.ascontiguousarray(frames.reshape(len(frames), -1)[:, :TAG_PIXELS])
+    return tags.view(np.uint32)[:, 0].astype(np.int64)
+
+
+def tags_count_frames(steps, bad_steps):
+    """True if tags look like a frame counter: at least half of `steps` consecutive-frame steps were +1.
+
+    `bad_steps` is how many of them were not. Few frames are not enough to tell,
+    so this is True until there are some.
+    """
+    return steps < 16 or bad_steps * 2 <= steps
+
+
+def load_sdk_library(path=SDK_LIBRARY_PATH):
+    """Loads the FLI USB SDK shared library and configures its return types."""
+    lib = ctypes.CDLL(path)
+    lib.fli_usb_init.restype = ctypes.c_int
+    lib.fli_usb_exit.restype = ctypes.c_int
+    lib.fli_usb_detect.restype = ctypes.c_int
+    lib.fli_usb_open.restype = ctypes.c_void_p
+    lib.fli_usb_get_associated_tty.restype = ctypes.c_char_p
+    lib.fli_usb_checkTagEnable.restype = ctypes.c_int
+    lib.fli_usb_startAcquisition.restype = ctypes.c_int
+    lib.fli_usb_stopAcquisition.restype = ctypes.c_int
+    lib.fli_usb_close.restype = ctypes.c_int
+    return lib
+
+
+def sim_options_from_env():
+    """Reads simulator settings from FLI_USB_SIM_* environment variables."""
+    options = {}
+    if "FLI_USB_SIM_FPS" in os.environ:
+        options["fps"] = float(os.environ["FLI_USB_SIM_FPS"])
+    if "FLI_USB_SIM_CAMERAS" in os.environ:
+        options["num_cameras"] = int(os.environ["FLI_USB_SIM_CAMERAS"])
+    if "FLI_USB_SIM_DROP_RATE" in os.environ:
+        options["drop_rate"] = float(os.environ["FLI_USB_SIM_DROP_RATE"])
+    if "FLI_USB_SIM_ERROR_RATE" in os.environ:
+        options["error_rate"] = float(os.environ["FLI_USB_SIM_ERROR_RATE"])
+    return options
+
+
+class SdkBackend:
+    """Forwards fli_usb_* calls to the selected SDK backend.
+
+    'sdk' loads the real shared library, 'sim' uses the software camera from
+    sim_sdk.py. The backend is loaded on first use, so scripts can still call
+    select_backend() after importing fli_usb. The default comes from the
+    FLI_USB_BACKEND environment variable.
+    """
+
+    def __init__(self):
+        self._impl = None
+        self._name = os.environ.get("FLI_USB_BACKEND", "sdk")
+        self._options = {}
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def impl(self):
+        """The loaded backend: the SDK library, or a sim_sdk.SimulatedFliUsb whose settings can be changed."""
+        return self._impl if self._impl is not None else self._load()
+
+    def select(self, name, **options):
+        """Chooses the backend to load. Must be called before the first SDK call."""
+        if self._impl is not None:
+            raise RuntimeError(f"SDK backend '{self._name}' is already loaded.")
+        if name not in ("sdk", "sim"):
+            raise ValueError(f"Unknown SDK backend '{name}', expected 'sdk' or 'sim'.")
+        self._name = name
+        self._options = options
+
+    def _load(self):
+        if self._name == "sim":
+            from sim_sdk import SimulatedFliUsb
+            options = sim_options_from_env()
+            options.update(self._options)
+            self._impl = SimulatedFliUsb(**options)
+        else:
+            self._impl = load_sdk_library(self._options.get("path", SDK_LIBRARY_PATH))
+        return self._impl
+
+    def __getattr__(self, attr):
+        return getattr(self.impl, attr)
+
+
+# Load the shared library for camera SDK (or the simulator) on first use
+fli_usb = SdkBackend()
+
+
+def select_backend(name, **options):
+    """Selects the SDK backend used by fli_usb ('sdk' or 'sim')."""
+    fli_usb.select(name, **options)
@@ -0,0 +1,120 @@
+import re
+import time
+import serial
+from serial_link import query
+
+# Query command for each cached setting; the raw response is what gets cached
+SETTING_QUERIES = {
+    "cropping": "cropping raw",
+    "fps": "fps raw",
+    "tint": "tint raw",  # Exposure time
+}
+
+# Settings whose cached value can no longer be trusted after `set <name> ...`
+# (the maximum frame rate and exposure depend on the cropping window)
+AFFECTED_SETTINGS = {
+    "cropping": ("cropping", "fps", "tint"),
+    "fps": ("fps", "tint"),
+    "tint": ("tint",),
+}
+
+SET_COMMAND = re.compile(r"^\s*set\s+(\w+)", re.IGNORECASE)
+DEFAULT_TTL = 60.0  # Seconds before a cached value is queried again
+NUMBER = re.compile(r"([\d.]+)")
+
+
+def nominal_fps(fps, port, timeout=2.0):
+    """The camera's nominal frame rate: `fps` if given, else the answer to `fps raw` on its serial port.
+
+    Recordings store this as their nominal rate, which the frame clock's drift
+    is measured against. Returns 0.0 with a warning if the camera does not
+    answer; recordings then have no drift figure.
+    """
+    if fps:
+        return fps
+    try:
+        match = NUMBER.search(query(port, SETTING_QUERIES["fps"], timeout=timeout)) if port else None
+    except (serial.SerialException, OSError, TimeoutError) as e:
+        print(f"Could not read the frame rate from {port}: {e}")
+        match = None
+    if match:
+        return float(match.group(1))
+    print("Warning: nominal frame rate unknown, the frame clock drift will not be computed. Pass --fps to set it.")
+    return 0.0
+
+
+class CameraSettings:
+    """Cache of the camera's raw settings responses, each with the time it was read.
+
+    SerialConsole feeds every command/response pair through note_command(): query
+    responses refresh the cache and `set ...` commands invalidate what they can
+    change. Entries also expire after `ttl` seconds and are all dropped on
+    reconnect, so stale_names() is exactly the set of queries worth sending.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, queries=None):
+        self.ttl = ttl
+        self.queries = dict(queries or SETTING_QUERIES)
+        self.by_command = {command: name for name, command in self.queries.items()}
+        self.values = {}
+        self.updated = {}  # name -> time.monotonic() of the response
+        self.hits = 0
+        self.misses = 0
+
+    def age(self, name):
+        """Seconds since `name` was read, or None if it is not cached."""
+        if name not in self.updated:
+            return None
+        return time.monotonic() - self.updated[name]
+
+    def is_fresh(self, name):
+        age = self.age(name)
+        return age is not None and age < self.ttl
+
+    def stale_names(self, names=None):
+        """Returns the settings (all known ones by default) that need a query."""
+        names = self.queries if names is None else names
+        stale = [name for name in names if not self.is_fresh(name)]
+        self.misses += len(stale)
+        self.hits += len(names) - len(stale)
+        return stale
+
+    def get(self, name, default=None):
+        """Returns the cached raw response for `name` if it is still fresh."""
+        return self.values.get(name, default) if self.is_fresh(name) else default
+
+    def store(self, name, response):
+        """Caches a response; returns True if it differs from the previous value."""
+        changed = self.values.get(name) != response
+        self.values[name] = response
+        self.updated[name] = time.monotonic()
+        return changed
+
+    def invalidate(self, names=None):
+        """Forgets the given settings, or all of them."""
+        for name in list(self.updated) if names is None else names:
+            self.updated.pop(name, None)
+
+    def note_command(self, command, response):
+        """Updates the cache from a command that went through the console.
+
+        Returns the name of the setting the response belongs to, or None.
+        """
+        command = " ".join(command.lower().split())
+        name = self.by_command.get(command)
+        if name is not None:
+            self.store(name, response)
+            return name
+        match = SET_COMMAND.match(command)
+        if match:
+            # Unknown setters may have side effects on anything, so drop everything
+            self.invalidate(AFFECTED_SETTINGS.get(match.group(1)))
+        return None
+
+    def summary(self):
+        parts = []
+        for name in self.queries:
+            age = self.age(name)
+            state = "-" if age is None else f"{self.values[name]!r} ({age:.0f} s{'' if age < self.ttl else ', stale'})"
+            parts.append(f"{name}: {state}")
+        return ", ".join(parts) + f" | hits {self.hits}, misses {self.misses}"
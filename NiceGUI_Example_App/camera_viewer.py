@@ -1,39 +1,62 @@
 import asyncio
+import time
 from nicegui import ui
-import numpy as np
-import cv2
-import io
-import base64
-import ctypes
+from frame_encoder import FrameEncoder
+from preview_stream import PreviewBroadcaster
+from display_lut import COLORMAPS, CONTRAST_MODES
+from profiling import profiler
+
+SPAN_UPDATE_DISPLAY = profiler.stage("viewer.update_display")
 
 class CameraViewer:
-    def __init__(self, camera, serial_console):
+    MAX_DISPLAY_FPS = 30.0  # Preview refresh cap, independent of camera FPS
+    STATS_INTERVAL = 1.0  # Seconds between preview stats updates
+
+    def __init__(self, camera, serial_console, broadcaster=None, stream_prefix="/preview"):
         self.camera = camera
         self.serial_console = serial_console
+        # Frames are encoded once and served to the browser (and other clients) as binary MJPEG
+        self.broadcaster = broadcaster or PreviewBroadcaster()
+        self.stream_prefix = stream_prefix
         self.width = 640
         self.height = 512
         self.fps = 30.0
         self.display_image = None
         self.timer_task = None
         self.last_display_time = 0
+        self.last_frame_number = -1
+        self.encoder = FrameEncoder(self.broadcaster.encode, on_result=self.broadcaster.publish)
         self.setup_ui()
 
     def setup_ui(self):
         with ui.expansion('Camera Viewer', icon='photo_camera').classes('w-full'):
             self.grab_button = ui.button("Start Acquisition", on_click=self.toggle_acquisition).classes('w-full')
             self.display_image = ui.interactive_image().props('no-transition no-spinner').classes('w-full')
+            with ui.row().classes('w-full no-wrap'):
+                ui.select(list(COLORMAPS), value=self.broadcaster.lut.colormap, label='Colormap',
+                          on_change=lambda e: self.broadcaster.lut.set_colormap(e.value)).classes('w-1/2')
+                ui.select(list(CONTRAST_MODES), value=self.broadcaster.lut.mode, label='Contrast',
+                          on_change=lambda e: self.broadcaster.lut.set_mode(e.value)).classes('w-1/2')
+            self.quality_slider = ui.slider(min=10, max=100, step=5, value=self.broadcaster.jpeg_quality,
+                                            on_change=self.set_jpeg_quality).props('label').classes('w-full')
+            self.stats_label = ui.label().classes('text-xs text-gray-500')
 
     async def toggle_acquisition(self):
         if self.grab_button.text == "Start Acquisition":
-            if not self.serial_console.connected:
+            replay = getattr(self.camera, "is_replay", False)
+            if not replay and not self.serial_console.connected:
                 self.log_message("Camera is not connected.")
                 return
             try:
-                # Query camera settings
-                self.serial_console.query_camera_settings()  # Synchronous
-                self.width = self.serial_console.width
-                self.height = self.serial_console.height
-                self.fps = self.serial_console.fps
+                if replay:
+                    # Recorded captures carry their own geometry and frame rate
+                    self.width, self.height, self.fps = self.camera.width, self.camera.height, self.camera.fps
+                else:
+                    # Query camera settings
+                    await self.serial_console.query_camera_settings()
+                    self.width = self.serial_console.width
+                    self.height = self.serial_console.height
+                    self.fps = self.serial_console.fps
 
                 # Configure and start acquisition
                 self.camera.configure_acquisition(self.width, self.height)
@@ -41,6 +64,10 @@ class CameraViewer:
                 self.camera.start_acquisition(mode="viewer")
 
                 # Update UI and start display loop
+                self.last_frame_number = -1
+                self.encoder.reset_stats()
+                self.encoder.start()
+                self.display_image.source = f"{self.stream_prefix}/mjpeg?t={time.time():.0f}"
                 self.grab_button.text = "Stop Acquisition"
                 self.timer_task = asyncio.create_task(self.update_display_loop())
             except RuntimeError as e:
@@ -52,45 +79,43 @@ class CameraViewer:
             if self.timer_task:
                 self.timer_task.cancel()
                 self.timer_task = None
+            self.encoder.stop()
+            # Close the MJPEG stream and keep showing the last frame
+            self.display_image.source = f"{self.stream_prefix}/frame.jpg?t={time.time():.0f}"
 
     async def update_display_loop(self):
         """Asynchronous loop to continuously fetch and display frames."""
         try:
             while True:
                 await self.update_display()
-                await asyncio.sleep(1 / self.fps)  # Refresh rate independent of camera FPS
+                now = time.monotonic()
+                if now - self.last_display_time >= self.STATS_INTERVAL:
+                    self.last_display_time = now
+                    self.stats_label.text = (f"{self.camera.stats.summary()}; {self.encoder.stats_text()}; "
+                                             f"{self.broadcaster.stats_text()}")
+                await asyncio.sleep(1 / min(self.fps, self.MAX_DISPLAY_FPS))
         except asyncio.CancelledError:
             pass  # Graceful exit when acquisition stops
 
     async def update_display(self):
-        """Fetches the latest frame and updates the display."""
-        latest_frame = self.camera.get_latest_frame()
-        if latest_frame is not None:
-            try:
-                # **Ensure buffer size matches expected size**
-                expected_buffer_size = self.width * self.height * 2  # 16-bit (2 bytes per pixel)
-                if len(latest_frame) != expected_buffer_size:
-                    print(f"[ERROR] Buffer size mismatch! Expected {expected_buffer_size}, Got {len(latest_frame)}")
-                    return
-
-                # **Convert to NumPy Array (Assumes Unsigned 16-bit)**
-                self.raw_frame = np.frombuffer(latest_frame, dtype=np.uint16).reshape((self.height, self.width))
-
-                # **Convert from 14-Bit to 8-Bit using Right Shift**
-                image_8bit = (self.raw_frame >> 6).astype(np.uint8)  # 14-bit to 8-bit conversion
-
-                # **Apply Turbo colormap for accurate saturation**
-                color_mapped_image = cv2.applyColorMap(image_8bit, cv2.COLORMAP_TURBO)
-
-                # **Encode to PNG using OpenCV (Faster than PIL)**
-                _, encoded_image = cv2.imencode(".png", color_mapped_image)
-                img_io = io.BytesIO(encoded_image.tobytes())
-
-                # **Update Image Source in UI**
-                self.display_image.source = f"data:image/png;base64,{base64.b64encode(img_io.getvalue()).decode()}"
+        """Hands the latest frame to the encoder; a slow encode drops frames instead of blocking."""
+        start_ns = time.perf_counter_ns()
+        latest_frame, frame_number, _ = self.camera.get_latest_frame()
+        if latest_frame is None or frame_number == self.last_frame_number:
+            return
+        # **Ensure frame geometry matches expected size**
+        if latest_frame.shape != (self.height, self.width):
+            print(f"[ERROR] Frame shape mismatch! Expected {(self.height, self.width)}, Got {latest_frame.shape}")
+            return
+        self.last_frame_number = frame_number
+        self.raw_frame = latest_frame
+        self.encoder.submit(latest_frame, frame_number)
+        if profiler.enabled:
+            profiler.record(SPAN_UPDATE_DISPLAY, start_ns)
 
-            except Exception as e:
-                print(f"[ERROR] Exception in update_display: {e}")
+    def set_jpeg_quality(self, event):
+        """Changes the JPEG quality used for the preview stream."""
+        self.broadcaster.jpeg_quality = int(event.value)
 
     def log_message(self, message):
         """Logs messages to the serial console's log window."""
@@ -1,7 +1,10 @@
-import ctypes
 from datetime import datetime
 import asyncio
 from nicegui import ui
+from recording import RECORDING_SUFFIX
+from compression import COMPRESSED_SUFFIX
+from pretrigger import ThresholdTrigger
+from profiling import profiler
 
 class CaptureFrames:
     def __init__(self, camera, serial_console):
@@ -12,7 +15,25 @@ class CaptureFrames:
     def setup_ui(self):
         with ui.expansion('Capture Frames', icon='image').classes('w-full'):
             self.frame_input = ui.number("Number of Frames", value=10).classes('w-full')
+            self.format_select = ui.select({RECORDING_SUFFIX: "Recording with index (.flr)",
+                                            COMPRESSED_SUFFIX: "Compressed recording (.flz)",
+                                            ".raw": "Headerless (.raw)"},
+                                           value=RECORDING_SUFFIX, label="File Format").classes('w-full')
             self.capture_button = ui.button("Capture", on_click=self.start_capture).classes('w-full')
+            self.capture_progress = ui.linear_progress(value=0, show_value=False).classes('w-full')
+            self.capture_progress.set_visibility(False)
+            ui.separator()
+            ui.label("Continuous recording: keep the last seconds, save them around each trigger")
+            with ui.row().classes('w-full no-wrap'):
+                self.pre_seconds_input = ui.number("Pre-trigger (s)", value=1.0, min=0).classes('w-1/3')
+                self.post_frames_input = ui.number("Post-trigger frames", value=1000, min=0).classes('w-1/3')
+                self.threshold_input = ui.number("Auto-trigger at max ≥ (0 = off)", value=0, min=0).classes('w-1/3')
+            with ui.row().classes('w-full no-wrap'):
+                self.continuous_button = ui.button("Start Continuous", on_click=self.toggle_continuous).classes('w-1/2')
+                self.trigger_button = ui.button("Trigger", on_click=self.trigger).classes('w-1/2')
+                self.trigger_button.disable()
+            self.continuous_label = ui.label().classes('text-xs text-gray-500')
+            self.continuous_timer = ui.timer(0.5, self.update_continuous_status, active=False)
 
     def log_message(self, message):
         """Use SerialConsole's log for messages."""
@@ -24,13 +45,18 @@ class CaptureFrames:
             self.log_message("Camera is not connected.")
             return
 
-        # Run the capture process asynchronously
-        await self.run_capture_process()
+        # Run the capture process asynchronously; no second capture may reuse the buffer while this one saves
+        self.capture_button.disable()
+        try:
+            await self.run_capture_process()
+        finally:
+            self.capture_button.enable()
 
     async def run_capture_process(self):
         """Performs the capture process asynchronously."""
         # Query the latest camera settings
-        self.serial_console.query_camera_settings()
+        with profiler.span("capture.query_settings"):
+            await self.serial_console.query_camera_settings()
 
         # Retrieve the latest width, height, and fps from SerialConsole
         width = self.serial_console.width
@@ -41,24 +67,96 @@ class CaptureFrames:
         self.camera.configure_acquisition(width, height)
         self.camera.initialize_camera_context()
 
-        # Prepare the buffer for frames
         num_frames = int(self.frame_input.value)
-        self.camera.acq_buffer = ctypes.create_string_buffer(width * height * 2 * num_frames)
-        self.camera.idx.value = 0
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f"buffer_{num_frames}frames_{width}x{height}_{fps:.2f}fps_{timestamp}.raw"
+        output_file = f"buffer_{num_frames}frames_{width}x{height}_{fps:.2f}fps_{timestamp}{self.format_select.value}"
         self.log_message(f"Starting capture of {num_frames} frames to {output_file}...")
 
-        # Start acquisition
-        self.camera.start_acquisition()
+        if getattr(self.camera, "is_remote", False):
+            # The acquisition daemon records and saves the file itself
+            with profiler.span("capture.remote_record"):
+                await self.camera.record(num_frames, output_file, fps, self.serial_console.settings)
+        else:
+            # Prepare the buffer for frames
+            self.camera.prepare_recording(num_frames)
 
-        # Wait until all frames are captured asynchronously
-        while self.camera.idx.value < num_frames:
-            await asyncio.sleep(0.01)  # Small asynchronous delay to prevent busy-waiting
+            # Progress comes from the acquisition thread, the bar is updated on the event loop
+            loop = asyncio.get_running_loop()
+            def on_progress(frames, target):
+                loop.call_soon_threadsafe(self.capture_progress.set_value, frames / target)
+            self.camera.add_progress_listener(on_progress, max(num_frames // 100, 1))
+            self.capture_progress.set_value(0)
+            self.capture_progress.set_visibility(True)
 
-        # Stop acquisition after capture is complete
-        self.camera.stop_acquisition()
+            # Start acquisition and wait for the callback to signal the last frame
+            self.camera.start_acquisition()
+            try:
+                with profiler.span("capture.acquire"):
+                    await self.camera.frames_future()
+            finally:
+                # Stop as soon as the last frame is stored
+                self.camera.stop_acquisition()
+                self.camera.remove_progress_listener(on_progress)
+                self.capture_progress.set_visibility(False)
 
-        # Save data to file
-        self.camera.save_data_to_file(output_file)
-        self.log_message(f"Data saved to {output_file}")
\ No newline at end of file
+            # Save data to file off the event loop: compressing a large buffer can take many seconds
+            clock = await asyncio.to_thread(self.camera.save_data_to_file, output_file, fps,
+                                            self.serial_console.settings)
+            if clock is not None:
+                self.log_message(f"Frame clock: {clock.summary()}")
+        self.log_message(f"Data saved to {output_file}")
+        self.log_message(f"Acquisition stats: {self.camera.stats.summary()}")
+        print(self.camera.stats.report())
+
+    async def toggle_continuous(self):
+        if self.continuous_button.text == "Start Continuous":
+            await self.start_continuous()
+        else:
+            await self.stop_continuous()
+
+    async def start_continuous(self):
+        if not self.serial_console.connected:
+            self.log_message("Camera is not connected.")
+            return
+        if getattr(self.camera, "is_remote", False):
+            self.log_message("Continuous recording needs a local camera.")
+            return
+        await self.serial_console.query_camera_settings()
+        width = self.serial_console.width
+        height = self.serial_console.height
+        fps = self.serial_console.fps
+        self.camera.configure_acquisition(width, height)
+        self.camera.initialize_camera_context()
+
+        pre_frames = int(float(self.pre_seconds_input.value) * fps)
+        post_frames = int(self.post_frames_input.value)
+        threshold = self.threshold_input.value
+        condition = ThresholdTrigger(threshold) if threshold else None
+        self.camera.prepare_pretrigger(pre_frames, post_frames, f"event_{width}x{height}_{fps:.2f}fps",
+                                       self.format_select.value, fps, self.serial_console.settings, condition)
+        self.camera.start_acquisition("continuous")
+        self.continuous_button.text = "Stop Continuous"
+        self.trigger_button.enable()
+        self.continuous_timer.activate()
+        self.log_message(f"Continuous recording started: {pre_frames} pre-trigger, {post_frames} post-trigger frames"
+                         + (f", auto-trigger at {threshold}" if condition else ""))
+
+    async def stop_continuous(self):
+        # Waits for the saver to finish the event in progress
+        await asyncio.to_thread(self.camera.stop_acquisition)
+        self.continuous_button.text = "Start Continuous"
+        self.trigger_button.disable()
+        self.continuous_timer.deactivate()
+        self.update_continuous_status()
+        self.log_message(f"Continuous recording stopped, {len(self.camera.pretrigger.saved)} event(s) saved.")
+
+    def trigger(self):
+        output = self.camera.trigger()
+        if output is None:
+            self.log_message("Trigger ignored: the previous event is still collecting post-trigger frames.")
+        else:
+            self.log_message(f"Triggered, saving to {output}")
+
+    def update_continuous_status(self):
+        if self.camera.pretrigger is not None:
+            self.continuous_label.text = self.camera.pretrigger.status()
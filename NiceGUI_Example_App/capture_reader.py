@@ -0,0 +1,207 @@
+import argparse
+import os
+import re
+import threading
+import time
+import numpy as np
+from acq_stats import AcquisitionStats
+from frame_ring import FrameRing
+from recording import RecordingReader, is_recording
+from compression import CompressedRecordingReader, is_compressed_recording
+
+# Name used by CaptureFrames: buffer_{n}frames_{w}x{h}_{fps}fps_{timestamp}.raw
+CAPTURE_NAME_PATTERN = re.compile(r"(\d+)frames_(\d+)x(\d+)_([\d.]+)fps")
+
+
+def parse_capture_name(path):
+    """Returns (frames, width, height, fps) from a CaptureFrames file name, or None."""
+    match = CAPTURE_NAME_PATTERN.search(os.path.basename(path))
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2)), int(match.group(3)), float(match.group(4))
+
+
+class Capture:
+    """Lazy (N, H, W) uint16 view of a capture file, for files larger than RAM.
+
+    Headerless .raw files are memory-mapped as a whole; geometry comes from the
+    CaptureFrames file name convention unless given explicitly. .flr recordings
+    are read chunk by chunk through RecordingReader, and compressed .flz ones
+    through CompressedRecordingReader. Indexing with an integer or
+    slice (including a step, for decimation) only touches the frames requested.
+    """
+
+    def __init__(self, path, width=None, height=None, fps=None):
+        self.path = path
+        self.recording = None
+        self.timestamps = None
+        self.clock = None  # timebase.ClockModel of a recording, see wall_times()
+        if is_recording(path) or is_compressed_recording(path):
+            self.recording = RecordingReader(path) if is_recording(path) else CompressedRecordingReader(path)
+            self.width = self.recording.width
+            self.height = self.recording.height
+            self.fps = fps or self.recording.metadata.get("measured_fps") or self.recording.fps
+            self.frame_count = len(self.recording)
+            self.timestamps = self.recording.index["timestamp_ns"]
+            self.clock = self.recording.clock
+            self.data = None
+        else:
+            parsed = parse_capture_name(path)
+            if (width is None or height is None) and parsed is None:
+                raise ValueError(f"Cannot determine the geometry of {path}; pass width and height.")
+            self.width = width or parsed[1]
+            self.height = height or parsed[2]
+            self.fps = fps or (parsed[3] if parsed else 0.0)
+            frame_size = self.width * self.height * 2
+            self.frame_count = os.path.getsize(path) // frame_size
+            if self.frame_count:
+                self.data = np.memmap(path, dtype=np.uint16, mode="r",
+                                      shape=(self.frame_count, self.height, self.width))
+            else:
+                self.data = np.zeros((0, self.height, self.width), dtype=np.uint16)  # mmap cannot map an empty file
+
+    def wall_times(self):
+        """Wall-clock time of every frame in ns since the Unix epoch, from the clock model; None for .raw."""
+        if self.clock is None or not self.clock.anchors:
+            return None
+        return self.clock.wall_time_ns(self.clock.frame_numbers(self.recording.index))
+
+    @property
+    def shape(self):
+        return self.frame_count, self.height, self.width
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, key):
+        if self.data is not None:
+            return self.data[key]
+        rest = ()
+        if isinstance(key, tuple):
+            key, rest = key[0], key[1:]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.frame_count)
+            frames = self.recording.read(start, stop, step)
+            return frames[(slice(None),) + rest] if rest else frames
+        index = int(key)
+        frame = self.recording.frame(index + self.frame_count if index < 0 else index)
+        return frame[rest] if rest else frame
+
+    def decimate(self, step, start=0, stop=None):
+        """Returns every `step`-th frame as an (n, H, W) array (a memmap view for .raw files)."""
+        return self[start:stop:step]
+
+    def iter_chunks(self, chunk_frames=256, step=1, start=0, stop=None):
+        """Yields (first_frame_index, frames) blocks, reading at most chunk_frames * step frames at a time."""
+        start, stop, _ = slice(start, stop).indices(self.frame_count)
+        span = chunk_frames * step
+        for first in range(start, stop, span):
+            yield first, self[first:min(first + span, stop):step]
+
+
+class ReplaySource:
+    """Plays a capture back through a FrameRing, standing in for Camera in CameraViewer.
+
+    Frames are published at the capture's frame rate times `speed` (or with the
+    recorded host timestamps for .flr files); speed <= 0 plays as fast as possible.
+    """
+    RING_BUFFER_SIZE = 10
+    is_replay = True
+
+    def __init__(self, path, speed=1.0, loop=True, width=None, height=None, fps=None):
+        self.capture = Capture(path, width, height, fps)
+        self.width = self.capture.width
+        self.height = self.capture.height
+        self.fps = self.capture.fps or 30.0
+        self.speed = speed
+        self.loop = loop
+        self.viewer_ring = FrameRing(self.RING_BUFFER_SIZE, self.height, self.width)
+        self.stats = AcquisitionStats()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def configure_acquisition(self, width, height):
+        pass  # Geometry comes from the capture
+
+    def initialize_camera_context(self):
+        pass
+
+    def start_acquisition(self, mode="viewer"):
+        if self.thread is not None:
+            return
+        self.viewer_ring.reset()
+        self.stats.reset()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._replay_loop, name="ReplaySource", daemon=True)
+        self.thread.start()
+        print(f"Replaying {self.capture.path} at {self.speed}x")
+
+    def stop_acquisition(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        print("Replay stopped.")
+
+    def _frame_offsets(self):
+        """Seconds from the first frame at which each frame should be published."""
+        if self.capture.timestamps is not None and len(self.capture.timestamps) == len(self.capture):
+            return (self.capture.timestamps - self.capture.timestamps[0]) / 1e9
+        return np.arange(len(self.capture)) / self.fps
+
+    def _replay_loop(self):
+        if len(self.capture) == 0:
+            print(f"{self.capture.path} has no frames to replay.")  # Looping over nothing would spin
+            return
+        offsets = self._frame_offsets()
+        speed = self.speed
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            for first, frames in self.capture.iter_chunks(64):
+                for i, frame in enumerate(frames):
+                    if self.stop_event.is_set():
+                        return
+                    if speed > 0:
+                        delay = offsets[first + i] / speed - (time.perf_counter() - start)
+                        if delay > 0:
+                            self.stop_event.wait(delay)
+                    frame = np.ascontiguousarray(frame)
+                    start_ns = time.perf_counter_ns()
+                    self.viewer_ring.write_frame(frame.ctypes.data)
+                    self.stats.record(None, 0, start_ns)
+            if not self.loop:
+                return
+
+    def get_latest_frame(self, copy=True):
+        return self.viewer_ring.get_latest_frame(copy)
+
+    def get_frames_since(self, seq, max_frames=None, out=None):
+        return self.viewer_ring.get_frames_since(seq, max_frames, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show information about a .raw, .flr or .flz capture.")
+    parser.add_argument("path", help="Capture file")
+    parser.add_argument("-W", "--width", type=int, help="Frame width for .raw files without the naming convention")
+    parser.add_argument("-H", "--height", type=int, help="Frame height for .raw files without the naming convention")
+    args = parser.parse_args()
+
+    capture = Capture(args.path, args.width, args.height)
+    print(f"{args.path}: {capture.shape[0]} frames of {capture.width}x{capture.height}, {capture.fps:.2f} fps")
+    if capture.recording is not None:
+        print(f"Settings: {capture.recording.settings}, complete: {capture.recording.complete}")
+        if capture.clock is not None:
+            print(f"Clock: {capture.clock.summary()}")
+            if capture.clock.anchors and len(capture):
+                numbers = capture.clock.frame_numbers(capture.recording.index)
+                print(f"First frame at {capture.clock.wall_datetime(numbers[0]).isoformat()}, "
+                      f"last at {capture.clock.wall_datetime(numbers[-1]).isoformat()}")
+    total = 0.0
+    for _, frames in capture.iter_chunks(256):
+        total += frames.sum(dtype=np.float64)
+    if len(capture):
+        print(f"Mean pixel value: {total / (len(capture) * capture.width * capture.height):.2f}")
+
+
+if __name__ == "__main__":
+    main()
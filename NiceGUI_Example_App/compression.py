@@ -0,0 +1,538 @@
+"""Compressed chunked recording container (.flz).
+
+Same idea as .flr, but each chunk's frames are filtered and compressed as one
+block by a pool of worker threads. Layout, all little-endian:
+
+    file header   HEADER_SIZE bytes: FILE_MAGIC, u32 JSON length, JSON metadata
+                  (geometry, fps, settings, codec, filter, index_offset once closed)
+    chunk k       CHUNK_HEADER (magic, chunk index, frame count, first sequence
+                  number, payload size, filter, crc32 of payload)
+                  frame count FrameRecord index entries (uncompressed)
+                  payload: the chunk's frames, filtered and compressed
+    chunk index   at index_offset: (offset, frame count, first frame) uint64 per chunk
+
+Filters, applied before the codec:
+    delta   horizontal pixel differences, then low and high bytes split into
+            two planes (neighbouring pixels are close, so high bytes are
+            mostly zero and compress very well)
+    pack14  14-bit values packed 4 pixels to 7 bytes; the image tag pixels
+            (camera_sdk.TAG_PIXELS) are stored separately at 16 bits, which
+            is lossless whether or not the frames carry a tag. A chunk with a
+            value above 14 bits falls back to no filter.
+    none    frames as they are
+
+Codecs: zlib (always available), zstd (zstandard package) and lz4 (lz4
+package), or none. All of them and numpy release the GIL, so worker threads
+use several cores without pickling chunks to other processes.
+
+Chunks are self-delimiting: a recording that was never closed has no chunk
+index but is still readable by scanning chunk headers.
+"""
+import argparse
+import collections
+import ctypes
+import json
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from timebase import FrameClock, recording_clock
+from recording import FrameRecord, FRAME_RECORD_DTYPE, HEADER_SIZE, RECORDING_SUFFIX, store_tags
+from camera_sdk import TAG_PIXELS
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+COMPRESSED_SUFFIX = ".flz"
+FILE_MAGIC = b"FLIZIP01"
+CHUNK_MAGIC = b"FLIZCHNK"
+FORMAT_VERSION = 1
+CHUNK_HEADER = struct.Struct("<8sIIQQII")  # magic, chunk index, frames, first seq, payload size, filter, crc32
+INDEX_ENTRY = np.dtype([("offset", "<u8"), ("frames", "<u8"), ("first_frame", "<u8")])
+
+FILTERS = {"none": 0, "delta": 1, "pack14": 2}
+DEFAULT_LEVELS = {"zlib": 1, "zstd": 1, "lz4": 0, "none": 0}
+
+
+def file_format(path):
+    """Recording format implied by a file name: 'flz', 'flr' or 'raw'."""
+    if path.endswith(COMPRESSED_SUFFIX):
+        return "flz"
+    return "flr" if path.endswith(RECORDING_SUFFIX) else "raw"
+
+
+def available_codecs():
+    """Codecs usable in this environment, fastest first."""
+    codecs = []
+    if lz4_frame is not None:
+        codecs.append("lz4")
+    if zstandard is not None:
+        codecs.append("zstd")
+    return codecs + ["zlib", "none"]
+
+
+def default_codec():
+    """zstd if installed (best ratio at speed), then lz4, then zlib."""
+    if zstandard is not None:
+        return "zstd"
+    if lz4_frame is not None:
+        return "lz4"
+    return "zlib"
+
+
+def compress(data, codec, level):
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == "lz4":
+        return lz4_frame.compress(data, compression_level=level)
+    return bytes(data)
+
+
+def decompress(data, codec):
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "lz4":
+        return lz4_frame.decompress(data)
+    return data
+
+
+def check_codec(codec):
+    if codec not in DEFAULT_LEVELS:
+        raise ValueError(f"Unknown codec '{codec}', expected one of {list(DEFAULT_LEVELS)}.")
+    if codec not in available_codecs():
+        raise RuntimeError(f"Codec '{codec}' needs the {'zstandard' if codec == 'zstd' else 'lz4'} package.")
+
+
+def pack14(values):
+    """Packs a 1-D uint16 array (length a multiple of 4, values < 2**14) into 7 bytes per 4 values."""
+    v = values.reshape(-1, 4).astype(np.uint64)
+    packed = v[:, 0] | (v[:, 1] << 14) | (v[:, 2] << 28) | (v[:, 3] << 42)
+    return packed.view(np.uint8).reshape(-1, 8)[:, :7]
+
+
+def unpack14(data, count):
+    """Inverse of pack14(); returns `count` uint16 values."""
+    groups = len(data) // 7
+    full = np.zeros((groups, 8), dtype=np.uint8)
+    full[:, :7] = np.frombuffer(data, dtype=np.uint8, count=groups * 7).reshape(groups, 7)
+    v = full.view(np.uint64)[:, 0]
+    out = np.empty((groups, 4), dtype=np.uint16)
+    for k in range(4):
+        out[:, k] = (v >> (14 * k)) & 0x3FFF
+    return out.reshape(-1)[:count]
+
+
+def apply_filter(frames, name):
+    """Returns (filter_code, bytes-like) for an (n, H, W) uint16 array."""
+    if name == "delta":
+        delta = np.empty_like(frames)
+        delta[:, :, 0] = frames[:, :, 0]
+        np.subtract(frames[:, :, 1:], frames[:, :, :-1], out=delta[:, :, 1:])  # Wraps modulo 2**16
+        planes = np.empty((2, delta.size), dtype=np.uint8)  # Low byte plane, high byte plane
+        planes[0] = delta.reshape(-1)  # Truncates to the low byte
+        np.right_shift(delta.reshape(-1), 8, out=planes[1], casting="unsafe")
+        return FILTERS["delta"], planes
+    if name == "pack14":
+        flat = frames.reshape(len(frames), -1)
+        rest = flat[:, TAG_PIXELS:]
+        if rest.size and rest.max() < 1 << 14:
+            padded = -rest.shape[1] % 4
+            if padded:
+                rest = np.concatenate([rest, np.zeros((len(rest), padded), dtype=np.uint16)], axis=1)
+            tags = np.ascontiguousarray(flat[:, :TAG_PIXELS])
+            return FILTERS["pack14"], tags.tobytes() + pack14(rest.reshape(-1)).tobytes()
+    return FILTERS["none"], frames
+
+
+def undo_filter(data, code, nframes, height, width):
+    """Inverse of apply_filter(); returns an (n, H, W) uint16 array."""
+    pixels = height * width
+    if code == FILTERS["delta"]:
+        planes = np.frombuffer(data, dtype=np.uint8).reshape(2, -1)
+        delta = np.left_shift(planes[1], 8, dtype=np.uint16)
+        delta |= planes[0]
+        return np.cumsum(delta.reshape(nframes, height, width), axis=2, dtype=np.uint16)
+    if code == FILTERS["pack14"]:
+        tag_bytes = nframes * TAG_PIXELS * 2
+        rest_pixels = pixels - TAG_PIXELS
+        padded = rest_pixels + (-rest_pixels % 4)
+        frames = np.empty((nframes, pixels), dtype=np.uint16)
+        frames[:, :TAG_PIXELS] = np.frombuffer(data, dtype=np.uint16, count=nframes * TAG_PIXELS).reshape(nframes, -1)
+        rest = unpack14(memoryview(data)[tag_bytes:], nframes * padded).reshape(nframes, padded)
+        frames[:, TAG_PIXELS:] = rest[:, :rest_pixels]
+        return frames.reshape(nframes, height, width)
+    return np.frombuffer(data, dtype=np.uint16).reshape(nframes, height, width).copy()
+
+
+def encode_chunk(frames, filter_name, codec, level):
+    """Filters and compresses one chunk; returns (filter_code, payload, seconds). Runs in a worker thread."""
+    start = time.perf_counter()
+    code, filtered = apply_filter(frames, filter_name)
+    payload = compress(memoryview(filtered).cast("B"), codec, level)
+    return code, payload, time.perf_counter() - start
+
+
+def decode_chunk(payload, code, codec, nframes, height, width):
+    return undo_filter(decompress(payload, codec), code, nframes, height, width)
+
+
+class CompressedRecordingWriter:
+    """Writes a .flz recording; also a StreamWriter sink, like recording.RecordingWriter.
+
+    write_chunk() copies the chunk and hands it to a thread pool, so it returns
+    as soon as the frames are copied; compressed chunks are written in order
+    as they complete. At most `max_pending` chunks are in flight: if the pool
+    falls that far behind, write_chunk() waits for the oldest one, which
+    backs up into StreamWriter's chunk pool where it shows as backlog.
+    """
+
+    def __init__(self, output_file, width, height, fps=0.0, settings=None, chunk_frames=256,
+                 codec=None, filter="delta", level=None, workers=None):
+        codec = codec or default_codec()
+        check_codec(codec)
+        if filter not in FILTERS:
+            raise ValueError(f"Unknown filter '{filter}', expected one of {list(FILTERS)}.")
+        self.output_file = output_file
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 2
+        self.chunk_frames = chunk_frames
+        self.codec = codec
+        self.filter = filter
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = 2 * self.workers
+        self.metadata = {
+            "version": FORMAT_VERSION,
+            "width": width,
+            "height": height,
+            "dtype": "uint16",
+            "fps": fps,
+            "settings": settings or {},
+            "chunk_frames": chunk_frames,
+            "codec": codec,
+            "level": self.level,
+            "filter": filter,
+            "data_offset": HEADER_SIZE,
+            "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "complete": False,
+        }
+        self.fd = None
+        self.executor = None
+        self.clock = None  # timebase.FrameClock, fitted to the frames as they are queued
+        self.pending = collections.deque()
+        self.index = []
+        self.offset = HEADER_SIZE
+        self.frames_written = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.encode_seconds = 0.0
+        self.started = 0.0
+
+    def open(self):
+        self.clock = FrameClock(self.metadata["fps"])
+        self.metadata["clock_anchor"] = self.clock.anchors[0]
+        self.fd = os.open(self.output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._write_header()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Compressor")
+        self.started = time.perf_counter()
+
+    def _write_header(self):
+        text = json.dumps(self.metadata).encode()
+        header = FILE_MAGIC + struct.pack("<I", len(text)) + text
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Recording metadata does not fit in the file header.")
+        os.pwrite(self.fd, header.ljust(HEADER_SIZE, b"\0"), 0)
+
+    def write_chunk(self, data, records, nframes, copy=True):
+        """Queues `nframes` frames from `data` with their FrameRecord entries as the next chunk.
+
+        With copy=False `data` must stay unchanged until close().
+        """
+        if nframes <= 0:
+            return
+        frames = np.frombuffer(data, dtype=np.uint16, count=nframes * self.frame_size // 2)
+        frames = frames.reshape(nframes, self.height, self.width)
+        if copy:
+            frames = frames.copy()
+        index = store_tags(records, data, nframes, self.frame_size)
+        index_bytes = bytes(memoryview(records).cast("B")[:ctypes.sizeof(FrameRecord) * nframes])
+        future = self.executor.submit(encode_chunk, frames, self.filter, self.codec, self.level)
+        self.pending.append((future, index_bytes, nframes, records[0].seq))
+        self.clock.add_records(index)
+        self._write_completed(block=len(self.pending) > self.max_pending)
+
+    def write_buffer(self, data, records, nframes):
+        """Compresses a whole in-memory acquisition buffer, chunk by chunk, without copying it."""
+        data_view = memoryview(data).cast("B")
+        record_size = ctypes.sizeof(FrameRecord)
+        for start in range(0, nframes, self.chunk_frames):
+            count = min(self.chunk_frames, nframes - start)
+            chunk_records = (FrameRecord * count).from_buffer(records, start * record_size)
+            self.write_chunk(data_view[start * self.frame_size:(start + count) * self.frame_size],
+                             chunk_records, count, copy=False)
+
+    def _write_completed(self, block=False):
+        """Writes finished chunks in order; with block, waits for at least the oldest one."""
+        while self.pending and (block or self.pending[0][0].done()):
+            future, index_bytes, nframes, first_seq = self.pending.popleft()
+            code, payload, seconds = future.result()
+            header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(self.index), nframes, first_seq, len(payload), code,
+                                       zlib.crc32(payload))
+            os.pwrite(self.fd, header + index_bytes + payload, self.offset)
+            self.index.append((self.offset, nframes, self.frames_written))
+            self.offset += len(header) + len(index_bytes) + len(payload)
+            self.frames_written += nframes
+            self.raw_bytes += nframes * self.frame_size
+            self.compressed_bytes += len(payload)
+            self.encode_seconds += seconds
+            block = False
+
+    @property
+    def ratio(self):
+        return self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0
+
+    @property
+    def throughput(self):
+        """Raw MB/s compressed and written since open()."""
+        elapsed = time.perf_counter() - self.started
+        return self.raw_bytes / elapsed / 1e6 if elapsed > 0 else 0.0
+
+    def status(self):
+        """Returns a one-line summary of the compression so far."""
+        per_core = self.raw_bytes / self.encode_seconds / 1e6 if self.encode_seconds else 0.0
+        return (f"{self.codec}/{self.filter}: {self.frames_written} frames, ratio {self.ratio:.2f}, "
+                f"{self.throughput:.1f} MB/s ({per_core:.1f} MB/s per worker, {self.workers} workers), "
+                f"{len(self.pending)} chunks in flight")
+
+    def close(self, **extra_metadata):
+        """Writes the remaining chunks and the chunk index, marks the recording complete and closes it."""
+        if self.fd is None:
+            return
+        while self.pending:
+            self._write_completed(block=True)
+        self.executor.shutdown()
+        index = np.array(self.index, dtype=INDEX_ENTRY)
+        os.pwrite(self.fd, index.tobytes(), self.offset)
+        self.metadata.update(extra_metadata)
+        self.metadata.update({
+            "clock": self.clock.model().to_dict(),
+            "frame_count": self.frames_written,
+            "chunk_count": len(self.index),
+            "index_offset": self.offset,
+            "compression_ratio": round(self.ratio, 3),
+            "compression_mb_s": round(self.throughput, 1),
+            "complete": True,
+        })
+        self._write_header()
+        os.close(self.fd)
+        self.fd = None
+        print(f"Compressed recording {self.output_file}: {self.status()}")
+
+    def abort(self):
+        """Drops the chunks still in flight and closes the file without marking it complete."""
+        if self.fd is None:
+            return
+        self.executor.shutdown(cancel_futures=True)
+        self.pending.clear()
+        os.close(self.fd)
+        self.fd = None
+
+
+def is_compressed_recording(path):
+    """True if `path` is a .flz recording (checked by magic, not by suffix)."""
+    with open(path, "rb") as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+class CompressedRecordingReader:
+    """Random access to a .flz recording, with the same interface as recording.RecordingReader.
+
+    Chunks are decompressed on demand and the most recent ones are cached;
+    read() decompresses the chunks it needs in a thread pool.
+    """
+    CACHE_CHUNKS = 4
+
+    def __init__(self, path, workers=None):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"{path} is not a compressed recording (bad magic).")
+            (length,) = struct.unpack_from("<I", header, len(FILE_MAGIC))
+            self.metadata = json.loads(header[len(FILE_MAGIC) + 4:len(FILE_MAGIC) + 4 + length])
+            self.width = self.metadata["width"]
+            self.height = self.metadata["height"]
+            self.fps = self.metadata["fps"]
+            self.settings = self.metadata["settings"]
+            self.chunk_frames = self.metadata["chunk_frames"]
+            self.codec = self.metadata["codec"]
+            check_codec(self.codec)
+            if "index_offset" in self.metadata:
+                f.seek(self.metadata["index_offset"])
+                entries = np.frombuffer(f.read(INDEX_ENTRY.itemsize * self.metadata["chunk_count"]), dtype=INDEX_ENTRY)
+                self.chunk_offsets = [int(offset) for offset in entries["offset"]]
+                self.chunk_counts = [int(count) for count in entries["frames"]]
+            else:
+                self.chunk_offsets, self.chunk_counts = self._scan_chunks(f, os.fstat(f.fileno()).st_size)
+        self.chunk_starts = np.concatenate([[0], np.cumsum(self.chunk_counts)]).astype(np.int64)
+        self.frame_count = int(self.chunk_starts[-1])
+        self._cache = collections.OrderedDict()
+        self._index = None
+
+    def _scan_chunks(self, f, file_size):
+        """Finds the chunks of a recording that was not closed, up to the last complete one."""
+        offsets, counts = [], []
+        offset = self.metadata["data_offset"]
+        while offset + CHUNK_HEADER.size <= file_size:
+            f.seek(offset)
+            magic, index, nframes, _, payload_size, _, crc = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            end = offset + CHUNK_HEADER.size + nframes * FRAME_RECORD_DTYPE.itemsize + payload_size
+            if magic != CHUNK_MAGIC or index != len(offsets) or end > file_size:
+                break
+            offsets.append(offset)
+            counts.append(nframes)
+            offset = end
+        return offsets, counts
+
+    @property
+    def complete(self):
+        return self.metadata.get("complete", False)
+
+    @property
+    def clock(self):
+        """timebase.ClockModel mapping frame numbers to host and wall-clock time, or None."""
+        return recording_clock(self)
+
+    def __len__(self):
+        return self.frame_count
+
+    def _read_chunk(self, k):
+        """Returns (records, filter code, payload) of chunk k."""
+        with open(self.path, "rb") as f:
+            f.seek(self.chunk_offsets[k])
+            magic, _, nframes, _, payload_size, code, crc = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            records = np.frombuffer(f.read(nframes * FRAME_RECORD_DTYPE.itemsize), dtype=FRAME_RECORD_DTYPE)
+            payload = f.read(payload_size)
+        if magic != CHUNK_MAGIC or zlib.crc32(payload) != crc:
+            raise ValueError(f"{self.path}: chunk {k} is corrupt.")
+        return records, code, payload
+
+    def _decode(self, k):
+        _, code, payload = self._read_chunk(k)
+        return decode_chunk(payload, code, self.codec, self.chunk_counts[k], self.height, self.width)
+
+    def chunk_frames_array(self, k):
+        """Returns the decompressed (n, H, W) frames of chunk k."""
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return self._cache[k]
+        frames = self._decode(k)
+        self._cache[k] = frames
+        if len(self._cache) > self.CACHE_CHUNKS:
+            self._cache.popitem(last=False)
+        return frames
+
+    def chunk_index(self, k):
+        return self._read_chunk(k)[0].copy()
+
+    @property
+    def index(self):
+        """Structured array (seq, timestamp_ns, status, tag) for every frame."""
+        if self._index is None:
+            parts = [self.chunk_index(k) for k in range(len(self.chunk_counts))]
+            self._index = np.concatenate(parts) if parts else np.zeros(0, dtype=FRAME_RECORD_DTYPE)
+        return self._index
+
+    def frame(self, i):
+        if not 0 <= i < self.frame_count:
+            raise IndexError(f"Frame {i} out of range (0-{self.frame_count - 1})")
+        k = int(np.searchsorted(self.chunk_starts, i, side="right")) - 1
+        return self.chunk_frames_array(k)[i - self.chunk_starts[k]]
+
+    def read(self, start, stop, step=1):
+        """Returns frames start:stop:step as one (n, H, W) array, decompressing chunks in parallel."""
+        if step <= 0:
+            raise ValueError("step must be positive")
+        start, stop, step = slice(start, stop, step).indices(self.frame_count)
+        wanted = np.arange(start, stop, step)
+        out = np.empty((len(wanted), self.height, self.width), dtype=np.uint16)
+        if not len(wanted):
+            return out
+        chunks = np.searchsorted(self.chunk_starts, wanted, side="right") - 1
+
+        def fill(k):
+            positions = np.flatnonzero(chunks == k)
+            frames = self._cache.get(k)
+            if frames is None:
+                frames = self._decode(k)
+            out[positions] = frames[wanted[positions] - self.chunk_starts[k]]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(fill, np.unique(chunks)))
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress a .raw/.flr capture to .flz and report ratio and speed.")
+    parser.add_argument("input", help="Capture to compress")
+    parser.add_argument("output", nargs="?", help=f"Output file (default: input with {COMPRESSED_SUFFIX})")
+    parser.add_argument("-W", "--width", type=int, help="Frame width for .raw files without the naming convention")
+    parser.add_argument("-H", "--height", type=int, help="Frame height for .raw files without the naming convention")
+    parser.add_argument("--codec", choices=list(DEFAULT_LEVELS), default=None,
+                        help=f"Codec (default: {default_codec()}; available: {', '.join(available_codecs())})")
+    parser.add_argument("--filter", choices=list(FILTERS), default="delta", help="Filter before the codec (default: delta)")
+    parser.add_argument("--level", type=int, default=None, help="Codec level (default: fastest useful level)")
+    parser.add_argument("--workers", type=int, default=None, help="Compression threads (default: all cores)")
+    parser.add_argument("--chunk-frames", type=int, default=256, help="Frames per chunk (default: 256)")
+    args = parser.parse_args()
+
+    from capture_reader import Capture
+    capture = Capture(args.input, args.width, args.height)
+    output = args.output or os.path.splitext(args.input)[0] + COMPRESSED_SUFFIX
+    writer = CompressedRecordingWriter(output, capture.width, capture.height, capture.fps,
+                                       {"source": os.path.basename(args.input)}, args.chunk_frames,
+                                       args.codec, args.filter, args.level, args.workers)
+    records = (FrameRecord * args.chunk_frames)()
+    record_array = np.frombuffer(records, dtype=FRAME_RECORD_DTYPE)
+
+    # Chunk by chunk both ways, so memory use does not grow with the capture
+    writer.open()
+    for first, frames in capture.iter_chunks(args.chunk_frames):
+        record_array["seq"][:len(frames)] = np.arange(first, first + len(frames))
+        if capture.timestamps is not None:
+            record_array["timestamp_ns"][:len(frames)] = capture.timestamps[first:first + len(frames)]
+        writer.write_chunk(np.ascontiguousarray(frames), records, len(frames))
+    writer.close()
+    size = os.path.getsize(output)
+    print(f"{len(capture)} frames: {writer.raw_bytes / 1e6:.1f} MB -> {size / 1e6:.1f} MB on disk")
+
+    reader = CompressedRecordingReader(output, args.workers)
+    elapsed = 0.0
+    lossless = len(reader) == len(capture)
+    verify_frames = args.chunk_frames * reader.workers  # One chunk per decompression thread
+    for first, original in capture.iter_chunks(verify_frames):
+        start = time.perf_counter()
+        frames = reader.read(first, first + len(original))
+        elapsed += time.perf_counter() - start
+        lossless = lossless and np.array_equal(frames, original)
+    print(f"Decompressed in {elapsed:.2f} s ({writer.raw_bytes / elapsed / 1e6 if elapsed else 0:.1f} MB/s)")
+    print("Lossless: " + ("yes" if lossless else "NO, frames differ"))
+
+
+if __name__ == "__main__":
+    main()
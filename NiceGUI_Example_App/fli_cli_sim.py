@@ -0,0 +1,179 @@
+"""Pseudo-terminal stand-in for the camera's fli-cli serial console.
+
+FliCliEmulator opens a pty pair and answers commands written to the slave
+side (a /dev/pts/N path that pyserial opens like /dev/ttyACM0) the way the
+camera does: the response lines, then the fli-cli> prompt with no newline
+after it. Replies are delayed by a per-command processing time plus the
+transmission time of each byte at the configured baud rate, so latency
+measurements against it are in the right range.
+
+Supported commands: cropping, fps and tint, each with `raw` for the bare
+value, and `set cropping on:<x0>-<x1>:<y0>-<y1>` / `set cropping off`,
+`set fps <value>`, `set tint <value>`. Changing the cropping window moves
+the maximum frame rate, as on the camera.
+"""
+import argparse
+import os
+import select
+import threading
+import time
+import tty
+
+PROMPT = b"fli-cli>"
+FULL_WIDTH = 640
+FULL_HEIGHT = 512
+FULL_FRAME_MAX_FPS = 600.0
+
+# Processing time before the reply, in seconds, by command
+COMMAND_DELAYS = {
+    "query": 0.002,
+    "set cropping": 0.050,  # Reconfigures the sensor readout
+    "set": 0.010,
+}
+
+
+class FliCliEmulator:
+    """Answers fli-cli commands on a pseudo-terminal from a background thread; see the module docstring."""
+
+    def __init__(self, baudrate=115200, delays=None, prompt_newline=False):
+        self.baudrate = baudrate
+        self.delays = dict(COMMAND_DELAYS, **(delays or {}))
+        self.prompt_newline = prompt_newline  # True mimics a console that ends the prompt with a newline
+        self.cropping = None  # (x0, x1, y0, y1) or None for full frame
+        self.fps = 100.0
+        self.tint = 0.001
+        self.master = None
+        self.slave = None
+        self.port = None
+        self.thread = None
+        self.running = False
+        self.commands = 0
+
+    def start(self):
+        """Opens the pty and starts answering; returns the port name to open."""
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)  # No echo or line editing, like a USB serial device
+        self.port = os.ttyname(self.slave)
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, name="FliCliEmulator", daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+    def _serve(self):
+        pending = b""
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                pending += os.read(self.master, 4096)
+            except OSError:
+                break
+            # Commands end in \r\n (or either on its own)
+            while True:
+                end = min((i for i in (pending.find(b"\r"), pending.find(b"\n")) if i >= 0), default=-1)
+                if end < 0:
+                    break
+                line, pending = pending[:end], pending[end + 1:]
+                if line.strip():
+                    self._reply(line.decode(errors="replace").strip())
+
+    def _reply(self, command):
+        self.commands += 1
+        kind = "set cropping" if command.startswith("set cropping") else command.split()[0]
+        text = self.handle(command)
+        time.sleep(self.delays.get(kind, self.delays["query"]))
+        reply = (text + "\r\n" if text else "").encode() + PROMPT + (b"\r\n" if self.prompt_newline else b"")
+        # Hold each write back to the line rate, in small pieces like a UART
+        byte_time = 10.0 / self.baudrate  # Start bit, 8 data bits, stop bit
+        for start in range(0, len(reply), 16):
+            piece = reply[start:start + 16]
+            time.sleep(len(piece) * byte_time)
+            os.write(self.master, piece)
+
+    @property
+    def max_fps(self):
+        """Readout is row by row, so the maximum frame rate scales with the number of rows."""
+        return FULL_FRAME_MAX_FPS * FULL_HEIGHT / self.geometry[1]
+
+    @property
+    def geometry(self):
+        if self.cropping is None:
+            return FULL_WIDTH, FULL_HEIGHT
+        x0, x1, y0, y1 = self.cropping
+        return x1 - x0 + 1, y1 - y0 + 1
+
+    def handle(self, command):
+        """Returns the response text to `command`, without the prompt."""
+        words = command.split()
+        raw = words[-1] == "raw"
+        if words[0] == "cropping":
+            state = "off" if self.cropping is None else "on"
+            x0, x1, y0, y1 = self.cropping or (0, FULL_WIDTH - 1, 0, FULL_HEIGHT - 1)
+            if raw:
+                return state if self.cropping is None else f"on:{x0}-{x1}:{y0}-{y1}"
+            return f"Cropping {state}: columns: {x0}-{x1} rows: {y0:>4}-{y1}"
+        if words[0] == "fps":
+            return f"{self.fps:.9f}" if raw else f"Frames per second: {self.fps:.9f}"
+        if words[0] == "tint":
+            return f"{self.tint:.9f}" if raw else f"Integration time: {self.tint:.9f}"
+        if words[0] == "set" and len(words) >= 3:
+            return self._set(words[1], words[2])
+        return f"Unknown command: {command}"
+
+    def _set(self, name, value):
+        try:
+            if name == "cropping":
+                if value == "off":
+                    self.cropping = None
+                else:
+                    columns, rows = value.removeprefix("on:").split(":")
+                    x0, x1 = (int(v) for v in columns.split("-"))
+                    y0, y1 = (int(v) for v in rows.split("-"))
+                    if not (0 <= x0 < x1 < FULL_WIDTH and 0 <= y0 < y1 < FULL_HEIGHT):
+                        return "Error: cropping window out of range"
+                    self.cropping = (x0, x1, y0, y1)
+                self.fps = min(self.fps, self.max_fps)
+                self.tint = min(self.tint, 1.0 / self.fps)
+            elif name == "fps":
+                self.fps = min(float(value), self.max_fps)
+                self.tint = min(self.tint, 1.0 / self.fps)
+            elif name == "tint":
+                self.tint = min(float(value), 1.0 / self.fps)
+            else:
+                return f"Unknown setting: {name}"
+        except ValueError:
+            return f"Error: bad value '{value}' for {name}"
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the camera's fli-cli serial console on a pseudo-terminal.")
+    parser.add_argument("--baud", type=int, default=115200, help="Line rate used to pace replies (default: 115200)")
+    parser.add_argument("--prompt-newline", action="store_true", help="End the prompt with a newline")
+    args = parser.parse_args()
+
+    emulator = FliCliEmulator(args.baud, prompt_newline=args.prompt_newline)
+    port = emulator.start()
+    print(f"fli-cli emulator on {port}; e.g. python3 main.py --serial-port {port}. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    emulator.stop()
+    print(f"Answered {emulator.commands} commands.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Shared-memory frame ring for consumers in other processes.
+
+SharedFrameRing is a FrameRing whose frames, timestamps and statuses live in a
+POSIX shared memory block, so the single memmove in the Camera callback also
+publishes the frame to every attached FrameBusClient. Layout:
+
+    header       HEADER_FIELDS int64 (magic, version, geometry, write_seq,
+                 generation, closed flag, publisher pid, offsets)
+    slot_seq     int64 per slot: frame number held by the slot, -1 while it is
+                 being written (a per-slot seqlock)
+    timestamps   int64 per slot, time.monotonic_ns() at arrival
+    statuses     int32 per slot
+    frames       (num_slots, height, width) uint16 at a page-aligned offset
+
+Readers check slot_seq before and after using a slot; if it changed, the frame
+was overwritten and is discarded, so a torn frame is never returned.
+"""
+import argparse
+import ctypes
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from frame_ring import FrameRing
+
+DEFAULT_BUS_NAME = "fli_frames"
+BUS_MAGIC = 0x46_4C_49_42_55_53_30_31  # "FLIBUS01"
+BUS_VERSION = 1
+HEADER_FIELDS = 16
+PAGE_SIZE = 4096
+
+_published = set()  # Names of the blocks this process publishes
+
+# Header field indices
+MAGIC, VERSION, NUM_SLOTS, HEIGHT, WIDTH, WRITE_SEQ, GENERATION, CLOSED, PID, SLOTS_OFFSET, FRAMES_OFFSET = range(11)
+
+
+def bus_layout(num_slots, height, width):
+    """Returns (slots_offset, frames_offset, total_size) of a bus block."""
+    slots_offset = HEADER_FIELDS * 8
+    slot_bytes = num_slots * (8 + 8 + 4)
+    frames_offset = (slots_offset + slot_bytes + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+    return slots_offset, frames_offset, frames_offset + num_slots * height * width * 2
+
+
+def _bus_views(buf, num_slots, height, width, slots_offset, frames_offset):
+    """Returns numpy views (header, slot_seq, timestamps, statuses, frames) of a bus block."""
+    header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=buf)
+    slot_seq = np.ndarray(num_slots, dtype=np.int64, buffer=buf, offset=slots_offset)
+    timestamps = np.ndarray(num_slots, dtype=np.int64, buffer=buf, offset=slots_offset + 8 * num_slots)
+    statuses = np.ndarray(num_slots, dtype=np.int32, buffer=buf, offset=slots_offset + 16 * num_slots)
+    frames = np.ndarray((num_slots, height, width), dtype=np.uint16, buffer=buf, offset=frames_offset)
+    return header, slot_seq, timestamps, statuses, frames
+
+
+class SharedFrameRing(FrameRing):
+    """FrameRing published in shared memory under `name`, written by the Camera callback."""
+
+    def __init__(self, num_slots, height, width, name=DEFAULT_BUS_NAME):
+        self.num_slots = num_slots
+        self.height = height
+        self.width = width
+        self.frame_size = width * height * 2
+        self.name = name
+        slots_offset, frames_offset, size = bus_layout(num_slots, height, width)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a publisher that died; nobody can be writing it any more
+            stale = shared_memory.SharedMemory(name=name)
+            stale.unlink()
+            stale.close()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _published.add(name)
+        (self.header, self.slot_seq, self.timestamps,
+         self.statuses, self.frames) = _bus_views(self.shm.buf, num_slots, height, width, slots_offset, frames_offset)
+        self.base_address = self.frames.ctypes.data
+        self.header[:] = 0
+        self.header[NUM_SLOTS] = num_slots
+        self.header[HEIGHT] = height
+        self.header[WIDTH] = width
+        self.header[PID] = os.getpid()
+        self.header[SLOTS_OFFSET] = slots_offset
+        self.header[FRAMES_OFFSET] = frames_offset
+        self.header[VERSION] = BUS_VERSION
+        self.reset()
+        self.header[MAGIC] = BUS_MAGIC  # Last: clients only attach to a fully initialized block
+
+    def reset(self):
+        """Forgets all frames; attached clients see a new generation and restart from it."""
+        self.slot_seq[:] = -1
+        self.write_seq = 0
+        self.header[WRITE_SEQ] = 0
+        self.header[GENERATION] += 1
+
+    def write_frame(self, frame, status=0):
+        """Copies a frame pointer from the SDK into the next slot. Called from the data callback."""
+        seq = self.write_seq
+        slot = seq % self.num_slots
+        self.slot_seq[slot] = -1  # Readers of the old frame in this slot now know it is gone
+        ctypes.memmove(self.base_address + slot * self.frame_size, frame, self.frame_size)
+        self.timestamps[slot] = time.monotonic_ns()
+        self.statuses[slot] = status
+        self.slot_seq[slot] = seq
+        self.write_seq = seq + 1
+        self.header[WRITE_SEQ] = seq + 1  # Commit: clients may now read frame `seq`
+
+    def write_batch(self, frames, first_seq, timestamps, statuses):
+        """Publishes a batch of frames numbered from `first_seq`; used by batched ingest.
+
+        Frames must continue the published sequence. If the batch is larger
+        than the bus only its newest frames are kept.
+        """
+        skip = max(len(frames) - self.num_slots, 0)
+        seqs = np.arange(first_seq + skip, first_seq + len(frames))
+        slots = seqs % self.num_slots
+        self.slot_seq[slots] = -1
+        self.frames[slots] = frames[skip:]
+        self.timestamps[slots] = timestamps[skip:]
+        self.statuses[slots] = statuses[skip:]
+        self.slot_seq[slots] = seqs
+        self.write_seq = first_seq + len(frames)
+        self.header[WRITE_SEQ] = self.write_seq
+
+    def close(self):
+        """Marks the bus closed for clients and removes the shared memory block."""
+        self.header[CLOSED] = 1
+        # numpy views keep the buffer exported; drop them before closing
+        self.header = self.slot_seq = self.timestamps = self.statuses = self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+        _published.discard(self.name)
+
+
+def _attach(name):
+    """Opens an existing block without letting this process's resource tracker unlink it at exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always tracks
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:  # The tracker holds a name once; the publisher's unlink() unregisters it
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameBusClient:
+    """Reads frames published by a SharedFrameRing in another process.
+
+    next_frame() returns every frame in order and counts the ones the reader was
+    too slow for in `overruns`; get_latest_frame() always jumps to the newest.
+    With copy=False frames are views into shared memory (no copy at all); call
+    is_intact(frame_number) after using one to make sure it was not overwritten.
+    """
+
+    def __init__(self, name=DEFAULT_BUS_NAME, timeout=5.0):
+        self.name = name
+        self.shm = None
+        self.next_seq = 0
+        self.frames_read = 0
+        self.overruns = 0
+        self._attach(timeout)
+
+    def _attach(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                shm = _attach(self.name)
+                header = np.ndarray(HEADER_FIELDS, dtype=np.int64, buffer=shm.buf)
+                if header[MAGIC] == BUS_MAGIC and not header[CLOSED]:
+                    break
+                del header
+                shm.close()
+            except (FileNotFoundError, ValueError):
+                pass  # Not created yet, or still being sized by the publisher
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"No frame bus '{self.name}' is being published.")
+            time.sleep(0.05)
+        if header[VERSION] != BUS_VERSION:
+            raise RuntimeError(f"Frame bus version {header[VERSION]} is not supported.")
+        self.shm = shm
+        self.num_slots = int(header[NUM_SLOTS])
+        self.height = int(header[HEIGHT])
+        self.width = int(header[WIDTH])
+        (self.header, self.slot_seq, self.timestamps,
+         self.statuses, self.frames) = _bus_views(shm.buf, self.num_slots, self.height, self.width,
+                                                  int(header[SLOTS_OFFSET]), int(header[FRAMES_OFFSET]))
+        self.generation = int(self.header[GENERATION])
+        self.next_seq = self.write_seq  # Start with the next frame, not the history
+
+    def _check_publisher(self, timeout=5.0):
+        """Reattaches if the publisher closed the bus (e.g. for a new geometry) or restarted acquisition.
+
+        Returns True if frame numbering started over.
+        """
+        if self.header[CLOSED]:
+            self.close()
+            self._attach(timeout)
+            return True
+        if self.header[GENERATION] != self.generation:
+            self.generation = int(self.header[GENERATION])
+            self.next_seq = 0
+            return True
+        return False
+
+    def close(self):
+        if self.shm is not None:
+            self.header = self.slot_seq = self.timestamps = self.statuses = self.frames = None
+            self.shm.close()
+            self.shm = None
+
+    @property
+    def write_seq(self):
+        """Number of frames published in the current generation."""
+        return int(self.header[WRITE_SEQ])
+
+    def is_intact(self, seq):
+        """True while frame `seq` is still held, unmodified, by its slot."""
+        return self.slot_seq[seq % self.num_slots] == seq
+
+    def read(self, seq, copy=True):
+        """Returns (frame, timestamp_ns, status) for frame `seq`, or None if it is not (or no longer) available."""
+        slot = seq % self.num_slots
+        if self.slot_seq[slot] != seq:
+            return None
+        frame = self.frames[slot]
+        if copy:
+            frame = frame.copy()
+        timestamp = int(self.timestamps[slot])
+        status = int(self.statuses[slot])
+        if self.slot_seq[slot] != seq:
+            return None  # Overwritten while reading
+        return frame, timestamp, status
+
+    def get_latest_frame(self, copy=True):
+        """Returns (frame, frame_number, timestamp_ns) for the newest frame, or (None, -1, 0)."""
+        self._check_publisher()
+        for _ in range(3):
+            seq = self.write_seq - 1
+            if seq < 0:
+                return None, -1, 0
+            result = self.read(seq, copy)
+            if result is not None:
+                return result[0], seq, result[1]
+        return None, -1, 0
+
+    def wait_for_frame(self, after_seq, timeout=None):
+        """Blocks until a frame newer than `after_seq` is published; returns the newest frame number or -1 on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        spins = 0
+        while True:
+            if self._check_publisher():
+                after_seq = -1  # Numbering restarted, any frame is new
+            seq = self.write_seq - 1
+            if seq > after_seq:
+                return seq
+            if deadline is not None and time.monotonic() > deadline:
+                return -1
+            spins = self._backoff(spins)
+
+    def _backoff(self, spins):
+        # Frames arrive every ~100 us at full rate: spin briefly, then back off to short sleeps
+        if spins > 100:
+            time.sleep(0.0002)
+        return spins + 1
+
+    def next_frame(self, copy=True, timeout=None):
+        """Returns (frame, frame_number, timestamp_ns, status) for the next unread frame, or None on timeout.
+
+        If the reader fell more than a ring behind, the lost frames are added
+        to `overruns` and reading resumes at the oldest intact frame.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        spins = 0
+        while True:
+            self._check_publisher()
+            end = self.write_seq
+            seq = self.next_seq
+            if seq < end:
+                oldest = end - self.num_slots + 1  # One slot may be mid-write
+                if seq < oldest:
+                    self.overruns += oldest - seq
+                    seq = oldest
+                result = self.read(seq, copy)
+                self.next_seq = seq + 1
+                if result is None:
+                    self.overruns += 1  # Overwritten while reading
+                    continue
+                self.frames_read += 1
+                return result[0], seq, result[1], result[2]
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            spins = self._backoff(spins)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attach to the frame bus and report the frame rate seen by a reader.")
+    parser.add_argument("--name", default=DEFAULT_BUS_NAME, help=f"Frame bus name (default: {DEFAULT_BUS_NAME})")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long to read (default: 5)")
+    parser.add_argument("--copy", action="store_true", help="Copy each frame out of shared memory")
+    args = parser.parse_args()
+
+    client = FrameBusClient(args.name)
+    print(f"Attached to '{args.name}': {client.num_slots} slots of {client.width}x{client.height}")
+    start = time.monotonic()
+    total = 0.0
+    while time.monotonic() - start < args.seconds:
+        result = client.next_frame(copy=args.copy, timeout=1.0)
+        if result is None:
+            continue
+        frame, seq, _, _ = result
+        total += frame[0, 0]  # Touch the frame like a consumer would
+    elapsed = time.monotonic() - start
+    print(f"Read {client.frames_read} frames in {elapsed:.1f} s ({client.frames_read / elapsed:.1f} Hz), "
+          f"{client.overruns} overruns")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from profiling import profiler
+
+SPAN_ENCODE = profiler.stage("viewer.encode")  # From hand-off to the worker until the result is back
+
+
+class FrameEncoder:
+    """Runs preview encoding in a worker thread with a depth-1 "latest frame wins" queue.
+
+    submit() never blocks: if an encode is already running, the waiting frame is
+    replaced and counted as dropped. Encoded results are passed to on_result on
+    the event loop. OpenCV and NumPy release the GIL, so a thread pool keeps the
+    event loop free without the pickling cost of a process pool.
+    """
+
+    def __init__(self, encode_fn, on_result=None, max_workers=1):
+        self.encode_fn = encode_fn
+        self.on_result = on_result
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FrameEncoder")
+        self.pending = None
+        self.wakeup = None
+        self.task = None
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_encoded = 0
+        self.frames_dropped = 0
+        self.last_encode_ms = 0.0
+        self.avg_encode_ms = 0.0
+        self.max_encode_ms = 0.0
+
+    def start(self):
+        """Starts the encoding task on the running event loop."""
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._encode_loop())
+
+    def stop(self):
+        """Stops the encoding task; the frame waiting in the queue is discarded."""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.pending = None
+
+    def submit(self, frame, frame_number=-1):
+        """Queues a frame for encoding, replacing any frame still waiting."""
+        self.frames_submitted += 1
+        if self.pending is not None:
+            self.frames_dropped += 1
+            profiler.count("viewer.frames_dropped")
+        self.pending = (frame, frame_number)
+        if self.wakeup:
+            self.wakeup.set()
+
+    async def _encode_loop(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                if self.pending is None:
+                    continue
+                frame, frame_number = self.pending
+                self.pending = None
+
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = await loop.run_in_executor(self.executor, self.encode_fn, frame)
+                except Exception as e:
+                    print(f"[ERROR] Exception in frame encoder: {e}")
+                    continue
+                if profiler.enabled:
+                    profiler.record(SPAN_ENCODE, start_ns)
+                self._record_time((time.perf_counter_ns() - start_ns) / 1e6)
+
+                if self.on_result:
+                    self.on_result(result, frame_number)
+        except asyncio.CancelledError:
+            pass
+
+    def _record_time(self, encode_ms):
+        self.frames_encoded += 1
+        self.last_encode_ms = encode_ms
+        self.max_encode_ms = max(self.max_encode_ms, encode_ms)
+        # Exponential moving average so the figure follows the current load
+        alpha = 0.1 if self.frames_encoded > 1 else 1.0
+        self.avg_encode_ms += alpha * (encode_ms - self.avg_encode_ms)
+
+    def reset_stats(self):
+        self.frames_submitted = self.frames_encoded = self.frames_dropped = 0
+        self.last_encode_ms = self.avg_encode_ms = self.max_encode_ms = 0.0
+
+    def stats_text(self):
+        """Returns a one-line summary of encoder performance."""
+        return (f"Encode {self.avg_encode_ms:.1f} ms avg / {self.max_encode_ms:.1f} ms max, "
+                f"{self.frames_encoded} shown, {self.frames_dropped} dropped")
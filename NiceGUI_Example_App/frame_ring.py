@@ -0,0 +1,96 @@
+import ctypes
+import time
+import numpy as np
+
+
+class FrameRing:
+    """Preallocated (N, H, W) uint16 ring of the most recent frames.
+
+    A single producer (the SDK data callback) copies each frame straight into
+    the next slot with write_frame(). write_seq counts committed frames; frame
+    number n lives in slot n % N. Readers check write_seq again after copying
+    a slot, so a frame that was overwritten while being read is never returned.
+    """
+
+    def __init__(self, num_slots, height, width):
+        self.num_slots = num_slots
+        self.height = height
+        self.width = width
+        self.frame_size = width * height * 2
+        self.frames = np.zeros((num_slots, height, width), dtype=np.uint16)
+        self.timestamps = np.zeros(num_slots, dtype=np.int64)  # time.monotonic_ns() at arrival
+        self.statuses = np.zeros(num_slots, dtype=np.int32)
+        self.base_address = self.frames.ctypes.data
+        self.write_seq = 0
+
+    def reset(self):
+        """Forgets all frames, e.g. before a new acquisition."""
+        self.write_seq = 0
+
+    def write_frame(self, frame, status=0):
+        """Copies a frame pointer from the SDK into the next slot. Called from the data callback."""
+        seq = self.write_seq
+        slot = seq % self.num_slots
+        ctypes.memmove(self.base_address + slot * self.frame_size, frame, self.frame_size)
+        self.timestamps[slot] = time.monotonic_ns()
+        self.statuses[slot] = status
+        self.write_seq = seq + 1  # Commit: readers may now see frame `seq`
+
+    def is_valid(self, seq):
+        """True while frame `seq` is still intact in its slot."""
+        # The producer writes frame k while write_seq == k, so slot of `seq` is
+        # reused once write_seq reaches seq + num_slots
+        return 0 <= seq < self.write_seq < seq + self.num_slots
+
+    def get_latest_frame(self, copy=True):
+        """Returns (frame, frame_number, timestamp_ns) for the newest frame, or (None, -1, 0).
+
+        With copy=False the frame is a view into the ring; call is_valid(frame_number)
+        after using it to make sure the producer has not overwritten it meanwhile.
+        """
+        for _ in range(3):
+            seq = self.write_seq - 1
+            if seq < 0:
+                return None, -1, 0
+            slot = seq % self.num_slots
+            frame = self.frames[slot]
+            if copy:
+                frame = frame.copy()
+            timestamp = int(self.timestamps[slot])
+            if not copy or self.is_valid(seq):
+                return frame, seq, timestamp
+        return None, -1, 0
+
+    def get_frames_since(self, seq, max_frames=None, out=None):
+        """Returns (frames, first_frame_number, timestamps) for all frames newer than `seq`.
+
+        Pass -1 to start from the oldest available frame. Frames that have already
+        been overwritten are skipped, so first_frame_number - seq - 1 frames were missed.
+        The arrays are copies, returned in frame order. With `out`, a preallocated
+        (n, H, W) uint16 array, frames are copied into it instead of a new array
+        (at most len(out) of them) and the returned frames are a view of it.
+        """
+        end = self.write_seq
+        # Leave one slot of margin for the frame the producer may be writing now
+        start = max(seq + 1, end - self.num_slots + 1, 0)
+        if out is not None:
+            max_frames = len(out) if max_frames is None else min(max_frames, len(out))
+        if max_frames is not None:
+            end = min(end, start + max_frames)
+        if start >= end:
+            return self.frames[:0].copy(), start, self.timestamps[:0].copy()
+
+        slots = np.arange(start, end) % self.num_slots
+        if out is not None:
+            frames = np.take(self.frames, slots, axis=0, out=out[:len(slots)])
+        else:
+            frames = self.frames[slots]
+        timestamps = self.timestamps[slots]
+
+        # Drop any leading frames the producer overwrote while we were copying
+        overwritten = self.write_seq - self.num_slots + 1 - start
+        if overwritten > 0:
+            frames = frames[overwritten:]
+            timestamps = timestamps[overwritten:]
+            start += overwritten
+        return frames, start, timestamps
@@ -0,0 +1,129 @@
+import ctypes
+import threading
+import time
+from ctypes import c_int, c_void_p
+import numpy as np
+from frame_ring import FrameRing
+
+# Same ABI as the SDK's frame callback, but the frame arrives as a plain
+# address instead of a POINTER(c_uint8) object built for every call
+INGEST_CALLBACK = ctypes.CFUNCTYPE(None, c_void_p, c_void_p, c_int)
+
+
+class BatchedIngest(FrameRing):
+    """Low-overhead frame ingest: the SDK callback only copies, a consumer thread does the rest.
+
+    The slab is a FrameRing with a power-of-two number of slots. The ctypes
+    callback built by make_callback() is a closure over precomputed slot
+    addresses, so per frame it does one memmove, stores the arrival time and
+    status, and bumps write_seq; no py_object cast, no attribute lookups on
+    the Camera and no statistics. A consumer thread wakes every
+    `poll_interval` seconds and hands everything written since its last pass
+    to `handler(first_seq, frames, timestamps, statuses)`, in batches of up to
+    a quarter of the slab.
+
+    Each batch is copied out of the slab and write_seq is checked again
+    afterwards, as FrameRing.get_frames_since() does, so the handler only ever
+    sees intact frames. Frames the producer overwrote before or during the
+    copy (the consumer fell a slab behind) are counted in `overruns` and
+    skipped; the callback never waits.
+    """
+
+    def __init__(self, num_slots, height, width, handler, poll_interval=0.001):
+        num_slots = 1 << max(num_slots - 1, 1).bit_length()  # Round up to a power of two for the slot mask
+        super().__init__(num_slots, height, width)
+        self.handler = handler
+        self.poll_interval = poll_interval
+        batch_frames = max(num_slots // 4, 1)
+        self.batch = np.empty((batch_frames, height, width), dtype=np.uint16)
+        self.batch_timestamps = np.empty(batch_frames, dtype=np.int64)
+        self.batch_statuses = np.empty(batch_frames, dtype=np.int32)
+        self.addresses = [self.base_address + slot * self.frame_size for slot in range(num_slots)]
+        self.callback = self.make_callback()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.write_seq = 0
+        self.consumed_seq = 0
+        self.overruns = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def make_callback(self):
+        """Builds the ctypes callback that writes into this slab."""
+        memmove = ctypes.memmove
+        monotonic_ns = time.monotonic_ns
+        addresses = self.addresses
+        mask = self.num_slots - 1
+        frame_size = self.frame_size
+        # memoryviews take item assignment without creating numpy scalars
+        timestamps = memoryview(self.timestamps)
+        statuses = memoryview(self.statuses)
+        ring = self
+
+        def ingest_callback(userctx, frame, status):
+            seq = ring.write_seq
+            slot = seq & mask
+            memmove(addresses[slot], frame, frame_size)
+            timestamps[slot] = monotonic_ns()
+            statuses[slot] = status
+            ring.write_seq = seq + 1  # Commit
+
+        return INGEST_CALLBACK(ingest_callback)
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._consumer_loop, name="BatchedIngest", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the consumer after it has handled every frame written so far."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def _consumer_loop(self):
+        while not self.stop_event.is_set():
+            if not self.consume():
+                time.sleep(self.poll_interval)
+        self.consume()  # Drain what arrived before acquisition was stopped
+
+    def consume(self):
+        """Hands all new frames to the handler; returns the number of frames handled."""
+        end = self.write_seq
+        start = self.consumed_seq
+        if start >= end:
+            return 0
+        handled = 0
+        while start < end:
+            oldest = self.write_seq - self.num_slots + 1  # One slot may be mid-write
+            if start < oldest:
+                self.overruns += oldest - start
+                start = oldest
+                continue
+            slot = start & (self.num_slots - 1)
+            count = min(end - start, self.num_slots - slot, len(self.batch))
+            self.batch[:count] = self.frames[slot:slot + count]
+            self.batch_timestamps[:count] = self.timestamps[slot:slot + count]
+            self.batch_statuses[:count] = self.statuses[slot:slot + count]
+            # Drop the leading frames the producer overwrote while we were copying
+            torn = max(min(self.write_seq - self.num_slots + 1 - start, count), 0)
+            self.overruns += torn
+            if torn < count:
+                self.handler(start + torn, self.batch[torn:count],
+                             self.batch_timestamps[torn:count], self.batch_statuses[torn:count])
+                handled += count - torn
+            start += count
+        self.consumed_seq = start
+        self.batches += 1
+        if handled > self.max_batch:
+            self.max_batch = handled
+        return handled
+
+    def status(self):
+        return (f"{self.write_seq} frames in {self.batches} batches (largest {self.max_batch}), "
+                f"{self.overruns} overruns")
+
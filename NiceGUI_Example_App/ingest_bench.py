@@ -0,0 +1,101 @@
+"""Measures the frame rate each callback path can sustain, using the unpaced simulator.
+
+The simulated producer calls the ctypes callback as fast as it returns, so
+frames per second is the callback's sustainable rate and its inverse the
+per-frame cost:
+
+    noop            empty ctypes callback, the floor set by ctypes itself
+    slab            BatchedIngest callback alone, the consumer discards frames
+    viewer          viewer_callback, per-frame ring write and statistics
+    record          data_callback streaming to a StreamWriter
+    batched-viewer  BatchedIngest callback, consumer updates statistics
+    batched-record  BatchedIngest callback, consumer feeds the StreamWriter
+"""
+import argparse
+import os
+import time
+from camera import Camera
+from camera_sdk import fli_usb, select_backend
+from ingest import BatchedIngest, INGEST_CALLBACK
+from stream_writer import StreamWriter
+
+MODES = ["noop", "slab", "viewer", "record", "batched-viewer", "batched-record"]
+
+
+@INGEST_CALLBACK
+def noop_callback(userctx, frame, status):
+    pass
+
+
+def run_mode(camera, mode, seconds, slab_slots):
+    """Runs one acquisition in `mode`; returns (callback_rate, frames_handled, overruns)."""
+    batched = mode.startswith("batched")
+    camera.enable_batched_ingest(batched or mode == "slab", slab_slots)
+    sim_camera = fli_usb.camera(camera.cam_ctx)
+    delivered = sim_camera.frames_delivered  # Counted over the camera's lifetime
+
+    def callback_rate():
+        elapsed = sim_camera.stop_time - sim_camera.start_time
+        return (sim_camera.frames_delivered - delivered) / elapsed if elapsed > 0 else 0.0
+
+    if mode == "noop":
+        fli_usb.fli_usb_startAcquisition(camera.cam_ctx, camera.width, camera.height, noop_callback, None)
+        time.sleep(seconds)
+        fli_usb.fli_usb_stopAcquisition(camera.cam_ctx)
+        return callback_rate(), sim_camera.frames_delivered - delivered, 0
+
+    if mode == "slab":
+        ingest = BatchedIngest(camera.ingest_slab_slots, camera.height, camera.width, lambda *batch: None)
+        ingest.start()
+        fli_usb.fli_usb_startAcquisition(camera.cam_ctx, camera.width, camera.height, ingest.callback, None)
+        time.sleep(seconds)
+        fli_usb.fli_usb_stopAcquisition(camera.cam_ctx)
+        ingest.stop()
+        return callback_rate(), ingest.consumed_seq, ingest.overruns
+
+    acq_mode = "record" if mode.endswith("record") else "viewer"
+    if acq_mode == "record":
+        writer = StreamWriter(os.devnull, camera.width * camera.height * 2, chunk_frames=1024, num_chunks=8)
+        camera.prepare_stream(writer)
+        writer.start()
+    camera.start_acquisition(acq_mode)
+    time.sleep(seconds)
+    camera.stop_acquisition()
+    if camera.writer is not None:
+        camera.writer.close()
+        camera.writer = None
+    overruns = camera.ingest.overruns if batched else 0
+    return callback_rate(), camera.stats.frames, overruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame and batched ingest callbacks.")
+    parser.add_argument("-W", "--width", type=int, default=64, help="Frame width (default: 64)")
+    parser.add_argument("-H", "--height", type=int, default=64, help="Frame height (default: 64)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duration of each run (default: 2)")
+    parser.add_argument("--slab", type=int, default=0, help="Batched ingest slab slots (default: sized by the camera)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma separated modes (default: all of {MODES})")
+    args = parser.parse_args()
+
+    select_backend("sim", fps=0)  # Unpaced: the producer runs as fast as the callback allows
+    camera = Camera()
+    camera.configure_acquisition(args.width, args.height)
+    camera.initialize_camera_context()
+    results = []
+    try:
+        for mode in args.modes.split(","):
+            if mode not in MODES:
+                raise RuntimeError(f"Unknown mode '{mode}', expected one of {MODES}")
+            results.append((mode,) + run_mode(camera, mode, args.seconds, args.slab))
+    finally:
+        camera.close_camera_context()
+        fli_usb.fli_usb_exit()
+
+    print(f"\n{args.width}x{args.height} frames, {args.seconds:.1f} s per mode")
+    print(f"{'mode':<16}{'callbacks/s':>14}{'us/frame':>10}{'handled':>10}{'overruns':>10}")
+    for mode, rate, handled, overruns in results:
+        print(f"{mode:<16}{rate:>14.0f}{1e6 / rate if rate else 0.0:>10.2f}{handled:>10}{overruns:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,54 @@
-from nicegui import ui
+import argparse
+from nicegui import app, ui
 from camera import Camera
 from serial_console import SerialConsole
+from serial_link import DEFAULT_PORT
 from capture_frames import CaptureFrames
 from camera_viewer import CameraViewer
+from signal_panel import SignalPanel
+from profiling_panel import ProfilingPanel
+from profiling import profiler
+from preview_stream import PreviewBroadcaster, register_preview_routes
+from capture_reader import ReplaySource
+from acq_client import RemoteCamera, DEFAULT_SOCKET
+from frame_bus import DEFAULT_BUS_NAME
+
+parser = argparse.ArgumentParser(description="NiceGUI camera control app.")
+parser.add_argument("--replay", help="Show a recorded .raw/.flr capture in the viewer instead of the live camera")
+parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay speed factor, 0 = as fast as possible (default: 1)")
+parser.add_argument("--camera", type=int, default=0, help="Index of the camera to use when several are connected (default: 0)")
+parser.add_argument("--serial-port", default=DEFAULT_PORT, help=f"Serial port of that camera (default: {DEFAULT_PORT})")
+parser.add_argument("--daemon", nargs="?", const=DEFAULT_SOCKET, default=None,
+                    help=f"Use a running acq_daemon.py instead of opening the camera (socket, default: {DEFAULT_SOCKET})")
+parser.add_argument("--frame-bus", nargs="?", const=DEFAULT_BUS_NAME, default=None,
+                    help=f"Publish live frames to shared memory for other processes (name, default: {DEFAULT_BUS_NAME})")
+parser.add_argument("--batched-ingest", action="store_true",
+                    help="Copy frames in the SDK callback only and do the rest in batches (for small, fast frames)")
+parser.add_argument("--profile", action="store_true",
+                    help="Record profiling timings from startup (can also be switched on in the Profiling panel)")
+args, _ = parser.parse_known_args()
+if args.profile:
+    profiler.enable()
+
+# Binary preview stream shared by the viewer and any other clients
+preview_broadcaster = PreviewBroadcaster()
+register_preview_routes(app, preview_broadcaster)
 
 # Initialize the main application layout
 with ui.row().classes('w-full justify-center items-center no-wrap'):
     with ui.column().classes('md:w-1/2 w-full'):
         # Create instances of each component
-        camera = Camera()  
-        serial_console = SerialConsole() 
+        camera = RemoteCamera(args.daemon) if args.daemon else Camera(index=args.camera)
+        if args.frame_bus and not args.daemon:
+            camera.enable_frame_bus(args.frame_bus)
+        if args.batched_ingest and not args.daemon:
+            camera.enable_batched_ingest()
+        serial_console = SerialConsole(args.serial_port)
         capture_frames = CaptureFrames(camera, serial_console) 
-        camera_viewer = CameraViewer(camera, serial_console)
+        viewer_source = ReplaySource(args.replay, args.replay_speed) if args.replay else camera
+        camera_viewer = CameraViewer(viewer_source, serial_console, preview_broadcaster)
+        signal_panel = SignalPanel(viewer_source)
+        profiling_panel = ProfilingPanel()
 
 # Run NiceGUI
 ui.run()
\ No newline at end of file
@@ -0,0 +1,184 @@
+import ctypes
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from frame_ring import FrameRing
+from recording import FrameRecord, RecordingWriter, RECORDING_SUFFIX, FRAME_RECORD_DTYPE
+from stream_writer import RawFileSink
+from compression import CompressedRecordingWriter, COMPRESSED_SUFFIX
+from camera_sdk import TAG_PIXELS
+
+
+class ThresholdTrigger:
+    """Trigger condition: fires when the max (or mean) of a frame, or of a region, reaches `threshold`.
+
+    Over the whole frame the image tag pixels (camera_sdk.TAG_PIXELS) are
+    skipped; on frames without a tag that leaves out only those few pixels.
+    """
+
+    def __init__(self, threshold, statistic="max", roi=None):
+        if statistic not in ("max", "mean"):
+            raise ValueError(f"Unknown statistic '{statistic}', expected 'max' or 'mean'.")
+        self.threshold = threshold
+        self.statistic = statistic
+        self.roi = roi  # (x, y, width, height) or None for the whole frame
+        self.last_value = 0
+
+    def __call__(self, frame):
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            frame = frame[y:y + h, x:x + w]
+        else:
+            frame = frame.reshape(-1)[TAG_PIXELS:]
+        self.last_value = frame.max() if self.statistic == "max" else frame.mean()
+        return self.last_value >= self.threshold
+
+
+class PretriggerRecorder(FrameRing):
+    """Continuous recording into a circular buffer, saving the frames around each trigger.
+
+    The Camera callback writes every frame into this ring (it is also the
+    viewer ring), so memory use is fixed at `num_slots` frames however long
+    acquisition runs. trigger() marks the newest frame as the event; if a
+    `condition` is set, it is evaluated on each frame as it arrives and fires
+    on that very frame. A saver thread then writes the `pre_frames` before the
+    event, the event frame and `post_frames` after it to a new file, while
+    acquisition keeps running. The ring holds the pre- and post-trigger
+    windows plus `margin` frames, so the saver can start late without losing
+    any of them.
+
+    New triggers are ignored until the post-trigger window of the current
+    event is complete (counted in `ignored_triggers`).
+    """
+
+    def __init__(self, height, width, pre_frames, post_frames, output_prefix="event", suffix=RECORDING_SUFFIX,
+                 fps=0.0, settings=None, condition=None, margin=256, chunk_frames=256):
+        super().__init__(pre_frames + post_frames + 1 + margin, height, width)
+        self.pre_frames = pre_frames
+        self.post_frames = post_frames
+        self.output_prefix = output_prefix
+        self.suffix = suffix
+        self.fps = fps
+        self.settings = settings or {}
+        self.condition = condition
+        self.chunk_frames = chunk_frames
+        self.chunk = np.zeros((chunk_frames, height, width), dtype=np.uint16)
+        self.records = (FrameRecord * chunk_frames)()
+        self.record_array = np.frombuffer(self.records, dtype=FRAME_RECORD_DTYPE)
+        self.events = queue.SimpleQueue()
+        self.event_count = 0  # Kept across acquisitions, numbers the output files
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.write_seq = 0
+        self.saved = []  # One dict per saved event
+        self.holdoff_seq = 0  # Triggers before this frame number are ignored
+        self.ignored_triggers = 0
+        self.saving = False
+
+    def write_frame(self, frame, status=0):
+        """Copies a frame into the ring and checks the trigger condition on it. Called from the data callback."""
+        seq = self.write_seq
+        slot = seq % self.num_slots
+        ctypes.memmove(self.base_address + slot * self.frame_size, frame, self.frame_size)
+        self.timestamps[slot] = time.monotonic_ns()
+        self.statuses[slot] = status
+        self.write_seq = seq + 1
+        if self.condition is not None and seq >= self.holdoff_seq and self.condition(self.frames[slot]):
+            self._queue_event(seq, "threshold")
+
+    def trigger(self, source="manual"):
+        """Saves the window around the newest frame; returns the event's output file, or None if ignored."""
+        seq = self.write_seq - 1
+        if seq < 0 or seq < self.holdoff_seq:
+            self.ignored_triggers += 1
+            return None
+        return self._queue_event(seq, source)
+
+    def _queue_event(self, seq, source):
+        self.holdoff_seq = seq + self.post_frames + 1
+        self.event_count += 1
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = f"{self.output_prefix}_{self.event_count:03d}_{timestamp}{self.suffix}"
+        self.saving = True
+        self.events.put({"output": output, "trigger_seq": seq, "source": source,
+                         "first_seq": max(seq - self.pre_frames, 0), "end_seq": seq + self.post_frames + 1})
+        return output
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._saver_loop, name="PretriggerSaver", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the saver once pending events are written, with the frames that arrived before stopping."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.events.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _saver_loop(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+            self._save_event(event)
+            self.saving = not self.events.empty()
+
+    def _save_event(self, event):
+        """Writes one event's frames to its file as they become available."""
+        settings = dict(self.settings, trigger_seq=event["trigger_seq"], trigger_source=event["source"],
+                        pre_frames=self.pre_frames, post_frames=self.post_frames)
+        if self.suffix == RECORDING_SUFFIX:
+            sink = RecordingWriter(event["output"], self.width, self.height, self.fps, settings, self.chunk_frames)
+        elif self.suffix == COMPRESSED_SUFFIX:
+            sink = CompressedRecordingWriter(event["output"], self.width, self.height, self.fps, settings,
+                                             self.chunk_frames)
+        else:
+            sink = RawFileSink(event["output"])
+        sink.open()
+        next_seq = event["first_seq"]
+        end_seq = event["end_seq"]
+        missed = 0
+        fill = 0  # Chunks are written full (only a recording's last chunk may be partial)
+        while next_seq < end_seq:
+            stopped = self.stop_event.is_set()  # Checked first: no frames arrive after stop, so one more pass gets all
+            frames, first, timestamps = self.get_frames_since(next_seq - 1, end_seq - next_seq,
+                                                              out=self.chunk[fill:])
+            count = len(frames)
+            if not count:
+                if stopped:
+                    break  # Acquisition stopped before the post-trigger window was complete
+                time.sleep(0.001)
+                continue
+            missed += first - next_seq
+            records = self.record_array[fill:fill + count]
+            records["seq"] = np.arange(first, first + count)
+            records["timestamp_ns"] = timestamps
+            records["status"] = self.statuses[np.arange(first, first + count) % self.num_slots]
+            fill += count
+            next_seq = first + count
+            if fill == self.chunk_frames:
+                sink.write_chunk(self.chunk, self.records, fill)
+                fill = 0
+        if fill:
+            sink.write_chunk(self.chunk, self.records, fill)
+        written = next_seq - event["first_seq"] - missed
+        sink.close(trigger_frames=written, trigger_missed=missed)
+        self.saved.append(dict(event, frames=written, missed=missed))
+        print(f"Saved {written} frames around frame {event['trigger_seq']} to {event['output']}"
+              + (f" ({missed} overwritten before they could be saved)" if missed else ""))
+
+    def status(self):
+        """Returns a one-line summary for live display."""
+        seconds = self.pre_frames / self.fps if self.fps else 0.0
+        text = (f"buffering {min(self.write_seq, self.pre_frames)}/{self.pre_frames} pre-trigger frames"
+                + (f" ({seconds:.1f} s)" if seconds else "") + f", {len(self.saved)} event(s) saved")
+        if self.saving:
+            text += ", saving..."
+        return text
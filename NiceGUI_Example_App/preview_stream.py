@@ -0,0 +1,160 @@
+import asyncio
+import struct
+import time
+import cv2
+from display_lut import DisplayLUT
+from profiling import profiler
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+
+PREVIEW_FORMATS = ("jpeg", "raw8")
+MJPEG_BOUNDARY = b"frame"
+RAW8_HEADER = struct.Struct("<qHH")  # frame number, width, height
+perf_counter_ns = time.perf_counter_ns
+
+# Profiling stages of the preview encode, see profiling.py
+SPAN_HISTOGRAM = profiler.stage("encode.histogram")  # Contrast window update
+SPAN_GRAY = profiler.stage("encode.raw8")
+SPAN_COLORMAP = profiler.stage("encode.colormap")  # 14-bit to colormapped 8-bit lookup
+SPAN_JPEG = profiler.stage("encode.jpeg")
+SPAN_PUBLISH = profiler.stage("viewer.publish")
+
+
+class PreviewBroadcaster:
+    """Encodes each preview frame once and shares it with every connected client.
+
+    encode() runs in the FrameEncoder worker thread and only produces the formats
+    that currently have clients. publish() stores the result on the event loop and
+    wakes the clients. Each client sends the newest frame when it is ready for
+    one, so a slow client skips frames instead of queueing them.
+
+    WebSocket clients pick a format with ?format=jpeg or ?format=raw8. raw8
+    messages carry the frame number, width and height (RAW8_HEADER) followed by
+    the 8-bit pixels, for colormapping on the client.
+    """
+
+    def __init__(self, jpeg_quality=80, lut=None):
+        self.jpeg_quality = jpeg_quality
+        self.lut = lut or DisplayLUT()
+        self.clients = {fmt: 0 for fmt in PREVIEW_FORMATS}
+        self.frames = {}
+        self.last_jpeg = None  # Kept after clients leave, e.g. to show the last frame once stopped
+        self.publish_count = 0
+        self.new_frame = None
+
+        # Statistics
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.bytes_sent = 0
+
+    @property
+    def client_count(self):
+        return sum(self.clients.values())
+
+    def encode(self, raw_frame):
+        """Converts a 14-bit frame into every format that has at least one client."""
+        encoded = {"shape": raw_frame.shape}
+        if not self.client_count:
+            return encoded
+
+        # **Contrast window and colormap come from one lookup table per format**
+        profiling = profiler.enabled
+        start_ns = perf_counter_ns()
+        self.lut.update_histogram(raw_frame)
+        if profiling:
+            start_ns = profiler.record(SPAN_HISTOGRAM, start_ns)
+        if self.clients["raw8"]:
+            encoded["raw8"] = self.lut.apply_gray(raw_frame).tobytes()
+            if profiling:
+                start_ns = profiler.record(SPAN_GRAY, start_ns)
+        if self.clients["jpeg"]:
+            color_mapped_image = self.lut.apply(raw_frame)
+            if profiling:
+                start_ns = profiler.record(SPAN_COLORMAP, start_ns)
+            _, jpeg = cv2.imencode(".jpg", color_mapped_image, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+            encoded["jpeg"] = jpeg.tobytes()
+            if profiling:
+                profiler.record(SPAN_JPEG, start_ns)
+        return encoded
+
+    def publish(self, encoded, frame_number):
+        """Makes a newly encoded frame available to all clients. Runs on the event loop."""
+        start_ns = perf_counter_ns()
+        encoded["frame_number"] = frame_number
+        self.frames = encoded
+        if "jpeg" in encoded:
+            self.last_jpeg = encoded["jpeg"]
+        self.publish_count += 1
+        # Wake everyone waiting on the previous frame; later waiters get a fresh event
+        if self.new_frame is not None:
+            self.new_frame.set()
+            self.new_frame = None
+        if profiler.enabled:
+            profiler.record(SPAN_PUBLISH, start_ns)
+
+    async def next_frame(self, fmt, last_count):
+        """Waits for a frame newer than `last_count` that includes `fmt`. Returns (frames, publish_count)."""
+        while self.publish_count == last_count or fmt not in self.frames:
+            if self.new_frame is None:
+                self.new_frame = asyncio.Event()
+            await self.new_frame.wait()
+        if last_count >= 0 and self.publish_count - last_count > 1:
+            self.frames_skipped += self.publish_count - last_count - 1
+        return self.frames, self.publish_count
+
+    async def subscribe(self, fmt):
+        """Async generator yielding the latest encoded frames each time the client is ready for one."""
+        self.clients[fmt] += 1
+        try:
+            last_count = -1
+            while True:
+                frames, last_count = await self.next_frame(fmt, last_count)
+                yield frames
+                self.frames_sent += 1
+                self.bytes_sent += len(frames[fmt])
+        finally:
+            self.clients[fmt] -= 1
+
+    @staticmethod
+    def raw8_message(frames):
+        """Prefixes a raw 8-bit frame with its frame number and geometry."""
+        height, width = frames["shape"]
+        return RAW8_HEADER.pack(frames["frame_number"], width, height) + frames["raw8"]
+
+    def stats_text(self):
+        return (f"{self.client_count} stream client(s), {self.frames_sent} frames sent, "
+                f"{self.frames_skipped} skipped by slow clients")
+
+
+def register_preview_routes(app, broadcaster, prefix="/preview"):
+    """Adds MJPEG, single-frame and WebSocket preview endpoints to the NiceGUI app."""
+
+    @app.get(f"{prefix}/mjpeg")
+    async def preview_mjpeg():
+        async def stream():
+            async for frames in broadcaster.subscribe("jpeg"):
+                jpeg = frames["jpeg"]
+                yield (b"--" + MJPEG_BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                       + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+        return StreamingResponse(stream(), media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY.decode()}",
+                                 headers={"Cache-Control": "no-store"})
+
+    @app.get(f"{prefix}/frame.jpg")
+    async def preview_frame():
+        jpeg = broadcaster.last_jpeg
+        if jpeg is None:
+            return Response(status_code=204)
+        return Response(jpeg, media_type="image/jpeg", headers={"Cache-Control": "no-store"})
+
+    @app.websocket(f"{prefix}/ws")
+    async def preview_ws(websocket: WebSocket):
+        fmt = websocket.query_params.get("format", "jpeg")
+        if fmt not in PREVIEW_FORMATS:
+            await websocket.close(code=1003)
+            return
+        await websocket.accept()
+        try:
+            async for frames in broadcaster.subscribe(fmt):
+                await websocket.send_bytes(broadcaster.raw8_message(frames) if fmt == "raw8" else frames["jpeg"])
+        except WebSocketDisconnect:
+            pass
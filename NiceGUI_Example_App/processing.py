@@ -0,0 +1,357 @@
+"""Real-time frame processing on batches pulled from the acquisition ring.
+
+A Pipeline worker thread repeatedly takes every new frame from a source
+(Camera, FrameRing, ReplaySource: anything with get_frames_since) into a
+preallocated batch, converts it to float32 once and runs the registered stages
+in order. Stages either correct the batch in place (DarkSubtract, FlatField) or
+reduce each frame to a few numbers (RoiSums, Centroid) written into the
+pipeline's preallocated result table. The result table can be written to disk
+with a ResultRecorder, alongside or instead of the frames.
+"""
+import argparse
+import json
+import threading
+import time
+import numpy as np
+
+RESULTS_SUFFIX = ".res"
+
+
+class Stage:
+    """Base class of pipeline stages.
+
+    setup() is called once with the frame geometry and batch size before the
+    first batch; process() then gets the float32 batch (n, H, W) and the result
+    rows for the same n frames. `result_fields` lists the (name, dtype, shape)
+    columns a reducing stage adds to the result table.
+    """
+    name = "stage"
+    result_fields = ()
+
+    def setup(self, height, width, max_batch):
+        pass
+
+    def process(self, batch, results):
+        raise NotImplementedError
+
+
+class DarkSubtract(Stage):
+    """Subtracts a dark frame from every frame."""
+    name = "dark"
+
+    def __init__(self, dark):
+        self.dark = np.asarray(dark, dtype=np.float32)
+
+    def process(self, batch, results):
+        np.subtract(batch, self.dark, out=batch)
+
+
+class FlatField(Stage):
+    """Divides every frame by a flat field normalized to a mean of 1."""
+    name = "flat"
+
+    def __init__(self, flat):
+        flat = np.asarray(flat, dtype=np.float32)
+        # Multiplying by the precomputed inverse is cheaper than dividing every frame
+        self.gain = np.where(flat > 0, flat.mean() / np.maximum(flat, 1e-6), 0).astype(np.float32)
+
+    def process(self, batch, results):
+        np.multiply(batch, self.gain, out=batch)
+
+
+class RoiSums(Stage):
+    """Sums each of a list of (x0, y0, x1, y1) regions, end exclusive, in every frame."""
+    name = "roi_sums"
+
+    def __init__(self, rois):
+        self.rois = [tuple(int(v) for v in roi) for roi in rois]
+        self.result_fields = (("roi_sums", np.float64, (len(self.rois),)),)
+
+    def process(self, batch, results):
+        sums = results["roi_sums"]
+        for k, (x0, y0, x1, y1) in enumerate(self.rois):
+            batch[:, y0:y1, x0:x1].sum(axis=(1, 2), out=sums[:, k])
+
+
+class Centroid(Stage):
+    """Intensity-weighted centroid (x, y) in pixels of every frame, or of a region of it.
+
+    Pixels at or below `threshold` are ignored. Frames with no signal get NaN.
+    """
+    name = "centroid"
+    result_fields = (("centroid", np.float32, (2,)), ("total", np.float64, ()))
+
+    def __init__(self, roi=None, threshold=0.0):
+        self.roi = roi
+        self.threshold = threshold
+
+    def setup(self, height, width, max_batch):
+        x0, y0, x1, y1 = self.roi or (0, 0, width, height)
+        self.window = (slice(None), slice(y0, y1), slice(x0, x1))
+        self.xs = np.arange(x0, x1, dtype=np.float64)
+        self.ys = np.arange(y0, y1, dtype=np.float64)
+        self.work = np.empty((max_batch, y1 - y0, x1 - x0), dtype=np.float32)
+
+    def process(self, batch, results):
+        n = len(batch)
+        # Always clip: a dark-subtracted frame has negative pixels, which would pull the centroid off the frame
+        image = np.subtract(batch[self.window], self.threshold, out=self.work[:n])
+        np.maximum(image, 0, out=image)
+        # Project onto the axes first: two small matrix products instead of two full-frame weighted sums
+        columns = image.sum(axis=1, dtype=np.float64)
+        rows = image.sum(axis=2, dtype=np.float64)
+        total = columns.sum(axis=1)
+        results["total"] = total
+        mass = np.where(total > 0, total, np.nan)  # No signal above threshold: NaN, not a division by zero
+        results["centroid"][:, 0] = columns @ self.xs / mass
+        results["centroid"][:, 1] = rows @ self.ys / mass
+
+
+STAGE_TYPES = {stage.name: stage for stage in (DarkSubtract, FlatField, RoiSums, Centroid)}
+
+
+class Pipeline:
+    """Runs registered stages on every frame of a source from a worker thread.
+
+    The source must keep enough frames for the worker to catch up between
+    batches: give the Camera a ring of a few batches (e.g. RING_BUFFER_SIZE =
+    1024 before starting acquisition). Frames the worker was too slow for are
+    counted in frames_missed rather than blocking the acquisition.
+    """
+
+    def __init__(self, source, height, width, max_batch=256, poll_interval=0.001):
+        self.source = source
+        self.height = height
+        self.width = width
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self.stages = []
+        self.recorders = []
+        self.on_results = None  # Called with each batch of result rows from the worker thread
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.reset_stats()
+
+    def add_stage(self, stage):
+        """Registers a stage; stages run in the order they were added."""
+        if self.thread is not None:
+            raise RuntimeError("Stages must be added before the pipeline starts.")
+        self.stages.append(stage)
+        return stage
+
+    def add_recorder(self, recorder):
+        self.recorders.append(recorder)
+        return recorder
+
+    @property
+    def result_dtype(self):
+        fields = [("seq", np.int64), ("timestamp_ns", np.int64)]
+        for stage in self.stages:
+            fields.extend(stage.result_fields)
+        return np.dtype(fields)
+
+    def reset_stats(self):
+        self.frames_processed = 0
+        self.frames_missed = 0
+        self.batches = 0
+        self.stage_ns = {}
+        self.stage_max_ns = {}
+        self.latest = None
+
+    def start(self):
+        """Preallocates the batch buffers, sets up the stages and starts the worker."""
+        self.raw = np.empty((self.max_batch, self.height, self.width), dtype=np.uint16)
+        self.batch = np.empty((self.max_batch, self.height, self.width), dtype=np.float32)
+        self.results = np.zeros(self.max_batch, dtype=self.result_dtype)
+        for stage in self.stages:
+            stage.setup(self.height, self.width, self.max_batch)
+            self.stage_ns.setdefault(stage.name, 0)
+            self.stage_max_ns.setdefault(stage.name, 0)
+        for recorder in self.recorders:
+            recorder.open(self.result_dtype, [stage.name for stage in self.stages])
+        self.stop_event.clear()
+        self.last_seq = -1
+        self.thread = threading.Thread(target=self._worker_loop, name="Pipeline", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Processes the frames still in the source, then stops the worker and closes the recorders."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        for recorder in self.recorders:
+            recorder.close(self.stats())
+
+    def _worker_loop(self):
+        while True:
+            stopping = self.stop_event.is_set()
+            frames, first, timestamps = self.source.get_frames_since(self.last_seq, self.max_batch, self.raw)
+            n = len(frames)
+            if n:
+                self.frames_missed += first - self.last_seq - 1
+                self.last_seq = first + n - 1
+                self.process_batch(frames, first, timestamps)
+            elif stopping:
+                break
+            else:
+                time.sleep(self.poll_interval)
+
+    def process_batch(self, frames, first, timestamps):
+        """Runs all stages on `frames` (uint16, n x H x W); returns the n result rows."""
+        n = len(frames)
+        batch = self.batch[:n]
+        results = self.results[:n]
+        start = time.perf_counter_ns()
+        np.copyto(batch, frames)
+        results["seq"] = np.arange(first, first + n)
+        results["timestamp_ns"] = timestamps
+        self._add_time("convert", time.perf_counter_ns() - start)
+        for stage in self.stages:
+            start = time.perf_counter_ns()
+            stage.process(batch, results)
+            self._add_time(stage.name, time.perf_counter_ns() - start)
+        for recorder in self.recorders:
+            recorder.write(results)
+        if self.on_results is not None:
+            self.on_results(results)
+        self.latest = results[n - 1].copy()
+        self.frames_processed += n
+        self.batches += 1
+        return results
+
+    def _add_time(self, name, elapsed):
+        self.stage_ns[name] = self.stage_ns.get(name, 0) + elapsed
+        if elapsed > self.stage_max_ns.get(name, 0):
+            self.stage_max_ns[name] = elapsed
+
+    def stats(self):
+        """Returns per-stage timing: {name: {"us_per_frame", "max_batch_ms"}} plus counters."""
+        frames = max(self.frames_processed, 1)
+        return {
+            "frames_processed": self.frames_processed,
+            "frames_missed": self.frames_missed,
+            "batches": self.batches,
+            "stages": {name: {"us_per_frame": total / frames / 1e3, "max_batch_ms": self.stage_max_ns[name] / 1e6}
+                       for name, total in self.stage_ns.items()},
+        }
+
+    def stats_text(self):
+        stats = self.stats()
+        parts = [f"{name} {s['us_per_frame']:.2f} us/frame" for name, s in stats["stages"].items()]
+        total = sum(s["us_per_frame"] for s in stats["stages"].values())
+        return (f"processed {stats['frames_processed']}, missed {stats['frames_missed']}, "
+                f"{total:.2f} us/frame ({', '.join(parts)})")
+
+
+class ResultRecorder:
+    """Appends pipeline result rows to a binary file, with a JSON sidecar describing them.
+
+    Rows are buffered in a preallocated block and written in large writes. The
+    file is a flat array of the pipeline's result dtype; load_results() reads
+    it back as a NumPy structured array.
+    """
+
+    def __init__(self, path, block_rows=4096):
+        self.path = path
+        self.block_rows = block_rows
+        self.outfile = None
+        self.rows_written = 0
+
+    def open(self, dtype, stage_names):
+        self.dtype = dtype
+        self.stage_names = stage_names
+        self.block = np.zeros(self.block_rows, dtype=dtype)
+        self.fill = 0
+        self.outfile = open(self.path, "wb")
+
+    def write(self, rows):
+        while len(rows):
+            count = min(len(rows), self.block_rows - self.fill)
+            self.block[self.fill:self.fill + count] = rows[:count]
+            self.fill += count
+            rows = rows[count:]
+            if self.fill == self.block_rows:
+                self._flush()
+
+    def _flush(self):
+        self.outfile.write(self.block[:self.fill].tobytes())
+        self.rows_written += self.fill
+        self.fill = 0
+
+    def close(self, stats=None):
+        if self.outfile is None:
+            return
+        self._flush()
+        self.outfile.close()
+        self.outfile = None
+        with open(self.path + ".json", "w") as f:
+            json.dump({"dtype": self.dtype.descr, "rows": self.rows_written, "stages": self.stage_names,
+                       "stats": stats or {}}, f, indent=1)
+
+
+def load_results(path):
+    """Reads a ResultRecorder file as a structured array (seq, timestamp_ns, stage columns...)."""
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    dtype = np.dtype([tuple(field) if len(field) == 2 else (field[0], field[1], tuple(field[2]))
+                      for field in meta["dtype"]])
+    return np.fromfile(path, dtype=dtype)
+
+
+def mean_frame(path):
+    """Mean of all frames of a .raw/.flr capture, e.g. to use as a dark or flat frame."""
+    from capture_reader import Capture
+    capture = Capture(path)
+    total = np.zeros((capture.height, capture.width), dtype=np.float64)
+    for _, frames in capture.iter_chunks(256):
+        total += frames.sum(axis=0, dtype=np.float64)
+    return (total / max(len(capture), 1)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the processing pipeline on live camera frames and record the results.")
+    parser.add_argument("output", help=f"Result file (e.g. centroids{RESULTS_SUFFIX})")
+    parser.add_argument("-W", "--width", type=int, default=64, help="Frame width (default: 64)")
+    parser.add_argument("-H", "--height", type=int, default=64, help="Frame height (default: 64)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long to run (default: 5)")
+    parser.add_argument("--dark", help="Capture whose mean frame is subtracted")
+    parser.add_argument("--flat", help="Capture whose mean frame is used as flat field")
+    parser.add_argument("--roi", action="append", default=[], help="Region x0,y0,x1,y1 to sum (repeatable)")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Centroid threshold (default: 0)")
+    parser.add_argument("--batch", type=int, default=256, help="Frames per batch (default: 256)")
+    args = parser.parse_args()
+
+    from camera import Camera
+    camera = Camera()
+    camera.RING_BUFFER_SIZE = 8 * args.batch  # Room for the worker to fall a few batches behind
+    camera.configure_acquisition(args.width, args.height)
+    camera.initialize_camera_context()
+
+    pipeline = Pipeline(camera, args.height, args.width, args.batch)
+    if args.dark:
+        pipeline.add_stage(DarkSubtract(mean_frame(args.dark)))
+    if args.flat:
+        pipeline.add_stage(FlatField(mean_frame(args.flat)))
+    if args.roi:
+        pipeline.add_stage(RoiSums([roi.split(",") for roi in args.roi]))
+    pipeline.add_stage(Centroid(threshold=args.threshold))
+    pipeline.add_recorder(ResultRecorder(args.output))
+
+    camera.start_acquisition("viewer")
+    pipeline.start()
+    try:
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            time.sleep(1)
+            print(f"{camera.stats.summary()} | {pipeline.stats_text()}")
+    except KeyboardInterrupt:
+        pass
+    camera.stop_acquisition()
+    pipeline.stop()
+    camera.close_camera_context()
+    print(f"Results saved to {args.output}: {pipeline.stats_text()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Always-available timing spans and counters for the acquisition and display paths.
+
+The module-level `profiler` is shared by Camera, CameraViewer, the preview
+encoder, CaptureFrames and SerialConsole. It is off by default; enable() or
+the FLI_PROFILE=1 environment variable turns it on at run time. While off,
+an instrumented site costs one attribute check.
+
+Events go into preallocated arrays used as a ring of `capacity` entries, so
+recording never allocates and old events are overwritten on long runs:
+
+- spans: a named stage with start time and duration (time.perf_counter_ns),
+  recorded with record(stage, start_ns) on hot paths, where the caller
+  already has the start time, or `with profiler.span(name):` elsewhere,
+- counters: running totals (count(name, n)), also kept as timeline events.
+
+summary() gives count, total and p50/p90/p99/max per stage over the events
+still in the ring. chrome_trace() / export_chrome_trace() write the Chrome
+trace event format, which chrome://tracing and ui.perfetto.dev open.
+`python3 profiling.py trace.json [other.json]` prints the summary of a saved
+trace, or compares two of them stage by stage to spot regressions.
+"""
+import argparse
+import array
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+import numpy as np
+
+perf_counter_ns = time.perf_counter_ns
+get_ident = threading.get_ident
+
+DEFAULT_CAPACITY = 1 << 16  # Events kept; 32 bytes each
+SPAN = 0
+COUNTER = 1
+PERCENTILES = (50, 90, 99)
+
+
+class Profiler:
+    """Preallocated ring of span and counter events; see the module docstring."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False):
+        self.capacity = capacity
+        self.starts = array.array("q", bytes(8 * capacity))
+        self.values = array.array("q", bytes(8 * capacity))  # Span duration, or counter total
+        self.stages = array.array("i", bytes(4 * capacity))
+        self.threads = array.array("Q", bytes(8 * capacity))
+        self.names = []
+        self.kinds = []
+        self.ids = {}
+        self.counters = {}
+        self.lock = threading.Lock()  # Only for registering names; recording is lock-free
+        self.enabled = enabled
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Drops all recorded events and counter totals."""
+        self.slots = itertools.count()  # next() on it is atomic, so threads never share a slot
+        self.written = 0
+        self.epoch_ns = perf_counter_ns()
+        self.counters = {name: 0 for name in self.counters}
+
+    def stage(self, name, kind=SPAN):
+        """Returns the id of stage `name`, registering it on first use."""
+        stage = self.ids.get(name)
+        if stage is None:
+            with self.lock:
+                stage = self.ids.get(name)
+                if stage is None:
+                    stage = len(self.names)
+                    self.names.append(name)
+                    self.kinds.append(kind)
+                    self.ids[name] = stage
+                    if kind == COUNTER:
+                        self.counters[name] = 0
+        return stage
+
+    def record(self, stage, start_ns, end_ns=None):
+        """Records a span of stage id `stage` from start_ns to end_ns (default: now); returns end_ns.
+
+        Hot paths check `enabled` themselves before calling, and can chain
+        consecutive steps: start = profiler.record(STEP_1, start).
+        """
+        if end_ns is None:
+            end_ns = perf_counter_ns()
+        slot = next(self.slots)
+        i = slot % self.capacity
+        self.starts[i] = start_ns
+        self.values[i] = end_ns - start_ns
+        self.stages[i] = stage
+        self.threads[i] = get_ident()
+        if slot >= self.written:
+            self.written = slot + 1
+        return end_ns
+
+    def span(self, name):
+        """Context manager timing its block as stage `name`; does nothing while disabled."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(self.stage(name))
+
+    @contextlib.contextmanager
+    def _span(self, stage):
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, start)
+
+    def count(self, name, n=1):
+        """Adds n to counter `name` and records its new total on the timeline."""
+        if not self.enabled:
+            return
+        stage = self.stage(name, COUNTER)
+        total = self.counters[name] + n
+        self.counters[name] = total
+        slot = next(self.slots)
+        i = slot % self.capacity
+        self.starts[i] = perf_counter_ns()
+        self.values[i] = total
+        self.stages[i] = stage
+        self.threads[i] = get_ident()
+        if slot >= self.written:
+            self.written = slot + 1
+
+    def events(self):
+        """Returns (starts, values, stages, threads) arrays of the events in the ring, oldest first."""
+        count = min(self.written, self.capacity)
+        order = np.arange(self.written - count, self.written) % self.capacity
+        columns = [np.frombuffer(column, dtype=column.typecode)[:self.capacity][order]
+                   for column in (self.starts, self.values, self.stages, self.threads)]
+        starts = columns[0]
+        keep = starts >= self.epoch_ns  # Slots written before the last reset()
+        return tuple(column[keep] for column in columns)
+
+    def summary(self):
+        """Returns {stage: {count, total_ms, mean_us, p50_us, p90_us, p99_us, max_us}} plus counter totals."""
+        _, values, stages, _ = self.events()
+        return summarize(values, stages, self.names, self.kinds, self.counters)
+
+    def summary_text(self):
+        return summary_text(self.summary())
+
+    def chrome_trace(self):
+        """Returns the recorded events as a Chrome trace / Perfetto JSON object."""
+        starts, values, stages, threads = self.events()
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "fli camera"}}]
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": int(tid),
+                    "args": {"name": thread_names.get(int(tid), f"thread {int(tid)}")}} for tid in np.unique(threads)]
+        for start, value, stage, tid in zip(((starts - self.epoch_ns) / 1e3).tolist(), values.tolist(),
+                                            stages.tolist(), threads.tolist()):
+            name = self.names[stage]
+            if self.kinds[stage] == SPAN:
+                events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "ts": start,
+                               "dur": value / 1e3, "pid": pid, "tid": tid})
+            else:
+                events.append({"name": name, "ph": "C", "ts": start, "pid": pid, "args": {"value": value}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"summary": self.summary(), "dropped_events": max(self.written - self.capacity, 0)}}
+
+    def export_chrome_trace(self, path):
+        """Writes chrome_trace() to `path`; returns the number of events written."""
+        trace = self.chrome_trace()
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return len(trace["traceEvents"])
+
+
+def summarize(durations_ns, stages, names, kinds, counters=None):
+    """Per-stage statistics of span durations, see Profiler.summary()."""
+    durations_ns = np.asarray(durations_ns)
+    stages = np.asarray(stages)
+    summary = {}
+    for stage, name in enumerate(names):
+        if kinds[stage] != SPAN:
+            continue
+        durations = durations_ns[stages == stage]
+        if not len(durations):
+            continue
+        p50, p90, p99 = np.percentile(durations, PERCENTILES) / 1e3
+        summary[name] = {"count": int(len(durations)), "total_ms": float(durations.sum()) / 1e6,
+                         "mean_us": float(durations.mean()) / 1e3, "p50_us": float(p50), "p90_us": float(p90),
+                         "p99_us": float(p99), "max_us": float(durations.max()) / 1e3}
+    if counters:
+        summary["counters"] = dict(counters)
+    return summary
+
+
+def summary_text(summary):
+    """Formats a summary as a table, one stage per line."""
+    lines = [f"{'stage':28s} {'count':>8s} {'total ms':>10s} {'p50 us':>9s} {'p90 us':>9s} {'p99 us':>9s} "
+             f"{'max us':>9s}"]
+    for name, s in sorted((item for item in summary.items() if item[0] != "counters"),
+                          key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:28s} {s['count']:8d} {s['total_ms']:10.1f} {s['p50_us']:9.1f} {s['p90_us']:9.1f} "
+                     f"{s['p99_us']:9.1f} {s['max_us']:9.1f}")
+    counters = summary.get("counters")
+    if counters:
+        lines.append("counters: " + ", ".join(f"{name} {value}" for name, value in sorted(counters.items())))
+    return "\n".join(lines)
+
+
+def load_trace_summary(path):
+    """Recomputes the per-stage summary of a Chrome trace file written by export_chrome_trace()."""
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    names = sorted({event["name"] for event in events if event["ph"] == "X"})
+    ids = {name: i for i, name in enumerate(names)}
+    spans = [event for event in events if event["ph"] == "X"]
+    durations = [event["dur"] * 1e3 for event in spans]
+    stages = [ids[event["name"]] for event in spans]
+    counters = {}
+    for event in events:
+        if event["ph"] == "C":
+            counters[event["name"]] = event["args"]["value"]
+    return summarize(durations, stages, names, [SPAN] * len(names), counters)
+
+
+def compare_text(before, after):
+    """Side-by-side p50/p99 of two summaries, with the relative change of p50."""
+    lines = [f"{'stage':28s} {'p50 before':>11s} {'p50 after':>10s} {'change':>8s} {'p99 before':>11s} "
+             f"{'p99 after':>10s}"]
+    for name in sorted(set(before) | set(after)):
+        if name == "counters":
+            continue
+        b, a = before.get(name), after.get(name)
+        if b is None or a is None:
+            lines.append(f"{name:28s} only in {'after' if b is None else 'before'}")
+            continue
+        change = (a["p50_us"] / b["p50_us"] - 1) * 100 if b["p50_us"] else 0.0
+        lines.append(f"{name:28s} {b['p50_us']:11.1f} {a['p50_us']:10.1f} {change:+7.1f}% {b['p99_us']:11.1f} "
+                     f"{a['p99_us']:10.1f}")
+    return "\n".join(lines)
+
+
+profiler = Profiler(enabled=os.environ.get("FLI_PROFILE", "") not in ("", "0"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a profiling trace, or compare two of them.")
+    parser.add_argument("trace", help="Chrome trace JSON written by the app or acquire.py --profile")
+    parser.add_argument("other", nargs="?", help="Second trace to compare against the first")
+    args = parser.parse_args()
+
+    before = load_trace_summary(args.trace)
+    if args.other:
+        print(compare_text(before, load_trace_summary(args.other)))
+    else:
+        print(summary_text(before))
+
+
+if __name__ == "__main__":
+    main()
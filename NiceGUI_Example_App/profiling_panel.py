@@ -0,0 +1,51 @@
+from datetime import datetime
+from nicegui import ui
+from profiling import profiler
+
+
+class ProfilingPanel:
+    """Switches the shared profiler on and off, shows its per-stage summary and exports traces.
+
+    Exported files are Chrome trace JSON: open them in ui.perfetto.dev or
+    chrome://tracing, or summarize and compare them with profiling.py.
+    """
+    UPDATE_INTERVAL = 2.0  # Seconds between summary updates while profiling
+
+    def __init__(self):
+        self.setup_ui()
+
+    def setup_ui(self):
+        with ui.expansion('Profiling', icon='speed').classes('w-full'):
+            with ui.row().classes('w-full no-wrap items-center'):
+                self.enable_switch = ui.switch("Record timings", value=profiler.enabled, on_change=self.toggle)
+                ui.button("Reset", on_click=self.reset).props('flat')
+                ui.button("Export Trace", on_click=self.export).props('flat')
+            self.summary = ui.code(self.summary_text(), language=None).classes('w-full text-xs')
+            self.timer = ui.timer(self.UPDATE_INTERVAL, self.update, active=profiler.enabled)
+
+    def toggle(self, event):
+        if event.value:
+            profiler.enable()
+            self.timer.activate()
+        else:
+            profiler.disable()
+            self.timer.deactivate()
+            self.update()
+
+    def reset(self):
+        profiler.reset()
+        self.update()
+
+    def summary_text(self):
+        if not profiler.written:
+            return "No timings recorded yet." if profiler.enabled else "Profiling is off."
+        return profiler.summary_text()
+
+    def update(self):
+        self.summary.set_content(self.summary_text())
+
+    def export(self):
+        output_file = f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        events = profiler.export_chrome_trace(output_file)
+        ui.notify(f"Saved {events} trace events to {output_file}")
+        ui.download.file(output_file)
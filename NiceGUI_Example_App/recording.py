@@ -0,0 +1,275 @@
+"""Self-describing chunked recording container (.flr).
+
+Layout, all little-endian:
+
+    file header   HEADER_SIZE bytes: FILE_MAGIC, u32 JSON length, JSON metadata
+                  (geometry, dtype, fps, camera settings, chunk layout), zero padded
+    chunk k       at data_offset + k * chunk_stride:
+                    CHUNK_HEADER (magic, chunk index, frame count, first sequence number)
+                    chunk_frames index records (FrameRecord: sequence, host timestamp, status, tag)
+                    padding to ALIGNMENT
+                    chunk_frames frames of height x width uint16
+
+Every frame sits at a fixed, aligned offset, so any frame can be located in
+O(1) and each chunk's frames can be wrapped in an np.memmap. A chunk's header
+is written after its index and frames, so a chunk only becomes visible once
+complete; if the process dies mid-write, every earlier chunk stays readable.
+"""
+import ctypes
+import json
+import os
+import struct
+import time
+import numpy as np
+from timebase import FrameClock, recording_clock
+from camera_sdk import frame_tags
+
+RECORDING_SUFFIX = ".flr"
+FILE_MAGIC = b"FLIREC01"
+CHUNK_MAGIC = b"FLICHUNK"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+ALIGNMENT = 4096
+CHUNK_HEADER = struct.Struct("<8sIIQ")  # magic, chunk index, frame count, first sequence number
+CHUNK_HEADER_SIZE = 64
+
+
+class FrameRecord(ctypes.Structure):
+    """Per-frame index entry, filled in by the data callback."""
+    _fields_ = [
+        ("seq", ctypes.c_uint64),
+        ("timestamp_ns", ctypes.c_int64),  # time.monotonic_ns() when the frame arrived
+        ("status", ctypes.c_int32),
+        ("tag", ctypes.c_uint32),  # Image tag counter of the frame (camera_sdk.frame_tag), set by the writers
+    ]
+
+
+FRAME_RECORD_DTYPE = np.dtype([("seq", "<u8"), ("timestamp_ns", "<i8"), ("status", "<i4"), ("tag", "<u4")])
+
+
+def store_tags(records, data, nframes, frame_size):
+    """Copies each frame's image tag counter into its FrameRecord; returns the records as a FRAME_RECORD_DTYPE array.
+
+    Untagged frames get whatever their first pixels hold; FrameClock then sees
+    that those values do not count up and ignores them.
+    """
+    index = np.frombuffer(records, dtype=FRAME_RECORD_DTYPE, count=nframes)
+    frames = np.frombuffer(data, dtype=np.uint16, count=nframes * frame_size // 2).reshape(nframes, -1)
+    index["tag"] = frame_tags(frames)
+    return index
+
+
+def align(value, alignment=ALIGNMENT):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def chunk_layout(frame_size, chunk_frames):
+    """Returns (frames_offset, chunk_stride) for a chunk of `chunk_frames` frames."""
+    frames_offset = align(CHUNK_HEADER_SIZE + ctypes.sizeof(FrameRecord) * chunk_frames)
+    return frames_offset, align(frames_offset + frame_size * chunk_frames)
+
+
+class RecordingWriter:
+    """Writes frames and their index records into a .flr container chunk by chunk.
+
+    Also serves as a StreamWriter sink: write_chunk() takes the chunk's frame
+    bytes and FrameRecord array without copying them.
+    """
+
+    def __init__(self, output_file, width, height, fps=0.0, settings=None, chunk_frames=256):
+        self.output_file = output_file
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 2
+        self.chunk_frames = chunk_frames
+        self.frames_offset, self.chunk_stride = chunk_layout(self.frame_size, chunk_frames)
+        self.metadata = {
+            "version": FORMAT_VERSION,
+            "width": width,
+            "height": height,
+            "dtype": "uint16",
+            "fps": fps,
+            "settings": settings or {},
+            "chunk_frames": chunk_frames,
+            "frames_offset": self.frames_offset,
+            "chunk_stride": self.chunk_stride,
+            "data_offset": HEADER_SIZE,
+            "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "complete": False,
+        }
+        self.fd = None
+        self.clock = None  # timebase.FrameClock, fitted to the frames as they are written
+        self.chunks_written = 0
+        self.frames_written = 0
+
+    def open(self):
+        self.clock = FrameClock(self.metadata["fps"])
+        self.metadata["clock_anchor"] = self.clock.anchors[0]
+        self.fd = os.open(self.output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._write_header()
+
+    def _write_header(self):
+        text = json.dumps(self.metadata).encode()
+        header = FILE_MAGIC + struct.pack("<I", len(text)) + text
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Recording metadata does not fit in the file header.")
+        os.pwrite(self.fd, header.ljust(HEADER_SIZE, b"\0"), 0)
+
+    def write_chunk(self, data, records, nframes):
+        """Writes `nframes` frames from `data` with their FrameRecord entries as the next chunk."""
+        if nframes <= 0:
+            return
+        offset = HEADER_SIZE + self.chunks_written * self.chunk_stride
+        index = store_tags(records, data, nframes, self.frame_size)
+        index_bytes = memoryview(records).cast("B")[:ctypes.sizeof(FrameRecord) * nframes]
+        frame_bytes = memoryview(data).cast("B")[:self.frame_size * nframes]
+
+        # Index and frames first, header last: a chunk is only valid once fully on disk
+        os.pwrite(self.fd, index_bytes, offset + CHUNK_HEADER_SIZE)
+        os.pwrite(self.fd, frame_bytes, offset + self.frames_offset)
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, self.chunks_written, nframes, records[0].seq)
+        os.pwrite(self.fd, header.ljust(CHUNK_HEADER_SIZE, b"\0"), offset)
+        self.clock.add_records(index)
+
+        self.chunks_written += 1
+        self.frames_written += nframes
+
+    def write_buffer(self, data, records, nframes):
+        """Writes a whole in-memory acquisition buffer, split into chunks without copying."""
+        data_view = memoryview(data).cast("B")
+        record_size = ctypes.sizeof(FrameRecord)
+        for start in range(0, nframes, self.chunk_frames):
+            count = min(self.chunk_frames, nframes - start)
+            chunk_records = (FrameRecord * count).from_buffer(records, start * record_size)
+            self.write_chunk(data_view[start * self.frame_size:(start + count) * self.frame_size],
+                             chunk_records, count)
+
+    def close(self, **extra_metadata):
+        """Marks the recording complete, adding any extra metadata to the header, and closes it."""
+        if self.fd is None:
+            return
+        self.metadata.update(extra_metadata)
+        self.metadata["clock"] = self.clock.model().to_dict()
+        self.metadata["frame_count"] = self.frames_written
+        self.metadata["complete"] = True
+        self._write_header()
+        os.close(self.fd)
+        self.fd = None
+
+    def abort(self):
+        """Closes the file without marking it complete; the chunks written so far stay readable."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def is_recording(path):
+    """True if `path` starts with the .flr file magic."""
+    with open(path, "rb") as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+class RecordingReader:
+    """Random access to the frames and index of a .flr recording.
+
+    Chunks are discovered from their headers, so recordings that were never
+    closed (e.g. the process died) are readable up to the last complete chunk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"{path} is not a recording (bad magic).")
+            (length,) = struct.unpack_from("<I", header, len(FILE_MAGIC))
+            self.metadata = json.loads(header[len(FILE_MAGIC) + 4:len(FILE_MAGIC) + 4 + length])
+            self.width = self.metadata["width"]
+            self.height = self.metadata["height"]
+            self.fps = self.metadata["fps"]
+            self.settings = self.metadata["settings"]
+            self.chunk_frames = self.metadata["chunk_frames"]
+            self.frames_offset = self.metadata["frames_offset"]
+            self.chunk_stride = self.metadata["chunk_stride"]
+            self.data_offset = self.metadata["data_offset"]
+            self.frame_size = self.width * self.height * 2
+            self.chunk_counts = self._scan_chunks(f, os.fstat(f.fileno()).st_size)
+        self.frame_count = sum(self.chunk_counts)
+        self._memmaps = {}
+        self._index = None
+
+    def _scan_chunks(self, f, file_size):
+        counts = []
+        k = 0
+        while True:
+            offset = self.data_offset + k * self.chunk_stride
+            if offset + CHUNK_HEADER.size > file_size:
+                break
+            f.seek(offset)
+            magic, index, nframes, _ = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+            if magic != CHUNK_MAGIC or index != k or not 0 < nframes <= self.chunk_frames:
+                break
+            if offset + self.frames_offset + nframes * self.frame_size > file_size:
+                break
+            counts.append(nframes)
+            k += 1
+            if nframes < self.chunk_frames:
+                break  # Only the last chunk may be partial
+        return counts
+
+    @property
+    def complete(self):
+        return self.metadata.get("complete", False)
+
+    @property
+    def clock(self):
+        """timebase.ClockModel mapping frame numbers to host and wall-clock time, or None."""
+        return recording_clock(self)
+
+    def __len__(self):
+        return self.frame_count
+
+    def chunk_frames_array(self, k):
+        """Returns a read-only (n, H, W) memmap of the frames in chunk k."""
+        if k not in self._memmaps:
+            offset = self.data_offset + k * self.chunk_stride + self.frames_offset
+            self._memmaps[k] = np.memmap(self.path, dtype=np.uint16, mode="r", offset=offset,
+                                         shape=(self.chunk_counts[k], self.height, self.width))
+        return self._memmaps[k]
+
+    def chunk_index(self, k):
+        """Returns the FrameRecord entries of chunk k as a structured array."""
+        offset = self.data_offset + k * self.chunk_stride + CHUNK_HEADER_SIZE
+        return np.fromfile(self.path, dtype=FRAME_RECORD_DTYPE, count=self.chunk_counts[k], offset=offset)
+
+    @property
+    def index(self):
+        """Structured array (seq, timestamp_ns, status, tag) for every frame."""
+        if self._index is None:
+            parts = [self.chunk_index(k) for k in range(len(self.chunk_counts))]
+            self._index = np.concatenate(parts) if parts else np.zeros(0, dtype=FRAME_RECORD_DTYPE)
+        return self._index
+
+    def frame(self, i):
+        """Returns frame i as a memmap view, located in O(1)."""
+        if not 0 <= i < self.frame_count:
+            raise IndexError(f"Frame {i} out of range (0-{self.frame_count - 1})")
+        return self.chunk_frames_array(i // self.chunk_frames)[i % self.chunk_frames]
+
+    def read(self, start, stop, step=1):
+        """Returns frames start:stop:step as one (n, H, W) array, copying only those frames."""
+        if step <= 0:
+            raise ValueError("step must be positive")
+        start, stop, step = slice(start, stop, step).indices(self.frame_count)
+        wanted = range(start, stop, step)
+        out = np.empty((len(wanted), self.height, self.width), dtype=np.uint16)
+        for k in range(len(self.chunk_counts)):
+            first = k * self.chunk_frames
+            last = first + self.chunk_counts[k]
+            # Positions in `wanted` that fall inside this chunk
+            lo = max(0, -(-(first - start) // step)) if step > 0 else 0
+            hi = min(len(wanted), -(-(last - start) // step))
+            if lo < hi:
+                chunk = self.chunk_frames_array(k)
+                out[lo:hi] = chunk[wanted[lo] - first:wanted[hi - 1] - first + 1:step]
+        return out
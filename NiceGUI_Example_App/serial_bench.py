@@ -0,0 +1,140 @@
+"""Latency and throughput of the fli-cli serial readers.
+
+Sends the same command mix through each reader and prints per-command
+latency percentiles and commands per second:
+
+- readline: the line-by-line loop serialCOM.py used to have. The prompt has
+  no newline, so every command waits for the port's read timeout.
+- bytes: read_until_prompt(), the blocking byte-level reader.
+- link: SerialLink.send(), one command awaited at a time.
+- link-pipelined: SerialLink.send_many(), the command mix written at once
+  and the replies split at the prompts, as the settings refresh does. Each
+  command's latency is that of its whole batch.
+
+Runs against a FliCliEmulator by default, so it needs no camera; pass
+--port to measure the real console instead.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+import serial
+from fli_cli_sim import FliCliEmulator
+from serial_link import SerialLink, read_until_prompt, clean_response, BAUD_RATE
+
+MODES = ("readline", "bytes", "link", "link-pipelined")
+DEFAULT_COMMANDS = ("cropping raw", "fps raw", "tint raw")
+LEGACY_TIMEOUT = 1  # Read timeout serialCOM.py used
+
+
+def open_port(port, baudrate, timeout):
+    return serial.Serial(port=port, baudrate=baudrate, timeout=timeout, xonxoff=False, rtscts=False, dsrdtr=False)
+
+
+def legacy_query(ser, command):
+    """The former serialCOM.py loop: readline() until a line ends with the prompt."""
+    ser.write((command + '\r\n').encode())
+    full_response = ""
+    while True:
+        line = ser.readline().decode().strip()
+        if line and "fli-cli>" not in line:
+            full_response += line + " "
+        if line.endswith("fli-cli>"):
+            break
+        if not line:
+            raise TimeoutError("No response")  # The old loop would spin here forever
+    return full_response.strip()
+
+
+def run_blocking(port, baudrate, commands, query, timeout):
+    """Returns (latencies in s, responses, total seconds) of `query` over a fresh port."""
+    ser = open_port(port, baudrate, timeout)
+    latencies = []
+    responses = []
+    try:
+        ser.reset_input_buffer()
+        start = time.perf_counter()
+        for command in commands:
+            sent = time.perf_counter()
+            responses.append(query(ser, command))
+            latencies.append(time.perf_counter() - sent)
+        total = time.perf_counter() - start
+    finally:
+        ser.close()
+    return latencies, responses, total
+
+
+def bytes_query(ser, command):
+    ser.write((command + '\r\n').encode())
+    return clean_response(read_until_prompt(ser))
+
+
+async def run_link(port, baudrate, commands, batch=1):
+    link = SerialLink(port, baudrate)
+    await link.open()
+    latencies = []
+    responses = []
+    try:
+        start = time.perf_counter()
+        for first in range(0, len(commands), batch):
+            sent = time.perf_counter()
+            replies = await link.send_many(commands[first:first + batch])
+            latencies += [time.perf_counter() - sent] * len(replies)
+            responses += replies
+        total = time.perf_counter() - start
+    finally:
+        await link.close()
+    return latencies, responses, total
+
+
+def report(mode, latencies, responses, total):
+    ms = np.array(latencies) * 1e3
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    empty = sum(1 for response in responses if not response)
+    print(f"{mode:14s} {len(ms):6d} {len(ms) / total:10.1f} {p50:8.2f} {p90:8.2f} {p99:8.2f} {ms.max():8.2f} {empty:6d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fli-cli serial readers against an emulator or a camera.")
+    parser.add_argument("--port", help="Serial port of a real camera (default: start a pty emulator)")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE, help=f"Baud rate (default: {BAUD_RATE})")
+    parser.add_argument("--count", type=int, default=300, help="Commands per reader (default: 300)")
+    parser.add_argument("--legacy-count", type=int, default=5,
+                        help="Commands for the readline reader, which takes about 1 s each (default: 5)")
+    parser.add_argument("--commands", default=",".join(DEFAULT_COMMANDS),
+                        help=f"Comma-separated command mix (default: {','.join(DEFAULT_COMMANDS)})")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Readers to run (default: {','.join(MODES)})")
+    args = parser.parse_args()
+
+    emulator = None
+    port = args.port
+    if port is None:
+        emulator = FliCliEmulator(args.baud)
+        port = emulator.start()
+        print(f"Using the fli-cli emulator on {port}")
+    mix = [command.strip() for command in args.commands.split(",") if command.strip()]
+
+    print(f"{'reader':14s} {'cmds':>6s} {'cmds/s':>10s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} "
+          f"{'max ms':>8s} {'empty':>6s}")
+    try:
+        for mode in args.modes.split(","):
+            count = args.legacy_count if mode == "readline" else args.count
+            commands = [mix[i % len(mix)] for i in range(count)]
+            if mode == "readline":
+                results = run_blocking(port, args.baud, commands, legacy_query, LEGACY_TIMEOUT)
+            elif mode == "bytes":
+                results = run_blocking(port, args.baud, commands, bytes_query, 0.1)
+            elif mode == "link":
+                results = asyncio.run(run_link(port, args.baud, commands))
+            elif mode == "link-pipelined":
+                results = asyncio.run(run_link(port, args.baud, commands, len(mix)))
+            else:
+                parser.error(f"Unknown reader '{mode}', choose from {', '.join(MODES)}")
+            report(mode, *results)
+    finally:
+        if emulator is not None:
+            emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
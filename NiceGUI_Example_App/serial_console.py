@@ -1,16 +1,23 @@
 from nicegui import ui
+import asyncio
 import serial
 import time
 import re
+from serial_link import SerialLink, DEFAULT_PORT
+from camera_settings import CameraSettings
+from profiling import profiler
 
 class SerialConsole:
-    def __init__(self):
-        self.ser = None
+    def __init__(self, port=DEFAULT_PORT):
+        self.port = port
+        self.link = None
         self.connected = False
         self.last_response = ""
         self.width = 640   # Default width
         self.height = 512  # Default height
         self.fps = 30.0    # Default FPS
+        self.settings = {}  # Raw responses of the last settings queries, stored with recordings
+        self.camera_settings = CameraSettings()  # Decides which of those need asking again
         self.setup_ui()
 
     def setup_ui(self):
@@ -24,92 +31,130 @@ class SerialConsole:
         timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
         self.log.push(f"[{timestamp}] {message}")
 
-    def toggle_connection(self):
+    async def toggle_connection(self):
         if self.connected:
-            self.disconnect_serial()
+            await self.disconnect_serial()
         else:
-            self.connect_serial()
+            await self.connect_serial()
 
-    def connect_serial(self):
+    async def connect_serial(self):
         try:
-            self.ser = serial.Serial(
-                port='/dev/ttyACM0',  # Replace with your actual serial port if different
-                baudrate=115200,
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                timeout=1,
-                xonxoff=False,
-                rtscts=False,
-                dsrdtr=False
-            )
-            if self.ser.is_open:
-                self.connected = True
-                self.log_message(f"Connected to {self.ser.port} at {self.ser.baudrate} baud.")
-                self.connect_button.set_text('Disconnect Serial')
+            self.link = SerialLink(self.port, on_unsolicited=lambda text: self.log_message(f"Unsolicited: {text}"))
+            await self.link.open()
+            self.connected = True
+            self.log_message(f"Connected to {self.link.port} at {self.link.baudrate} baud.")
+            self.connect_button.set_text('Disconnect Serial')
+            # A different head may be plugged in now; warm the cache in the background
+            self.camera_settings.invalidate()
+            asyncio.create_task(self.query_camera_settings())
         except serial.SerialException as e:
+            self.link = None
             self.log_message(f"Serial error: {e}")
 
-    def disconnect_serial(self):
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+    async def disconnect_serial(self):
+        if self.link:
+            await self.link.close()
+            self.link = None
             self.connected = False
+            self.camera_settings.invalidate()
             self.log_message("Serial connection closed.")
             self.connect_button.set_text('Connect Serial')
 
-    def send_command(self, event=None):
-        """Send a command to the serial device and log the response."""
-        if not self.connected:
-            self.log_message("Serial is not connected.")
-            return
-
+    async def send_command(self, event=None):
+        """Sends the command typed in the console input and logs the response."""
         command = self.command_input.value.strip()
+        # Clear input field right away, the response arrives asynchronously
+        self.command_input.value = ''
         if not command:
             self.log_message("Please enter a command.")
             return
         if command.lower() == 'exit':
-            self.disconnect_serial()
+            await self.disconnect_serial()
             return
+        await self.execute(command)
 
-        try:
-            # Send the command
-            self.ser.write((command + '\r\n').encode())
-            self.log_message(f"Sent: {command}")
-
-            # Read the response
-            full_response = ""
-            while True:
-                line = self.ser.readline().decode().strip()
-                if line:
-                    full_response += line + " "
-                if "fli-cli>" in line:  # Stop reading after detecting prompt
-                    break
-
-            # Clean up the response by removing duplicate prompts
-            cleaned_response = re.sub(r"(fli-cli>\s*)+", "fli-cli>", full_response).replace("fli-cli>", "").strip()
-            self.last_response = cleaned_response
-            self.log_message(f"Received: {self.last_response}")
+    async def execute(self, command, timeout=None):
+        """Sends a command without blocking the event loop; returns the response, or None on error."""
+        if not self.connected:
+            self.log_message("Serial is not connected.")
+            return None
 
+        self.log_message(f"Sent: {command}")
+        profiler.count("serial.commands")
+        try:
+            with profiler.span("serial.round_trip"):
+                response = await self.link.send(command, timeout)
         except Exception as e:
-            self.log_message(f"Error sending command: {e}")
-        finally:
-            # Clear input field after sending to reset for next input
-            self.command_input.value = ''
+            profiler.count("serial.errors")
+            self.log_message(f"Error sending command '{command}': {e}")
+            return None
+        self.note_response(command, response)
+        return response
+
+    async def execute_many(self, commands, timeout=None):
+        """Sends commands pipelined (see SerialLink.send_many); returns their responses, or None on error."""
+        if not self.connected:
+            self.log_message("Serial is not connected.")
+            return None
 
-    def query_camera_settings(self):
-        """Queries the camera to update width, height, and fps."""
-        self.send_command_with_callback("cropping raw", self.update_dimensions)
-        self.send_command_with_callback("fps raw", self.update_fps)
+        self.log_message(f"Sent: {'; '.join(commands)}")
+        profiler.count("serial.commands", len(commands))
+        try:
+            with profiler.span("serial.round_trip"):
+                responses = await self.link.send_many(commands, timeout)
+        except Exception as e:
+            profiler.count("serial.errors")
+            self.log_message(f"Error sending commands '{'; '.join(commands)}': {e}")
+            return None
+        for command, response in zip(commands, responses):
+            self.note_response(command, response)
+        return responses
+
+    def note_response(self, command, response):
+        self.last_response = response
+        self.log_message(f"Received: {response}")
+
+        # Typed queries refresh the cache too, typed `set` commands invalidate it
+        name = self.camera_settings.note_command(command, response)
+        if name is not None:
+            self.apply_setting(name, response)
+
+    async def query_camera_settings(self, force=False):
+        """Updates width, height, and fps, only querying the settings whose cached value is stale.
+
+        With a warm cache this costs no serial round-trips. Otherwise all stale
+        queries are pipelined: written together, with the replies split at the
+        prompts, so the camera never waits for the host between them.
+        """
+        if force:
+            self.camera_settings.invalidate()
+        stale = self.camera_settings.stale_names()
+        if not stale:
+            profiler.count("serial.settings_cache_hits")
+            return
+        with profiler.span("serial.query_settings"):
+            await self.execute_many([self.camera_settings.queries[name] for name in stale])
+
+    def apply_setting(self, name, response):
+        """Updates the console's view of one setting from its raw response."""
+        if name == "cropping":
+            self.update_dimensions(response)
+        elif name == "fps":
+            self.update_fps(response)
+        else:
+            self.settings[name] = response
 
-    def send_command_with_callback(self, command, callback):
+    async def send_command_with_callback(self, command, callback):
         """Helper to send a command and execute a callback on the response."""
-        self.command_input.value = command
-        self.send_command()
-        callback()
+        response = await self.execute(command)
+        if response is not None:
+            callback(response)
 
-    def update_dimensions(self):
-        """Update width and height based on the last response and cropping state."""
-        response = self.last_response
+    def update_dimensions(self, response=None):
+        """Update width and height based on a cropping response (the last one by default)."""
+        if response is None:
+            response = self.last_response
+        self.settings["cropping"] = response
 
         # Check if cropping is on or off
         if response.startswith("on"):
@@ -131,9 +176,11 @@ class SerialConsole:
             # In case of an unexpected response format
             self.log_message("Unexpected response format. Unable to determine cropping state.")
 
-    def update_fps(self):
-        """Update FPS based on last response."""
-        response = self.last_response
+    def update_fps(self, response=None):
+        """Update FPS based on an fps response (the last one by default)."""
+        if response is None:
+            response = self.last_response
+        self.settings["fps"] = response
         match = re.search(r"([\d.]+)", response)
         if match:
             self.fps = float(match.group(1))
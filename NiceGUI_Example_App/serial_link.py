@@ -0,0 +1,214 @@
+import asyncio
+import re
+import threading
+import time
+import serial
+
+PROMPT = b"fli-cli>"
+DEFAULT_PORT = '/dev/ttyACM0'
+BAUD_RATE = 115200
+
+
+def clean_response(raw):
+    """Turns the bytes before the prompt into a one-line response, like the console always showed."""
+    text = raw.decode(errors="replace")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return re.sub(r"(fli-cli>\s*)+", "", " ".join(lines)).strip()
+
+
+def read_until_prompt(ser, timeout=2.0):
+    """Blocking read of everything up to the fli-cli> prompt; returns the bytes before it.
+
+    Reads whatever bytes are waiting rather than lines, so it returns as soon
+    as the prompt arrives even though the camera does not end it with a
+    newline. Raises TimeoutError if there is no prompt within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    buffer = bytearray()
+    while True:
+        searched = max(len(buffer) - len(PROMPT) + 1, 0)
+        data = ser.read(ser.in_waiting or 1)
+        buffer += data
+        end = buffer.find(PROMPT, searched)
+        if end >= 0:
+            return bytes(buffer[:end])
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No fli-cli> prompt within {timeout:.1f} s")
+
+
+def query(port, command, baudrate=BAUD_RATE, timeout=2.0):
+    """Blocking one-off command for scripts: opens `port`, sends `command` and returns its cleaned response.
+
+    Raises serial.SerialException if the port cannot be opened and
+    TimeoutError if no prompt comes back within `timeout` seconds.
+    """
+    with serial.Serial(port=port, baudrate=baudrate, timeout=0.05) as ser:
+        ser.reset_input_buffer()
+        ser.write((command + '\r\n').encode())
+        return clean_response(read_until_prompt(ser, timeout))
+
+
+class SerialLink:
+    """Non-blocking access to the camera's fli-cli serial console from asyncio.
+
+    A reader thread (pyserial itself is blocking) forwards incoming bytes to the
+    event loop. Requests go through a queue and a single worker task that sends
+    one at a time and completes its future as soon as the fli-cli> prompt
+    arrives, or fails it with TimeoutError after the per-command timeout.
+
+    send_many() pipelines: it writes all its commands in one go, so the camera
+    finds the next command waiting as soon as it prints a prompt, and splits
+    the replies at the prompts, in order.
+
+    Replies that arrive after their command timed out (including the rest of a
+    pipelined request) are dropped before the next request is sent, so they
+    cannot complete the wrong command. close() fails the request in flight and
+    everything still queued with ConnectionError.
+    """
+
+    def __init__(self, port=DEFAULT_PORT, baudrate=BAUD_RATE, timeout=2.0, on_unsolicited=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.on_unsolicited = on_unsolicited
+        self.ser = None
+        self.loop = None
+        self.queue = None
+        self.worker = None
+        self.reader = None
+        self.running = False
+        self.buffer = bytearray()
+        self.prompt_seen = None
+        self.current = None  # Future of the request waiting for its prompts
+        self.late_replies = 0  # Replies still owed to a request that timed out
+        self.late_timeout = 0.0  # Its per-command timeout
+
+    @property
+    def is_open(self):
+        return self.ser is not None and self.ser.is_open
+
+    async def open(self):
+        """Opens the port and starts the reader thread and command worker."""
+        self.loop = asyncio.get_running_loop()
+        self.ser = await self.loop.run_in_executor(None, lambda: serial.Serial(
+            port=self.port,
+            baudrate=self.baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=0.05,  # Only bounds how long the reader thread takes to notice close()
+            xonxoff=False,
+            rtscts=False,
+            dsrdtr=False
+        ))
+        self.queue = asyncio.Queue()
+        self.prompt_seen = asyncio.Event()
+        self.running = True
+        self.reader = threading.Thread(target=self._reader_loop, name=f"SerialReader {self.port}", daemon=True)
+        self.reader.start()
+        self.worker = asyncio.create_task(self._command_worker())
+
+    async def close(self):
+        """Stops the worker, fails the command in flight and the queued ones, and closes the port."""
+        self.running = False
+        if self.worker:
+            self.worker.cancel()
+            self.worker = None
+        pending = [self.current] if self.current else []
+        self.current = None
+        while self.queue and not self.queue.empty():
+            pending.append(self.queue.get_nowait()[2])
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Serial connection closed."))
+        if self.reader:
+            await self.loop.run_in_executor(None, self.reader.join)
+            self.reader = None
+        if self.ser:
+            self.ser.close()
+            self.ser = None
+
+    def _reader_loop(self):
+        while self.running:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                break  # Port closed or device unplugged
+            if data:
+                self.loop.call_soon_threadsafe(self._on_data, data)
+
+    def _on_data(self, data):
+        searched = max(len(self.buffer) - len(PROMPT) + 1, 0)  # Only look where the prompt can newly appear
+        self.buffer += data
+        if self.buffer.find(PROMPT, searched) >= 0:
+            self.prompt_seen.set()
+
+    async def send(self, command, timeout=None):
+        """Sends a command and returns its cleaned response once the prompt arrives."""
+        return (await self.send_many([command], timeout))[0]
+
+    async def send_many(self, commands, timeout=None):
+        """Sends commands back to back without waiting for each prompt; returns their responses in order.
+
+        `timeout` applies to each reply. If one is late the whole request
+        fails with TimeoutError.
+        """
+        if not self.is_open:
+            raise ConnectionError("Serial is not connected.")
+        future = self.loop.create_future()
+        await self.queue.put((list(commands), timeout or self.timeout, future))
+        return await future
+
+    async def _command_worker(self):
+        while True:
+            commands, timeout, future = await self.queue.get()
+            if future.done():
+                continue  # Caller gave up while queued
+            if self.late_replies:
+                await self._drain_late_replies()
+            # Anything received since the last prompt was not asked for
+            if self.buffer.strip() and self.on_unsolicited:
+                self.on_unsolicited(clean_response(self.buffer))
+            self.buffer.clear()
+            self.prompt_seen.clear()
+            self.current = future
+            responses = []
+            try:
+                self.ser.write("".join(command + '\r\n' for command in commands).encode())
+                for _ in commands:
+                    responses.append(await self._next_reply(timeout))
+            except asyncio.TimeoutError:
+                self.late_replies = len(commands) - len(responses)
+                self.late_timeout = timeout
+                if not future.done():
+                    future.set_exception(TimeoutError(
+                        f"No fli-cli> prompt {timeout:.1f} s after '{commands[len(responses)]}'"))
+                continue
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            finally:
+                self.current = None
+            if not future.done():
+                future.set_result(responses)
+
+    async def _next_reply(self, timeout):
+        """Waits up to `timeout` for the next prompt; removes the reply before it from the buffer and returns it."""
+        end = self.buffer.find(PROMPT)
+        if end < 0:
+            self.prompt_seen.clear()
+            await asyncio.wait_for(self.prompt_seen.wait(), timeout)
+            end = self.buffer.find(PROMPT)
+        response = clean_response(self.buffer[:end])
+        del self.buffer[:end + len(PROMPT)]
+        return response
+
+    async def _drain_late_replies(self):
+        """Gives each reply the timed-out request still owes as long again to arrive, and drops it."""
+        count, self.late_replies = self.late_replies, 0
+        try:
+            for _ in range(count):
+                await self._next_reply(self.late_timeout)
+        except asyncio.TimeoutError:
+            return  # Lost for good, nothing more to drop
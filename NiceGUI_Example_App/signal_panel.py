@@ -0,0 +1,92 @@
+import base64
+import cv2
+import numpy as np
+from nicegui import ui
+from signal_stats import SignalMonitor
+from display_lut import colormap_palette
+
+
+class SignalPanel:
+    """Live signal statistics next to the camera viewer: levels, saturation, histogram and temporal noise.
+
+    A SignalMonitor samples the acquisition ring in a background thread; the
+    panel only reads its snapshot every UPDATE_INTERVAL seconds, so neither the
+    acquisition nor the preview are slowed by the UI.
+    """
+    UPDATE_INTERVAL = 1.0  # Seconds between UI updates
+    TREND_POINTS = 200  # Samples shown in the trend plot
+
+    def __init__(self, camera, sample_fps=25.0):
+        self.camera = camera
+        self.monitor = SignalMonitor(camera, sample_fps)
+        self.palette = colormap_palette("Inferno")
+        self.setup_ui()
+
+    def setup_ui(self):
+        with ui.expansion('Signal Statistics', icon='insights').classes('w-full'):
+            self.enable_switch = ui.switch("Live statistics", on_change=self.toggle)
+            self.summary_label = ui.label("Start the viewer, then enable live statistics.").classes('text-sm')
+            self.histogram_chart = ui.echart({
+                'title': {'text': 'Histogram (14-bit)', 'textStyle': {'fontSize': 12}},
+                'grid': {'left': 50, 'right': 10, 'top': 30, 'bottom': 25},
+                'xAxis': {'type': 'value', 'min': 0, 'max': 16384},
+                'yAxis': {'type': 'log', 'min': 1},
+                'series': [{'type': 'bar', 'data': [], 'barWidth': '100%', 'large': True}],
+                'animation': False,
+            }).classes('w-full h-48')
+            self.trend_chart = ui.echart({
+                'title': {'text': 'Mean / min / max', 'textStyle': {'fontSize': 12}},
+                'legend': {'right': 0},
+                'tooltip': {'trigger': 'axis'},
+                'grid': {'left': 50, 'right': 10, 'top': 30, 'bottom': 25},
+                'xAxis': {'type': 'value', 'scale': True},
+                'yAxis': {'type': 'value', 'scale': True},
+                'series': [{'name': name, 'type': 'line', 'showSymbol': False, 'data': []}
+                           for name in ('mean', 'min', 'max')],
+                'animation': False,
+            }).classes('w-full h-48')
+            ui.label("Temporal noise (per-pixel standard deviation)").classes('text-xs text-gray-500')
+            self.noise_image = ui.image().props('no-transition no-spinner fit=contain').classes('w-full')
+            self.noise_label = ui.label().classes('text-xs text-gray-500')
+            self.timer = ui.timer(self.UPDATE_INTERVAL, self.update, active=False)
+
+    def toggle(self, event):
+        if event.value:
+            self.monitor.start()
+            self.timer.activate()
+        else:
+            self.timer.deactivate()
+            self.monitor.stop()
+
+    def update(self):
+        snapshot = self.monitor.snapshot()
+        if snapshot is None:
+            return
+        latest = snapshot["latest"]
+        saturated = latest["saturated"]
+        self.summary_label.text = (f"Frame {latest['seq']}: mean {latest['mean']:.1f}, min {latest['min']}, "
+                                   f"max {latest['max']}, " + (f"{saturated} saturated pixels" if saturated
+                                                               else "no saturation"))
+        self.summary_label.classes(replace='text-sm text-red-600' if saturated else 'text-sm')
+
+        bin_width = snapshot["bin_width"]
+        histogram = snapshot["histogram"]
+        bins = np.flatnonzero(histogram)
+        self.histogram_chart.options['series'][0]['data'] = [[int(b) * bin_width, int(histogram[b])] for b in bins]
+        self.histogram_chart.update()
+
+        history = snapshot["history"][-self.TREND_POINTS:]
+        seqs = history["seq"].tolist()
+        for series in self.trend_chart.options['series']:
+            series['data'] = list(zip(seqs, history[series['name']].tolist()))
+        self.trend_chart.update()
+
+        noise = snapshot["noise_map"]
+        high = max(float(np.percentile(noise, 99.5)), 1e-3)
+        scaled = np.clip(noise * (255 / high), 0, 255).astype(np.uint8)
+        ok, jpeg = cv2.imencode(".jpg", self.palette[scaled], [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if ok:
+            self.noise_image.set_source("data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode())
+        self.noise_label.text = (f"Median {snapshot['median_noise']:.2f} DN, scale 0-{high:.1f} DN, "
+                                 f"every {snapshot['pixel_step']} pixel(s), {snapshot['noise_samples']} samples; "
+                                 f"{snapshot['us_per_sample']:.0f} us per sample")
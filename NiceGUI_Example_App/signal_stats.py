@@ -0,0 +1,207 @@
+"""Live signal statistics computed on samples of the acquisition ring.
+
+A SignalMonitor worker thread wakes `sample_fps` times a second, copies the
+newest frame from the source (Camera, ReplaySource, RemoteCamera: anything
+with get_latest_frame and get_frames_since) into a preallocated buffer and
+updates, in place:
+
+- mean, min, max and saturated pixel count of that frame (the two image tag
+  pixels are left out), kept for the last HISTORY samples,
+- a 14-bit histogram with HISTOGRAM_BINS bins, accumulated until the next
+  snapshot(),
+- a rolling temporal-noise map: per-pixel exponentially weighted mean and
+  variance over about `noise_window` samples.
+
+Histogram and noise map use a strided view of the frame (at most
+`max_pixels` pixels), so their cost does not grow with the sensor size.
+The acquisition callback is never involved: the worker only reads the ring,
+and a sample that was overwritten while being copied is skipped.
+"""
+import argparse
+import math
+import threading
+import time
+import numpy as np
+from display_lut import PIXEL_LEVELS
+from camera_sdk import TAG_PIXELS
+
+HISTORY = 600  # Samples of per-frame statistics kept for the trend plot
+HISTOGRAM_BINS = 256
+SATURATION = PIXEL_LEVELS - 1
+
+
+class SignalMonitor:
+    """Background worker computing live statistics on sampled frames; see the module docstring."""
+
+    def __init__(self, source, sample_fps=25.0, noise_window=50, max_pixels=1 << 16, saturation=SATURATION):
+        self.source = source
+        self.sample_fps = sample_fps
+        self.noise_window = noise_window
+        self.max_pixels = max_pixels
+        self.saturation = saturation
+        self.shape = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()  # Held while updating, so snapshot() sees one sample's results
+        self.samples = 0
+        self.sample_ns = 0
+        self.last_seq = -1
+
+    def _allocate(self, height, width):
+        """Preallocates every buffer for one frame geometry."""
+        self.shape = (height, width)
+        self.step = max(1, math.ceil(math.sqrt(height * width / self.max_pixels)))
+        sampled = (len(range(0, height, self.step)), len(range(0, width, self.step)))
+        self.raw = np.empty((1, height, width), dtype=np.uint16)
+        self.pixels = self.raw.reshape(-1)[TAG_PIXELS:]  # View without the tag
+        self.saturated_mask = np.empty(self.pixels.shape, dtype=bool)
+        self.binned = np.empty(sampled, dtype=np.uint16)
+        self.delta = np.empty(sampled, dtype=np.float32)
+        self.scaled = np.empty(sampled, dtype=np.float32)
+        self.noise_mean = np.zeros(sampled, dtype=np.float32)
+        self.noise_var = np.zeros(sampled, dtype=np.float32)
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self.history = np.zeros(HISTORY, dtype=[("seq", np.int64), ("mean", np.float32), ("min", np.uint16),
+                                                ("max", np.uint16), ("saturated", np.int64)])
+        self.reset()
+
+    def reset(self):
+        """Clears the history, histogram and noise map."""
+        with self.lock:
+            self.samples = 0
+            self.sample_ns = 0
+            self.noise_samples = 0
+            self.histogram[:] = 0
+            self.history[:] = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._worker_loop, name="SignalMonitor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def _worker_loop(self):
+        interval = 1.0 / self.sample_fps
+        next_time = time.monotonic()
+        while not self.stop_event.is_set():
+            self.sample()
+            next_time = max(next_time + interval, time.monotonic())
+            self.stop_event.wait(next_time - time.monotonic())
+
+    def sample(self):
+        """Takes the newest frame from the source and updates the statistics; False if there was none."""
+        frame, seq, _ = self.source.get_latest_frame(copy=False)
+        if frame is None or seq == self.last_seq:
+            return False
+        if frame.shape != self.shape:
+            self._allocate(*frame.shape)
+        elif seq < self.last_seq:
+            self.reset()  # A new acquisition restarted the frame numbers
+        # Safe copy into the preallocated buffer; empty if the slot was overwritten meanwhile
+        frames, first, _ = self.source.get_frames_since(seq - 1, 1, out=self.raw)
+        if len(frames) == 0 or first != seq:
+            return False
+        self.last_seq = seq
+        start = time.perf_counter_ns()
+        with self.lock:
+            self._update(seq)
+            self.sample_ns += time.perf_counter_ns() - start
+        return True
+
+    def _update(self, seq):
+        pixels = self.pixels
+        row = self.history[self.samples % HISTORY]
+        row["seq"] = seq
+        row["mean"] = pixels.mean(dtype=np.float64)
+        row["min"] = pixels.min()
+        row["max"] = pixels.max()
+        np.greater_equal(pixels, self.saturation, out=self.saturated_mask)
+        row["saturated"] = np.count_nonzero(self.saturated_mask)
+
+        sampled = self.raw[0, ::self.step, ::self.step]
+        np.right_shift(sampled, 14 - int(math.log2(HISTOGRAM_BINS)), out=self.binned)
+        np.minimum(self.binned, HISTOGRAM_BINS - 1, out=self.binned)
+        self.histogram += np.bincount(self.binned.reshape(-1), minlength=HISTOGRAM_BINS)
+
+        # Exponentially weighted per-pixel mean and variance; the first samples use a shorter window
+        self.noise_samples += 1
+        alpha = 1.0 / min(self.noise_samples, self.noise_window)
+        delta = np.subtract(sampled, self.noise_mean, out=self.delta)
+        scaled = np.multiply(delta, alpha, out=self.scaled)
+        self.noise_mean += scaled
+        np.multiply(scaled, delta, out=scaled)
+        self.noise_var += scaled
+        self.noise_var *= 1.0 - alpha
+        self.samples += 1
+
+    def snapshot(self, reset_histogram=True):
+        """Returns copies of the latest results for display, and starts a new histogram period."""
+        with self.lock:
+            if not self.samples:
+                return None
+            count = min(self.samples, HISTORY)
+            order = (np.arange(self.samples - count, self.samples)) % HISTORY
+            snapshot = {
+                "latest": {name: self.history[(self.samples - 1) % HISTORY][name].item()
+                           for name in self.history.dtype.names},
+                "history": self.history[order],
+                "histogram": self.histogram.copy(),
+                "bin_width": PIXEL_LEVELS // HISTOGRAM_BINS,
+                "noise_map": np.sqrt(self.noise_var),
+                "noise_samples": self.noise_samples,
+                "pixel_step": self.step,
+                "samples": self.samples,
+                "us_per_sample": self.sample_ns / self.samples / 1e3,
+            }
+            if reset_histogram:
+                self.histogram[:] = 0
+        snapshot["noise_map"][0, :-(-TAG_PIXELS // self.step)] = 0  # The tag counter changes every frame
+        snapshot["median_noise"] = float(np.median(snapshot["noise_map"]))
+        return snapshot
+
+    def summary(self, snapshot=None):
+        """One-line text of a snapshot (or a new one)."""
+        snapshot = snapshot or self.snapshot(reset_histogram=False)
+        if snapshot is None:
+            return "no frames sampled yet"
+        latest = snapshot["latest"]
+        return (f"frame {latest['seq']}: mean {latest['mean']:.1f}, min {latest['min']}, max {latest['max']}, "
+                f"{latest['saturated']} saturated; temporal noise median {snapshot['median_noise']:.2f} DN "
+                f"over {min(snapshot['noise_samples'], self.noise_window)} samples; "
+                f"{snapshot['us_per_sample']:.0f} us/sample")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print live signal statistics of the camera and their cost.")
+    parser.add_argument("-W", "--width", type=int, default=640, help="Frame width (default: 640)")
+    parser.add_argument("-H", "--height", type=int, default=512, help="Frame height (default: 512)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long to run (default: 5)")
+    parser.add_argument("--sample-fps", type=float, default=25.0, help="Frames sampled per second (default: 25)")
+    args = parser.parse_args()
+
+    from camera import Camera
+    camera = Camera()
+    camera.configure_acquisition(args.width, args.height)
+    camera.initialize_camera_context()
+    monitor = SignalMonitor(camera, args.sample_fps)
+    camera.start_acquisition("viewer")
+    monitor.start()
+    try:
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            time.sleep(1)
+            print(f"{camera.stats.summary()} | {monitor.summary()}")
+    except KeyboardInterrupt:
+        pass
+    monitor.stop()
+    camera.stop_acquisition()
+    camera.close_camera_context()
+
+
+if __name__ == "__main__":
+    main()
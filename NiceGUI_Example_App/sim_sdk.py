@@ -0,0 +1,255 @@
+"""Software stand-in for the FLI USB SDK, used for benchmarking without a camera.
+
+SimulatedFliUsb implements the same fli_usb_* functions the real shared library
+exposes. Each opened camera runs a producer thread that calls the registered
+CFUNCTYPE data callback at a target frame rate with synthetic 14-bit frames,
+and can inject dropped frames and error statuses.
+
+When tagging is enabled, the simulator stores a 32-bit frame counter in the
+first pixels of each frame, in the tag layout camera_sdk.frame_tag() reads.
+"""
+import array
+import ctypes
+import math
+import random
+import threading
+import time
+from camera_sdk import FLI_USB_ERROR_LEVEL_INFO, FLI_USB_ERROR_LEVEL_WARNING
+
+SIM_STATUS_OK = 0
+SIM_STATUS_ERROR = 1
+
+MAX_PIXEL_VALUE = 0x3FFF  # 14-bit sensor
+
+
+def make_synthetic_frames(width, height, count, seed=0):
+    """Builds `count` 14-bit frames: a gradient background, noise and a moving spot."""
+    rng = random.Random(seed)
+    background = [1000 + (x * 4000) // max(width - 1, 1) for x in range(width)]
+    frames = []
+    for n in range(count):
+        pixels = array.array("H", bytes(width * height * 2))
+        for y in range(height):
+            row_offset = (y * 2000) // max(height - 1, 1)
+            start = y * width
+            pixels[start:start + width] = array.array(
+                "H", (b + row_offset + rng.randrange(64) for b in background))
+
+        # Gaussian spot travelling on a circle so consecutive frames differ
+        angle = 2 * math.pi * n / count
+        cx = width / 2 + width / 4 * math.cos(angle)
+        cy = height / 2 + height / 4 * math.sin(angle)
+        sigma = max(min(width, height) / 16, 1.0)
+        radius = int(3 * sigma)
+        for y in range(max(int(cy) - radius, 0), min(int(cy) + radius + 1, height)):
+            for x in range(max(int(cx) - radius, 0), min(int(cx) + radius + 1, width)):
+                r2 = (x - cx) ** 2 + (y - cy) ** 2
+                value = pixels[y * width + x] + int(9000 * math.exp(-r2 / (2 * sigma * sigma)))
+                pixels[y * width + x] = min(value, MAX_PIXEL_VALUE)
+        frames.append(pixels)
+    return frames
+
+
+def _as_address(value):
+    """Converts a cam_ctx or userctx argument into a plain integer address."""
+    if value is None:
+        return None
+    if isinstance(value, ctypes.py_object):
+        return id(value.value)
+    if isinstance(value, ctypes.c_void_p):
+        return value.value
+    return int(value)
+
+
+class SimulatedCamera:
+    """One simulated camera head with its own producer thread."""
+
+    def __init__(self, index, error_callback, userctx, sim):
+        self.index = index
+        self.error_callback = error_callback
+        self.error_userctx = userctx
+        self.sim = sim
+        self.tag_enabled = False
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        # Statistics for benchmarks
+        self.frames_generated = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.errors_injected = 0
+        self.start_time = 0.0
+        self.stop_time = 0.0
+
+    @property
+    def tty_name(self):
+        return f"/dev/ttySIM{self.index}".encode()
+
+    def report(self, level, message):
+        if self.error_callback:
+            self.error_callback(_as_address(self.error_userctx), level, message.encode())
+
+    def start(self, width, height, callback, userctx):
+        if self.thread is not None:
+            return 0
+        # Keep the ctypes objects alive while the producer uses them
+        self.callback = callback
+        self.userctx = userctx
+        self.userctx_address = _as_address(userctx)
+        self.width = width
+        self.height = height
+        # A private copy: the producer writes this camera's tag counter into the frames it delivers
+        self.frames = [array.array("H", pattern) for pattern in self.sim.synthetic_frames(width, height)]
+        self.frame_ptrs = [ctypes.cast((ctypes.c_uint16 * len(f)).from_buffer(f), ctypes.POINTER(ctypes.c_uint8))
+                           for f in self.frames]
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._producer_loop, name=f"SimProducer{self.index}", daemon=True)
+        self.thread.start()
+        return 1
+
+    def stop(self):
+        if self.thread is None:
+            return 0
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        return 1
+
+    def _producer_loop(self):
+        self.report(FLI_USB_ERROR_LEVEL_INFO, "Producer thread starting...")
+        sim = self.sim
+        rng = random.Random(sim.seed + self.index + 1)
+        period = 1.0 / sim.fps if sim.fps > 0 else 0.0
+        num_patterns = len(self.frames)
+        callback = self.callback
+        userctx = self.userctx_address
+
+        self.start_time = time.perf_counter()
+        next_time = self.start_time
+        while not self.stop_event.is_set():
+            if period:
+                now = time.perf_counter()
+                if now < next_time:
+                    delay = next_time - now
+                    # Coarse sleep for long waits, yield the GIL for short ones
+                    time.sleep(delay - 0.0002 if delay > 0.001 else 0)
+                    continue
+                if now - next_time > 1.0:
+                    next_time = now  # Fell far behind (e.g. suspended), do not burst
+
+            counter = self.frames_generated
+            self.frames_generated += 1
+            next_time += period
+
+            if sim.drop_rate and rng.random() < sim.drop_rate:
+                self.frames_dropped += 1
+                continue
+
+            slot = counter % num_patterns
+            if self.tag_enabled:
+                pixels = self.frames[slot]
+                pixels[0] = counter & 0xFFFF
+                pixels[1] = (counter >> 16) & 0xFFFF
+
+            status = SIM_STATUS_OK
+            if sim.error_rate and rng.random() < sim.error_rate:
+                status = SIM_STATUS_ERROR
+                self.errors_injected += 1
+                self.report(FLI_USB_ERROR_LEVEL_WARNING, f"Simulated transfer error on frame {counter}")
+
+            callback(userctx, self.frame_ptrs[slot], status)
+            self.frames_delivered += 1
+
+        self.stop_time = time.perf_counter()
+        self.report(FLI_USB_ERROR_LEVEL_INFO, "Producer thread stopping...")
+
+    @property
+    def achieved_fps(self):
+        end = self.stop_time if self.thread is None else time.perf_counter()
+        elapsed = end - self.start_time
+        return self.frames_generated / elapsed if elapsed > 0 else 0.0
+
+
+class SimulatedFliUsb:
+    """Drop-in replacement for the fli_usb shared library object.
+
+    fps <= 0 runs the producer unpaced, which measures the maximum rate the
+    callback can sustain.
+    """
+
+    def __init__(self, fps=9500.0, num_cameras=1, drop_rate=0.0, error_rate=0.0, seed=0):
+        self.fps = fps
+        self.num_cameras = num_cameras
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.seed = seed
+        self.initialized = False
+        self.cameras = {}
+        self.next_handle = 0x1000
+        self.patterns = {}  # (width, height) -> synthetic frames, reused across acquisitions
+
+    def pattern_count(self, width, height):
+        """Number of distinct synthetic frames, fewer for large frames to bound setup time."""
+        return max(2, min(16, 1_000_000 // (width * height)))
+
+    def synthetic_frames(self, width, height):
+        """Returns the synthetic frames for a geometry, generating them only once; cameras copy them."""
+        key = (width, height)
+        if key not in self.patterns:
+            self.patterns[key] = make_synthetic_frames(width, height, self.pattern_count(width, height), self.seed)
+        return self.patterns[key]
+
+    def camera(self, cam_ctx):
+        """Returns the SimulatedCamera behind a context handle (for statistics)."""
+        return self.cameras.get(_as_address(cam_ctx))
+
+    def fli_usb_init(self):
+        self.initialized = True
+        return 1
+
+    def fli_usb_exit(self):
+        for cam in list(self.cameras.values()):
+            cam.stop()
+        self.cameras.clear()
+        self.initialized = False
+        return 1
+
+    def fli_usb_detect(self):
+        return self.num_cameras if self.initialized else 0
+
+    def fli_usb_open(self, index, error_callback, userctx):
+        if not self.initialized or not 0 <= index < self.num_cameras:
+            return None
+        handle = self.next_handle
+        self.next_handle += 0x100
+        self.cameras[handle] = SimulatedCamera(index, error_callback, userctx, self)
+        return handle
+
+    def fli_usb_get_associated_tty(self, cam_ctx):
+        cam = self.camera(cam_ctx)
+        return cam.tty_name if cam else None
+
+    def fli_usb_checkTagEnable(self, cam_ctx, enable):
+        cam = self.camera(cam_ctx)
+        if cam is None:
+            return 0
+        cam.tag_enabled = bool(enable)
+        return 1
+
+    def fli_usb_startAcquisition(self, cam_ctx, width, height, callback, userctx):
+        cam = self.camera(cam_ctx)
+        if cam is None or width <= 0 or height <= 0:
+            return 0
+        return cam.start(width, height, callback, userctx)
+
+    def fli_usb_stopAcquisition(self, cam_ctx):
+        cam = self.camera(cam_ctx)
+        return cam.stop() if cam else 0
+
+    def fli_usb_close(self, cam_ctx):
+        handle = _as_address(cam_ctx)
+        cam = self.cameras.pop(handle, None)
+        if cam is None:
+            return 0
+        cam.stop()
+        return 1
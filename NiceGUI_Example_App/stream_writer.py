@@ -0,0 +1,207 @@
+import ctypes
+import queue
+import threading
+import time
+import numpy as np
+from recording import FrameRecord, FRAME_RECORD_DTYPE
+
+
+class RawFileSink:
+    """Writes chunks as one headerless .raw stream of frames."""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.outfile = None
+
+    def open(self):
+        # Unbuffered: chunks are already large, avoid a second copy in the file buffer
+        self.outfile = open(self.output_file, "wb", buffering=0)
+
+    def write_chunk(self, data, records, nframes):
+        frame_bytes = memoryview(data).cast("B")
+        self.outfile.write(frame_bytes[:len(frame_bytes) // len(records) * nframes])
+
+    def close(self, **extra_metadata):
+        if self.outfile:
+            self.outfile.close()
+            self.outfile = None
+
+    def abort(self):
+        self.close()
+
+
+class StreamWriter:
+    """Streams frames to disk through a fixed pool of preallocated chunk buffers.
+
+    The acquisition callback copies each frame into the current chunk with
+    write_frame(). Full chunks are handed to a writer thread which flushes them
+    with one large sequential write and returns the buffer to the free pool, so
+    memory use stays fixed no matter how long the recording runs.
+
+    `output` is either a file name (headerless .raw) or a sink with
+    open()/write_chunk()/close()/abort(), such as recording.RecordingWriter.
+
+    If a chunk cannot be written (e.g. the disk is full) the writer stops:
+    `error` holds the exception, every later frame is dropped, and close()
+    raises RuntimeError instead of finishing the recording.
+    """
+
+    def __init__(self, output, frame_size, chunk_frames=256, num_chunks=8):
+        self.sink = RawFileSink(output) if isinstance(output, str) else output
+        self.frame_size = frame_size
+        self.chunk_frames = chunk_frames
+        self.chunk_size = frame_size * chunk_frames
+        self.chunks = [ctypes.create_string_buffer(self.chunk_size) for _ in range(num_chunks)]
+        self.records = [(FrameRecord * chunk_frames)() for _ in range(num_chunks)]
+        # numpy views of the same buffers for write_batch()
+        self.chunk_arrays = [np.frombuffer(chunk, dtype=np.uint8).reshape(chunk_frames, frame_size)
+                             for chunk in self.chunks]
+        self.record_arrays = [np.frombuffer(records, dtype=FRAME_RECORD_DTYPE) for records in self.records]
+
+        # Chunk indices move free -> filling (callback) -> full (writer) -> free
+        self.free_chunks = queue.SimpleQueue()
+        for index in range(num_chunks):
+            self.free_chunks.put(index)
+        self.full_chunks = queue.SimpleQueue()
+
+        self.current = None
+        self.current_addr = 0
+        self.current_records = None
+        self.fill = 0
+
+        # Counters for monitoring how far behind the writer is
+        self.frames_received = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.max_backlog = 0
+
+        self.error = None  # Exception that stopped the writer thread
+        self.thread = None
+
+    def start(self):
+        """Opens the output and starts the writer thread."""
+        self.sink.open()
+        self.thread = threading.Thread(target=self._writer_loop, name="StreamWriter", daemon=True)
+        self.thread.start()
+
+    def write_frame(self, frame, seq, status=0):
+        """Copies one frame and its index record into the current chunk. Called from the data callback.
+
+        Returns False if the frame had to be dropped because every chunk is
+        still waiting to be written or the writer has failed.
+        """
+        if self.error is not None:
+            self.frames_dropped += 1
+            return False
+        if self.current is None:
+            try:
+                self.current = self.free_chunks.get_nowait()
+            except queue.Empty:
+                self.frames_dropped += 1
+                return False
+            self.current_addr = ctypes.addressof(self.chunks[self.current])
+            self.current_records = self.records[self.current]
+            self.fill = 0
+
+        ctypes.memmove(self.current_addr + self.fill * self.frame_size, frame, self.frame_size)
+        record = self.current_records[self.fill]
+        record.seq = seq
+        record.timestamp_ns = time.monotonic_ns()
+        record.status = status
+        self.fill += 1
+        self.frames_received += 1
+
+        if self.fill == self.chunk_frames:
+            self.full_chunks.put((self.current, self.fill))
+            self.current = None
+
+        backlog = self.frames_received - self.frames_written
+        if backlog > self.max_backlog:
+            self.max_backlog = backlog
+        return True
+
+    def write_batch(self, frames, first_seq, timestamps, statuses):
+        """Copies a batch of frames ((n, H, W) uint16 array) into the chunks; used by batched ingest.
+
+        Returns the number of frames stored; the rest were dropped because
+        every chunk is still waiting to be written or the writer has failed.
+        """
+        if self.error is not None:
+            self.frames_dropped += len(frames)
+            return 0
+        frames = frames.reshape(len(frames), -1).view(np.uint8)
+        done = 0
+        while done < len(frames):
+            if self.current is None:
+                try:
+                    self.current = self.free_chunks.get_nowait()
+                except queue.Empty:
+                    self.frames_dropped += len(frames) - done
+                    break
+                self.current_addr = ctypes.addressof(self.chunks[self.current])
+                self.current_records = self.records[self.current]
+                self.fill = 0
+            count = min(len(frames) - done, self.chunk_frames - self.fill)
+            self.chunk_arrays[self.current][self.fill:self.fill + count] = frames[done:done + count]
+            records = self.record_arrays[self.current][self.fill:self.fill + count]
+            records["seq"] = np.arange(first_seq + done, first_seq + done + count)
+            records["timestamp_ns"] = timestamps[done:done + count]
+            records["status"] = statuses[done:done + count]
+            self.fill += count
+            self.frames_received += count
+            done += count
+            if self.fill == self.chunk_frames:
+                self.full_chunks.put((self.current, self.fill))
+                self.current = None
+
+        backlog = self.frames_received - self.frames_written
+        if backlog > self.max_backlog:
+            self.max_backlog = backlog
+        return done
+
+    def _writer_loop(self):
+        """Writes full chunks to disk until the end-of-stream marker arrives or a write fails."""
+        while True:
+            item = self.full_chunks.get()
+            if item is None:
+                break
+            index, nframes = item
+            try:
+                self.sink.write_chunk(self.chunks[index], self.records[index], nframes)
+            except Exception as e:
+                self.error = e
+                print(f"Stream writer failed after {self.frames_written} frames: {e}")
+                break
+            self.frames_written += nframes
+            self.free_chunks.put(index)
+
+    def close(self, **extra_metadata):
+        """Flushes the partially filled chunk, stops the writer thread and closes the output.
+
+        Raises RuntimeError if the writer failed; the output is then closed
+        without being marked complete.
+        """
+        if self.current is not None and self.fill > 0:
+            self.full_chunks.put((self.current, self.fill))
+            self.current = None
+        self.full_chunks.put(None)
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            self.sink.abort()
+            raise RuntimeError(f"Writing the stream failed after {self.frames_written} frames "
+                               f"({self.frames_dropped} dropped): {self.error}") from self.error
+        self.sink.close(**extra_metadata)
+
+    @property
+    def backlog_frames(self):
+        """Frames received from the camera but not yet written to disk."""
+        return self.frames_received - self.frames_written
+
+    def status(self):
+        """Returns a one-line summary of the writer state."""
+        return (f"received {self.frames_received}, written {self.frames_written}, "
+                f"backlog {self.backlog_frames} frames ({self.full_chunks.qsize()} chunks queued), "
+                f"max backlog {self.max_backlog}, dropped {self.frames_dropped}"
+                + (f", failed: {self.error}" if self.error is not None else ""))
@@ -0,0 +1,266 @@
+"""Host clock correlation for recorded frames.
+
+Every frame's index record holds time.monotonic_ns() taken in the data
+callback. That clock is steady but has no absolute origin, and the arrival
+times include USB and scheduling latency. This module adds what is needed to
+turn a frame number into wall-clock time:
+
+- clock_anchor() pairs a monotonic and a realtime (time.time_ns) reading.
+  Writers take one when a recording is opened and one when it is closed,
+  which also shows whether the host clock was slewed in between (NTP).
+- FrameClock fits arrival time = offset + period * frame number by least
+  squares, streaming, chunk by chunk, so memory does not grow with the
+  recording. The fit gives the camera's real frame period as seen by the
+  host, its drift from the nominal `fps` (the camera's `fps raw` setting)
+  and the arrival jitter around the line.
+- The frame number is the camera's own frame counter when the index records
+  carry one (their `tag` field counts up), so frames the host missed leave
+  a gap in x instead of biasing the period. Otherwise it is the host's
+  callback count (`seq`).
+- ClockModel is the stored result; it maps frame numbers to monotonic or
+  wall-clock times.
+"""
+import time
+from datetime import datetime, timezone
+import numpy as np
+from camera_sdk import TAG_MODULO
+
+
+def clock_anchor(samples=5):
+    """Returns {monotonic_ns, realtime_ns, uncertainty_ns} from the tightest of `samples` paired readings."""
+    best = None
+    for _ in range(samples):
+        before = time.monotonic_ns()
+        realtime = time.time_ns()
+        after = time.monotonic_ns()
+        if best is None or after - before < best[2]:
+            best = ((before + after) // 2, realtime, after - before)
+    return {"monotonic_ns": best[0], "realtime_ns": best[1], "uncertainty_ns": best[2]}
+
+
+def tags_are_counter(tags):
+    """True if index record tags count frames: more than half of the steps between them are +1."""
+    steps = np.diff(np.asarray(tags, dtype=np.int64)) % TAG_MODULO
+    return len(steps) > 0 and np.count_nonzero(steps == 1) * 2 > len(steps)
+
+
+def tag_frame_numbers(tags, first_seq, first_tag):
+    """Camera frame numbers: first_seq plus how far the tag counter advanced since the first frame.
+
+    Frames the counter puts before the first one come out at or above
+    first_seq + TAG_MODULO // 2; callers drop them.
+    """
+    return first_seq + (np.asarray(tags, dtype=np.int64) - first_tag) % TAG_MODULO
+
+
+class FrameClock:
+    """Streaming linear fit of frame arrival time (monotonic ns) against frame number.
+
+    Sums are kept in the pairwise-update form (count, means, centred second
+    moments), relative to the first frame and to the nominal period, so they
+    stay exact over hours of frames at any rate.
+    """
+
+    def __init__(self, nominal_fps=0.0):
+        self.nominal_fps = nominal_fps
+        self.anchors = [clock_anchor()]
+        self.reset()
+
+    def reset(self):
+        self.index = None  # "tag" or "seq", chosen from the first records added
+        self.first_seq = 0
+        self.first_tag = 0
+        self.count = 0
+        self.seq0 = 0
+        self.time0 = 0
+        self.period0 = 1e9 / self.nominal_fps if self.nominal_fps else 0.0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def add(self, seqs, timestamps_ns):
+        """Adds a batch of frame numbers and their arrival times."""
+        n = len(seqs)
+        if n == 0:
+            return
+        if self.count == 0:
+            self.seq0 = int(seqs[0])
+            self.time0 = int(timestamps_ns[0])
+            if not self.period0 and n > 1 and seqs[-1] != seqs[0]:
+                self.period0 = (int(timestamps_ns[-1]) - self.time0) / (int(seqs[-1]) - self.seq0)
+        x = (np.asarray(seqs, dtype=np.int64) - self.seq0).astype(np.float64)
+        y = (np.asarray(timestamps_ns, dtype=np.int64) - self.time0).astype(np.float64) - self.period0 * x
+        mean_x = x.mean()
+        mean_y = y.mean()
+        dx = x - mean_x
+        dy = y - mean_y
+        total = self.count + n
+        delta_x = mean_x - self.mean_x
+        delta_y = mean_y - self.mean_y
+        weight = self.count * n / total
+        self.m2_x += float(dx @ dx) + delta_x * delta_x * weight
+        self.m2_y += float(dy @ dy) + delta_y * delta_y * weight
+        self.c_xy += float(dx @ dy) + delta_x * delta_y * weight
+        self.mean_x += delta_x * n / total
+        self.mean_y += delta_y * n / total
+        self.count = total
+
+    def add_records(self, records):
+        """Adds frames from a FRAME_RECORD_DTYPE array, numbered by the camera's counter when they carry one."""
+        if not len(records):
+            return
+        if self.index is None:
+            self.index = "tag" if tags_are_counter(records["tag"]) else "seq"
+            self.first_seq = int(records["seq"][0])
+            self.first_tag = int(records["tag"][0])
+        if self.index == "seq":
+            self.add(records["seq"], records["timestamp_ns"])
+            return
+        numbers = tag_frame_numbers(records["tag"], self.first_seq, self.first_tag)
+        ahead = numbers < self.first_seq + TAG_MODULO // 2
+        self.add(numbers[ahead], records["timestamp_ns"][ahead])
+
+    def model(self):
+        """Returns the ClockModel fitted so far, with an end-of-recording clock anchor."""
+        self.anchors = self.anchors[:1] + [clock_anchor()]
+        if self.count > 1 and self.m2_x > 0:
+            slope = self.c_xy / self.m2_x
+            residual = max(self.m2_y - self.c_xy * slope, 0.0) / max(self.count - 2, 1)
+            period = self.period0 + slope
+            jitter = residual ** 0.5
+        else:
+            period = self.period0
+            jitter = 0.0
+        offset = self.time0 + self.mean_y - (period - self.period0) * self.mean_x - self.seq0 * period
+        return ClockModel(offset_ns=offset, period_ns=period, nominal_fps=self.nominal_fps, jitter_ns=jitter,
+                          frames=self.count, first_seq=self.seq0, anchors=list(self.anchors),
+                          index=self.index or "seq", first_tag=self.first_tag)
+
+
+class ClockModel:
+    """Linear map from frame number to host time: monotonic_ns(seq) = offset_ns + period_ns * seq.
+
+    With index "tag" the frame number counts camera frames from the first
+    recorded one (see frame_numbers()); it equals the record's seq until the
+    host misses a frame. Wall-clock times add the realtime - monotonic offset
+    of the clock anchors, interpolated between the opening and closing anchor.
+    """
+
+    def __init__(self, offset_ns, period_ns, nominal_fps=0.0, jitter_ns=0.0, frames=0, first_seq=0, anchors=None,
+                 index="seq", first_tag=0):
+        self.offset_ns = offset_ns
+        self.period_ns = period_ns
+        self.nominal_fps = nominal_fps
+        self.jitter_ns = jitter_ns
+        self.frames = frames
+        self.first_seq = first_seq
+        self.anchors = anchors or []
+        self.index = index
+        self.first_tag = first_tag
+
+    @classmethod
+    def fit(cls, index, nominal_fps=0.0):
+        """Fits a model to a recording's index (FRAME_RECORD_DTYPE array)."""
+        clock = FrameClock(nominal_fps)
+        clock.anchors = []
+        clock.add_records(index)
+        model = clock.model()
+        model.anchors = []
+        return model
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            "offset_ns": self.offset_ns,
+            "period_ns": self.period_ns,
+            "nominal_fps": self.nominal_fps,
+            "jitter_ns": self.jitter_ns,
+            "frames": self.frames,
+            "first_seq": self.first_seq,
+            "anchors": self.anchors,
+            "index": self.index,
+            "first_tag": self.first_tag,
+        }
+
+    @property
+    def fps(self):
+        """Frame rate measured on the host clock."""
+        return 1e9 / self.period_ns if self.period_ns else 0.0
+
+    @property
+    def drift_ppm(self):
+        """How much faster the camera runs than its nominal rate, in parts per million."""
+        return (self.fps / self.nominal_fps - 1) * 1e6 if self.nominal_fps and self.period_ns else 0.0
+
+    def frame_numbers(self, records):
+        """Frame numbers of index records (FRAME_RECORD_DTYPE) on this model's line."""
+        if self.index == "tag":
+            return tag_frame_numbers(records["tag"], self.first_seq, self.first_tag)
+        return records["seq"]
+
+    def monotonic_ns(self, seq):
+        """Host monotonic time of frame(s) `seq` on the fitted line (latency and jitter removed)."""
+        return self.offset_ns + self.period_ns * np.asarray(seq, dtype=np.float64)
+
+    def base_offset_ns(self):
+        """realtime - monotonic at the opening anchor, as an exact int."""
+        if not self.anchors:
+            raise ValueError("This clock model has no wall-clock anchor.")
+        return self.anchors[0]["realtime_ns"] - self.anchors[0]["monotonic_ns"]
+
+    def offset_change_ns(self, monotonic_ns):
+        """How far realtime - monotonic has moved from base_offset_ns() at the given monotonic time(s)."""
+        base = self.base_offset_ns()
+        times = [anchor["monotonic_ns"] for anchor in self.anchors]
+        changes = [anchor["realtime_ns"] - anchor["monotonic_ns"] - base for anchor in self.anchors]
+        if len(times) == 1 or times[0] == times[-1]:
+            return np.zeros(np.shape(monotonic_ns))
+        return np.interp(monotonic_ns, times, changes)
+
+    def realtime_offset_ns(self, monotonic_ns):
+        """realtime - monotonic at the given monotonic time(s)."""
+        return self.base_offset_ns() + self.offset_change_ns(monotonic_ns)
+
+    def wall_time_ns(self, seq):
+        """Wall-clock time of frame(s) `seq` as int64 nanoseconds since the Unix epoch.
+
+        The epoch offset is added as an integer: float64 only resolves about
+        256 ns at today's epoch times.
+        """
+        monotonic = self.monotonic_ns(seq)
+        local = np.rint(monotonic + self.offset_change_ns(monotonic)).astype(np.int64)
+        return local + np.int64(self.base_offset_ns())
+
+    def wall_datetime(self, seq):
+        """Wall-clock time of frame `seq` as a timezone-aware datetime."""
+        return datetime.fromtimestamp(float(self.wall_time_ns(seq)) / 1e9, tz=timezone.utc)
+
+    def summary(self):
+        text = f"{self.fps:.3f} fps on the host clock over {self.frames} frames, jitter {self.jitter_ns / 1e3:.1f} us"
+        text += ", indexed by the camera frame counter" if self.index == "tag" else ", indexed by host frame count"
+        if self.nominal_fps:
+            text += f", drift {self.drift_ppm:+.1f} ppm vs {self.nominal_fps:g} fps nominal"
+        else:
+            text += ", drift unknown (no nominal fps)"
+        if len(self.anchors) > 1:
+            slew = self.offset_change_ns(self.anchors[-1]["monotonic_ns"])
+            text += f", host clock slewed {float(slew) / 1e3:+.1f} us"
+        return text
+
+
+def recording_clock(reader):
+    """ClockModel of a recording reader: the one stored at close, else fitted from its index (unclosed files)."""
+    metadata = reader.metadata
+    if "clock" in metadata:
+        return ClockModel.from_dict(metadata["clock"])
+    if len(reader) < 2:
+        return None
+    model = ClockModel.fit(reader.index, metadata.get("fps") or 0.0)
+    if "clock_anchor" in metadata:
+        model.anchors = [metadata["clock_anchor"]]
+    return model
@@ -1,22 +1,31 @@
 import ctypes
+import os
+import sys
+import threading
 import time
 import argparse
 
-# Load the shared library
-fli_usb = ctypes.CDLL('/opt/first_light_imaging/fliusbsdk/lib/libfliusbsdk.so')
+# Shared helpers live next to the NiceGUI app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "NiceGUI_Example_App"))
+from stream_writer import StreamWriter
+from camera_sdk import fli_usb, select_backend, FLI_USB_ERROR_LEVEL_ERROR, FLI_USB_ERROR_LEVEL_WARNING, FLI_USB_ERROR_LEVEL_INFO
+from acq_stats import AcquisitionStats
+from recording import FrameRecord, RecordingWriter, RECORDING_SUFFIX
+from compression import CompressedRecordingWriter, COMPRESSED_SUFFIX, available_codecs, file_format
+from timebase import ClockModel
+from camera_settings import nominal_fps
+from camera_manager import CameraManager, camera_output_name, parse_camera_list
+from acq_client import DaemonClient, DEFAULT_SOCKET
+from profiling import profiler
 
-# Define function return types for consistency
-fli_usb.fli_usb_open.restype = ctypes.c_void_p  # cam_ctx should be treated as a pointer
-fli_usb.fli_usb_get_associated_tty.restype = ctypes.c_char_p  # TTY name should be a C string
-
-# Constants for error levels (from the SDK documentation)
-FLI_USB_ERROR_LEVEL_ERROR = 0x8000
-FLI_USB_ERROR_LEVEL_WARNING = 0x4000
-FLI_USB_ERROR_LEVEL_INFO = 0x2000
+SPAN_CALLBACK = profiler.stage("camera.record_callback")
+SPAN_COPY = profiler.stage("camera.copy")
+SPAN_SAVE = profiler.stage("camera.save")
 
 # Define error and data callback functions
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p)
 def error_callback(userctx, error, diag):
+    stats.record_message(error)
     # Determine the message type based on error level
     if error & FLI_USB_ERROR_LEVEL_ERROR:
         message_type = "Critical error"
@@ -31,27 +40,195 @@ def error_callback(userctx, error, diag):
 
 @ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint8), ctypes.c_int)
 def data_callback(userctx, frame, status):
-    if idx.value < count:
+    start_ns = time.perf_counter_ns()
+    if writer is not None:
+        # Streaming mode: hand the frame to the chunk pool, count == 0 means unbounded
+        if count == 0 or idx.value < count:
+            # A full chunk pool drops the frame; only stored frames count toward -N
+            if writer.write_frame(frame, stats.frames, status):
+                idx.value += 1
+                if idx.value == count:
+                    done.set()
+            elif writer.error is not None:
+                done.set()  # The disk write failed: stop instead of dropping every frame
+            if profiler.enabled:
+                profiler.record(SPAN_COPY, start_ns)
+    elif idx.value < count:
         offset = idx.value * width * height * 2
         ctypes.memmove(ctypes.byref(acq_buffer, offset), frame, width * height * 2)
+        if profiler.enabled:
+            profiler.record(SPAN_COPY, start_ns)
+        record = acq_records[idx.value]
+        record.seq = stats.frames
+        record.timestamp_ns = time.monotonic_ns()
+        record.status = status
         idx.value += 1
+        if idx.value == count:
+            done.set()  # Wakes the main thread to stop acquisition right away
+    stats.record(frame, status, start_ns)
+    if profiler.enabled:
+        profiler.record(SPAN_CALLBACK, start_ns)
+
+def acquire_cameras(indices):
+    """Records several cameras at once, one output file per camera (output_cam<N>.<ext>)."""
+    base_name = output_file
+    suffix = {"flr": RECORDING_SUFFIX, "flz": COMPRESSED_SUFFIX}.get(output_format)
+    if suffix and not base_name.endswith(suffix):
+        base_name = os.path.splitext(base_name)[0] + suffix  # The format follows the suffix per camera
+    manager = CameraManager(indices, check_tags=args.check_tags)
+    manager.open_all()
+    print(f"Associated TTYs: {manager.tty_names}")
+    try:
+        manager.configure_acquisition(width, height)
+        settings = {"source": "acquire.py", "backend": args.backend}
+        if args.stream:
+            manager.prepare_streams(base_name, count, args.chunk_frames, args.chunks, args.fps, settings, compression)
+        else:
+            manager.prepare_recording(count)
+        manager.start_acquisition("record")
+        print(f"Acquisition started on {len(manager.cameras)} camera(s), start skew {manager.start_skew_ns / 1e6:.3f} ms")
+        try:
+            while not manager.wait_for_frames(1):
+                print(manager.summary())
+        except KeyboardInterrupt:
+            print("Interrupted, stopping acquisition...")
+        manager.stop_acquisition()
+
+        if args.stream:
+            manager.finish_streams()
+        else:
+            manager.save_all(base_name, args.fps, settings, compression)
+        for camera in manager.cameras:
+            print(f"Camera {camera.index} saved to {camera_output_name(base_name, camera.index)}")
+            print(camera.stats.report())
+        print(manager.summary())
+    finally:
+        manager.close_all()
+        fli_usb.fli_usb_exit()
+
+def save_profile():
+    """Prints the profiling summary and writes the trace file given with --profile."""
+    if args.profile:
+        print(profiler.summary_text())
+        events = profiler.export_chrome_trace(args.profile)
+        print(f"Profiling trace with {events} events saved to {args.profile}")
+
+def acquire_with_daemon(socket_path):
+    """Records through a running acq_daemon.py, which already has the camera open."""
+    client = DaemonClient(socket_path)
+    client.configure(width, height)
+    started = time.perf_counter()
+    client.record(count, output_file, args.fps, {"source": "acquire.py"}, output_format, args.stream,
+                  args.chunk_frames, args.chunks, wait=False, codec=args.codec)
+    print(f"Acquisition started by the daemon in {(time.perf_counter() - started) * 1e3:.1f} ms")
+    # A second connection blocks until the recording is saved, so the end is seen without polling
+    waiter = threading.Thread(target=DaemonClient(socket_path).wait, daemon=True)
+    waiter.start()
+    try:
+        while True:
+            waiter.join(1)
+            if not waiter.is_alive():
+                break
+            status = client.status()
+            print(f"Progress: {status['summary']}")
+            if status["writer"]:
+                print(f"Writer: {status['writer']}")
+    except KeyboardInterrupt:
+        print("Interrupted, stopping acquisition...")
+        client.stop()
+    result = client.status()["last_record"]
+    if "error" in result:
+        raise RuntimeError(f"Daemon recording failed: {result['error']}")
+    print(f"Data saved to {result['output']}")
+    print(result["report"])
+    if result.get("clock"):
+        print(f"Frame clock: {ClockModel.from_dict(result['clock']).summary()}")
 
 # Argument parser for command-line inputs
 parser = argparse.ArgumentParser(description="Acquire images from a First Light Imaging USB camera.")
 parser.add_argument("-W", "--width", type=int, default=640, help="Width of the image (default: 640)")
 parser.add_argument("-H", "--height", type=int, default=512, help="Height of the image (default: 512)")
-parser.add_argument("-N", "--frames", type=int, default=400, help="Number of frames to capture (default: 400)")
+parser.add_argument("-N", "--frames", type=int, default=400, help="Number of frames to capture (default: 400, 0 = until Ctrl+C with --stream)")
+parser.add_argument("--stream", action="store_true", help="Write frames to disk during acquisition instead of buffering them all in RAM")
+parser.add_argument("--chunk-frames", type=int, default=256, help="Frames per chunk buffer in streaming mode (default: 256)")
+parser.add_argument("--chunks", type=int, default=16, help="Number of chunk buffers in streaming mode (default: 16)")
+parser.add_argument("--format", choices=["raw", "flr", "flz"], default=None,
+                    help="Output format: headerless 'raw', 'flr' recording with header and per-frame index, "
+                         "or 'flz' compressed recording (default: from the output suffix)")
+parser.add_argument("--codec", choices=available_codecs(), default=None,
+                    help="Compression codec for 'flz' (default: zstd if installed, else lz4, else zlib)")
+parser.add_argument("--compress-workers", type=int, default=None,
+                    help="Compression threads for 'flz' (default: all cores)")
+parser.add_argument("--fps", type=float, default=0.0, help="Nominal camera frame rate to store in the recording header "
+                         "(default: read with 'fps raw' from the camera's serial port)")
+parser.add_argument("--check-tags", action="store_true", help="Count missed frames from the frame counter in the image tag")
+parser.add_argument("--backend", choices=["sdk", "sim"], default=os.environ.get("FLI_USB_BACKEND", "sdk"),
+                    help="SDK backend: 'sdk' loads libfliusbsdk.so, 'sim' uses the simulated camera (default: sdk)")
+parser.add_argument("--sim-fps", type=float, default=9500.0, help="Frame rate of the simulated camera, 0 = unpaced (default: 9500)")
+parser.add_argument("--camera", type=int, default=0, help="Index of the camera to record (default: 0)")
+parser.add_argument("--cameras", default=None,
+                    help="Record several cameras at once: 'all' or a comma separated list of indices; "
+                         "each camera is written to <output>_cam<N>")
+parser.add_argument("--daemon", nargs="?", const=DEFAULT_SOCKET, default=None,
+                    help=f"Record through a running acq_daemon.py instead of opening the camera (socket, default: {DEFAULT_SOCKET})")
+parser.add_argument("--sim-cameras", type=int, default=None, help="Number of simulated cameras (default: 1)")
+parser.add_argument("--profile", metavar="TRACE", default=None,
+                    help="Record profiling timings, print their summary and save them as Chrome trace JSON")
 parser.add_argument("output", type=str, help="Output file to save image data")
 
 args = parser.parse_args()
+if args.backend == "sim":
+    sim_options = {"fps": args.sim_fps}
+    if args.sim_cameras is not None:
+        sim_options["num_cameras"] = args.sim_cameras
+    select_backend("sim", **sim_options)
+else:
+    select_backend("sdk")
 width = args.width
 height = args.height
 count = args.frames
 output_file = args.output
+output_format = args.format or file_format(output_file)
+compression = {"codec": args.codec, "workers": args.compress_workers}
+if args.profile:
+    profiler.enable()
 
-# Allocate the buffer and set frame index
-acq_buffer = ctypes.create_string_buffer(width * height * 2 * count)
+if count == 0 and not args.stream:
+    parser.error("-N 0 (record until interrupted) requires --stream")
+
+if args.daemon is not None:
+    if args.cameras is not None:
+        parser.error("--daemon records the daemon's camera; --cameras is not supported with it")
+    acquire_with_daemon(args.daemon)
+    save_profile()
+    sys.exit(0)
+
+if args.cameras is not None:
+    acquire_cameras(parse_camera_list(args.cameras))
+    save_profile()
+    sys.exit(0)
+
+# Allocate the buffer (or the streaming chunk pool) and set frame index
+writer = None
+acq_buffer = None
+acq_records = None
+recording = None
+if output_format == "flr":
+    recording = RecordingWriter(output_file, width, height, args.fps,
+                                {"source": "acquire.py", "backend": args.backend}, args.chunk_frames)
+elif output_format == "flz":
+    recording = CompressedRecordingWriter(output_file, width, height, args.fps,
+                                          {"source": "acquire.py", "backend": args.backend}, args.chunk_frames,
+                                          **compression)
+if args.stream:
+    writer = StreamWriter(recording or output_file, width * height * 2, args.chunk_frames, args.chunks)
+else:
+    acq_buffer = ctypes.create_string_buffer(width * height * 2 * count)
+    acq_records = (FrameRecord * count)()
 idx = ctypes.c_int(0)
+done = threading.Event()  # Set by the callback when the last frame is stored
+exit_code = 0
+stats = AcquisitionStats(check_tags=args.check_tags)
 
 # Initialize the SDK and detect cameras
 if fli_usb.fli_usb_init() == 1:
@@ -59,8 +236,8 @@ if fli_usb.fli_usb_init() == 1:
     if nb_cam > 0:
         print(f"{nb_cam} camera(s) detected")
 
-        # Open the first camera and check if cam_ctx is valid
-        cam_ctx = fli_usb.fli_usb_open(0, error_callback, None)
+        # Open the selected camera and check if cam_ctx is valid
+        cam_ctx = fli_usb.fli_usb_open(args.camera, error_callback, None)
         cam_ctx = ctypes.c_void_p(cam_ctx)  # Cast for consistent handling
 
         if cam_ctx:
@@ -73,16 +250,28 @@ if fli_usb.fli_usb_init() == 1:
             if not tty_name:
                 print("Error: TTY name is not assigned. The camera context may be incomplete.")
             else:
+                if recording is not None:
+                    # Nominal rate for the header, which the frame clock's drift is measured against
+                    recording.metadata["fps"] = nominal_fps(args.fps, tty_name.decode())
+
                 # Enable tag checking and start acquisition if TTY is valid
                 if fli_usb.fli_usb_checkTagEnable(cam_ctx, 1) == 1:
                     print("Tag checking enabled")
 
+                    if writer is not None:
+                        writer.start()
+
                     if fli_usb.fli_usb_startAcquisition(cam_ctx, width, height, data_callback, None) == 1:
                         print("Acquisition started...")
 
-                        # Wait until all frames are received
-                        while idx.value < count:
-                            time.sleep(1)  # Sleep for a short time to avoid busy-waiting
+                        # Wait until all frames are received, with a progress line every second
+                        try:
+                            while not done.wait(1):
+                                print(f"Progress: {stats.summary()}")
+                                if writer is not None:
+                                    print(f"Writer: {writer.status()}")
+                        except KeyboardInterrupt:
+                            print("Interrupted, stopping acquisition...")
 
                         # Stop acquisition
                         if fli_usb.fli_usb_stopAcquisition(cam_ctx) == 1:
@@ -91,10 +280,37 @@ if fli_usb.fli_usb_init() == 1:
                             print("Failed to stop acquisition")
 
                         # Save data to file
-                        with open(output_file, "wb") as outfile:
-                            outfile.write(acq_buffer.raw)
-                        print(f"Data saved to {output_file}")
+                        save_ns = time.perf_counter_ns()
+                        if writer is not None:
+                            try:
+                                writer.close(measured_fps=stats.achieved_fps)
+                            except RuntimeError as e:
+                                print(f"Error: {e}")
+                                exit_code = 1
+                            print(f"Writer: {writer.status()}")
+                            if writer.frames_dropped and writer.error is None:
+                                print(f"Warning: {writer.frames_dropped} frames were dropped because every chunk "
+                                      f"was waiting for the disk; {idx.value} frames saved. "
+                                      "Use more --chunks or a faster disk.")
+                        elif recording is not None:
+                            recording.open()
+                            recording.write_buffer(acq_buffer, acq_records, min(idx.value, count))
+                            recording.close(measured_fps=stats.achieved_fps)
+                        else:
+                            with open(output_file, "wb") as outfile:
+                                outfile.write(acq_buffer)
+                        if profiler.enabled:
+                            profiler.record(SPAN_SAVE, save_ns)
+                        if exit_code == 0:
+                            print(f"Data saved to {output_file}")
+                        else:
+                            print(f"Recording {output_file} is incomplete: only {writer.frames_written} frames were written")
+                        print(stats.report())
+                        if recording is not None and exit_code == 0:
+                            print(f"Frame clock: {ClockModel.from_dict(recording.metadata['clock']).summary()}")
                     else:
+                        if writer is not None:
+                            writer.close()
                         print("Failed to start acquisition - cam_ctx may be invalid.")
                 else:
                     print("Failed to enable tag checking - cam_ctx might be invalid or improperly initialized")
@@ -109,4 +325,6 @@ if fli_usb.fli_usb_init() == 1:
     # Final SDK cleanup
     fli_usb.fli_usb_exit()
 else:
-    print("Failed to initialize the USB SDK")
\ No newline at end of file
+    print("Failed to initialize the USB SDK")
+save_profile()
+sys.exit(exit_code)
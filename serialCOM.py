@@ -1,29 +1,38 @@
+import argparse
+import os
+import sys
 import serial
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "NiceGUI_Example_App"))
+from serial_link import read_until_prompt, clean_response
 
 # Configure serial communication settings
 SERIAL_PORT = '/dev/ttyACM0' 
 BAUD_RATE = 115200
-TIMEOUT = 1 
+TIMEOUT = 2  # Seconds to wait for the fli-cli> prompt after a command
 
 def main():
+    parser = argparse.ArgumentParser(description="Send fli-cli commands to the camera over its serial port.")
+    parser.add_argument("--port", default=SERIAL_PORT, help=f"Serial port (default: {SERIAL_PORT})")
+    args = parser.parse_args()
+
     ser = None
     try:
         # Open serial connection
         ser = serial.Serial(
-            port=SERIAL_PORT,
+            port=args.port,
             baudrate=BAUD_RATE,
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
-            timeout=TIMEOUT,
+            timeout=0.1,  # Per read; read_until_prompt enforces TIMEOUT
             xonxoff=False,  # No software flow control
             rtscts=False,   # No hardware (RTS/CTS) flow control
             dsrdtr=False    # No hardware (DSR/DTR) flow control
         )
         
         if ser.is_open:
-            print(f"Connected to {SERIAL_PORT} at {BAUD_RATE} baud.")
+            print(f"Connected to {args.port} at {BAUD_RATE} baud.")
 
         while True:
             # Get command from user
@@ -36,18 +45,16 @@ def main():
             ser.write((command + '\r\n').encode())
             print(f"Sent: {command}")
 
-            # Wait and read response until "fli-cli>" prompt
-            full_response = ""
-            while True:
-                line = ser.readline().decode().strip()
-                if line and "fli-cli>" not in line:
-                    full_response += line + " "  # Append line with a space instead of a newline
-                if line.endswith("fli-cli>"):
-                    break  # Exit loop once end prompt is detected
-            
+            # Read bytes until the "fli-cli>" prompt; it has no newline, so don't wait for one
+            try:
+                full_response = clean_response(read_until_prompt(ser, TIMEOUT))
+            except TimeoutError as e:
+                print(e)
+                continue
+
             # Print the response on the same line as "Received:"
-            if full_response.strip():  # Only print if there's actual content
-                print(f"Received: {full_response.strip()}")
+            if full_response:  # Only print if there's actual content
+                print(f"Received: {full_response}")
 
     except serial.SerialException as e:
         print(f"Serial error: {e}")
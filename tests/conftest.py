@@ -0,0 +1,36 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The app's modules are flat and imported by bare name, as acquire.py does
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NiceGUI_Example_App")
+sys.path.insert(0, APP_DIR)
+
+# Never load the real SDK library from the tests
+os.environ["FLI_USB_BACKEND"] = "sim"
+
+
+def tagged_frames(count, height, width, first=0, seed=0):
+    """(count, H, W) uint16 frames of random 14-bit pixels, with frame counter first+i in their image tag."""
+    from camera_sdk import TAG_PIXELS
+    frames = np.random.default_rng(seed).integers(0, 1 << 14, (count, height, width), dtype=np.uint16)
+    tags = (np.arange(first, first + count, dtype=np.int64) % (1 << 32)).astype(np.uint32)
+    frames.reshape(count, -1)[:, :TAG_PIXELS] = tags.view(np.uint16).reshape(count, TAG_PIXELS)
+    return frames
+
+
+@pytest.fixture
+def frames():
+    return tagged_frames
+
+
+@pytest.fixture
+def sim():
+    """The in-process simulated SDK, set to two fault-free cameras at 4000 fps for the test."""
+    from camera_sdk import fli_usb
+    sim = fli_usb.impl
+    saved = sim.fps, sim.num_cameras, sim.drop_rate, sim.error_rate
+    sim.fps, sim.num_cameras, sim.drop_rate, sim.error_rate = 4000.0, 2, 0.0, 0.0
+    yield sim
+    sim.fps, sim.num_cameras, sim.drop_rate, sim.error_rate = saved
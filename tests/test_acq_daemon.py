@@ -0,0 +1,75 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import numpy as np
+import pytest
+from acq_client import DaemonClient, RemoteCamera
+from capture_reader import Capture
+
+DAEMON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NiceGUI_Example_App", "acq_daemon.py")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    log = open(tmp_path / "daemon.log", "w")
+    process = subprocess.Popen([sys.executable, DAEMON, "--backend", "sim", "--socket", socket_path,
+                                "-W", "32", "-H", "16", "--check-tags", "--sim-fps", "4000"],
+                               stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        assert process.poll() is None, (tmp_path / "daemon.log").read_text()
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    yield socket_path
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(30) == 0
+    log.close()
+    assert not os.path.exists(socket_path)  # Removed on shutdown
+
+
+def test_record_through_the_daemon(daemon, tmp_path):
+    camera = RemoteCamera(daemon)
+    camera.initialize_camera_context()
+    status = camera.client.status()
+    assert (status["state"], status["width"], status["height"]) == ("idle", 32, 16)
+
+    output = str(tmp_path / "capture.flr")
+    result = asyncio.run(camera.record(200, output, 4000.0, {"exposure": "test"}))
+    assert result["frames"] == 200 and result["output"] == output
+    assert "Frames received" in camera.stats.report()
+
+    capture = Capture(output)
+    assert len(capture) == 200
+    assert capture.recording.complete
+    assert capture.recording.settings["exposure"] == "test"
+    assert capture.recording.settings["source"] == "acq_daemon.py"
+    np.testing.assert_array_equal(capture.recording.index["seq"], np.arange(200))
+    assert capture.clock.nominal_fps == 4000
+
+    status = camera.client.status()
+    assert status["state"] == "idle"
+    assert status["stored"] == 200
+    assert status["last_record"]["output"] == output
+
+
+def test_streamed_recording_and_live_frames(daemon, tmp_path):
+    client = DaemonClient(daemon)
+    output = str(tmp_path / "capture.flz")
+    reply = client.record(300, output, 4000.0, stream=True, chunk_frames=64, wait=False)
+    assert reply["state"] == "recording"
+    with pytest.raises(RuntimeError, match="busy"):
+        client.configure(64, 32)
+    last_record = client.wait()["last_record"]
+    assert last_record["frames"] == 300
+    assert len(Capture(output)) == 300
+
+    client.start("viewer")
+    frame, header = next(client.frames(max_fps=100))
+    assert frame.shape == (16, 32)
+    assert header["seq"] >= 0
+    assert client.stop()["state"] == "idle"
+    client.close()
@@ -0,0 +1,49 @@
+import numpy as np
+from acq_stats import AcquisitionStats
+from camera_sdk import frame_tags
+
+
+def feed(stats, frames, period_ns=100_000, statuses=None):
+    for k, frame in enumerate(frames):
+        status = 0 if statuses is None else statuses[k]
+        stats.record(frame.ctypes.data, status, 10**9 + k * period_ns)
+
+
+def test_tag_gaps_count_missed_frames(frames):
+    data = frames(40, 4, 6)
+    kept = np.delete(np.arange(40), [5, 6, 20])
+    stats = AcquisitionStats(check_tags=True)
+    feed(stats, data[kept], statuses=[0] * 30 + [3] + [0] * 6)
+    assert stats.frames == 37
+    assert stats.tag_gaps == 2
+    assert stats.missed_frames == 3
+    assert stats.tag_out_of_order == 0
+    assert stats.bad_status == 1 and stats.last_bad_status == 3
+    assert abs(stats.achieved_fps - 10_000) < 1e-6
+    assert "3 missed (2 gaps)" in stats.summary()
+
+
+def test_batches_count_like_single_frames(frames):
+    data = frames(64, 4, 6)
+    kept = np.delete(np.arange(64), [10, 11, 12, 40])
+    single = AcquisitionStats(check_tags=True)
+    feed(single, data[kept])
+    batched = AcquisitionStats(check_tags=True)
+    arrivals = 10**9 + np.arange(len(kept)) * 100_000
+    for first in range(0, len(kept), 16):
+        batch = data[kept][first:first + 16]
+        batched.record_batch(arrivals[first:first + 16], np.zeros(len(batch), dtype=np.int32), frame_tags(batch))
+    for name in ("frames", "tag_gaps", "tag_missing", "tag_out_of_order", "arrival_sum", "arrival_max"):
+        assert getattr(batched, name) == getattr(single, name), name
+    assert list(batched.arrival_histogram) == list(single.arrival_histogram)
+    assert "not measured (batched ingest)" in batched.report()
+
+
+def test_untagged_frames_report_no_counter():
+    data = np.random.default_rng(0).integers(0, 1 << 14, (40, 4, 6), dtype=np.uint16)
+    stats = AcquisitionStats(check_tags=True)
+    feed(stats, data)
+    assert not stats.tags_valid
+    assert stats.missed_frames is None
+    assert "no tag counter" in stats.summary()
+    assert "image tags hold no frame counter" in stats.report()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from capture_reader import Capture
+
+ACQUIRE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "acquire.py")
+
+
+def acquire(tmp_path, output, *options, drop_rate=0.0):
+    env = dict(os.environ, FLI_USB_SIM_DROP_RATE=str(drop_rate))
+    result = subprocess.run([sys.executable, ACQUIRE, "--backend", "sim", "-W", "32", "-H", "16", "--check-tags",
+                             *options, str(tmp_path / output)], env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+@pytest.mark.parametrize("suffix", [".flr", ".flz"])
+@pytest.mark.parametrize("stream", [False, True])
+def test_recording_from_the_simulator(tmp_path, suffix, stream):
+    options = ["-N", "600", "--sim-fps", "4000", "--fps", "4000"]
+    if stream:
+        options += ["--stream", "--chunk-frames", "64"]
+    output = acquire(tmp_path, "capture" + suffix, *options, drop_rate=0.02)
+
+    capture = Capture(str(tmp_path / ("capture" + suffix)))
+    assert len(capture) == 600
+    assert capture.recording.complete
+    index = capture.recording.index
+    np.testing.assert_array_equal(index["seq"], np.arange(600))
+    # The image tags count camera frames, so the simulator's drops show as gaps
+    steps = np.diff(index["tag"].astype(np.int64))
+    assert np.all(steps >= 1)
+    assert "Tag gaps: " in output
+
+    clock = capture.clock
+    assert clock.index == "tag"
+    assert clock.nominal_fps == 4000
+    assert abs(clock.fps - 4000) / 4000 < 0.01
+    assert len(capture.wall_times()) == 600
+
+
+def test_raw_capture_and_frame_limit(tmp_path):
+    acquire(tmp_path, "capture.raw", "-N", "200", "--sim-fps", "0", "--stream", "--chunk-frames", "16")
+    assert os.path.getsize(tmp_path / "capture.raw") == 200 * 32 * 16 * 2
+    frames = Capture(str(tmp_path / "capture.raw"), 32, 16)[:]
+    tags = frames.reshape(200, -1)[:, :2].copy().view(np.uint32)[:, 0]
+    assert np.all(np.diff(tags.astype(np.int64)) >= 1)
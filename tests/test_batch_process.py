@@ -0,0 +1,84 @@
+import ctypes
+import os
+import numpy as np
+import pytest
+from batch_process import BatchJob, load_image, process_segment, run
+from capture_reader import Capture
+from recording import FrameRecord, RecordingWriter
+
+HEIGHT = 6
+WIDTH = 10
+
+
+@pytest.fixture
+def capture(tmp_path, frames):
+    def make(name, count, seed=0):
+        data = frames(count, HEIGHT, WIDTH, seed=seed)
+        path = str(tmp_path / name)
+        writer = RecordingWriter(path, WIDTH, HEIGHT, chunk_frames=16)
+        writer.open()
+        writer.write_buffer(ctypes.create_string_buffer(data.tobytes()), (FrameRecord * count)(), count)
+        writer.close()
+        return Capture(path), data
+    return make
+
+
+def interrupt_after(job, segments):
+    """Runs the first `segments` work units in this process, as if the run had been stopped there."""
+    assert job.prepare(overwrite=False)
+    for task in list(job.segments(chunk_frames=4))[:segments]:
+        (_, segment), frames, _, _ = process_segment(task)
+        job.record(segment, frames)
+
+
+def test_mean_resumes_from_journal(tmp_path, capture):
+    source, data = capture("in.flr", 40)
+    output = str(tmp_path / "mean.npy")
+    interrupt_after(BatchJob("mean", output, "npy", [source], segment_frames=8), 2)
+
+    job = BatchJob("mean", output, "npy", [source], segment_frames=8)
+    assert job.prepare(overwrite=False)
+    assert len(job.done) == 2
+    assert len(list(job.segments(4))) == 3  # Only what the first run did not finish
+    run([job], workers=1, chunk_frames=4)
+
+    np.testing.assert_allclose(np.load(output), data.mean(axis=0, dtype=np.float64), rtol=1e-6)
+    assert not os.path.exists(job.journal_path)
+    assert not os.path.exists(job.partial_dir)
+    # Complete now: skipped unless overwritten
+    assert run([BatchJob("mean", output, "npy", [source], segment_frames=8)], workers=1) == []
+
+
+def test_changed_options_start_over(tmp_path, capture):
+    source, data = capture("in.flr", 40)
+    output = str(tmp_path / "stack.npy")
+    interrupt_after(BatchJob("stack", output, "npy", [source], segment_frames=8), 3)
+
+    # Segments of 16 frames do not line up with the journal's segments of 8
+    job = BatchJob("stack", output, "npy", [source], segment_frames=16)
+    assert job.prepare(overwrite=False)
+    assert job.done == {}
+    run([job], workers=1, chunk_frames=4)
+    np.testing.assert_array_equal(np.load(output), data.sum(axis=0, dtype=np.float64))
+
+
+def test_convert_resumes_with_step(tmp_path, capture):
+    source, data = capture("in.flr", 45)
+    output = str(tmp_path / "convert.npy")
+    interrupt_after(BatchJob("convert", output, "npy", [source], step=2, segment_frames=5), 2)
+
+    run([BatchJob("convert", output, "npy", [source], step=2, segment_frames=5)], workers=2, chunk_frames=4)
+    np.testing.assert_array_equal(np.load(output), data[::2])
+
+
+def test_combined_stack_with_dark(tmp_path, capture):
+    first, first_data = capture("a.flr", 20, seed=1)
+    second, second_data = capture("b.flr", 12, seed=2)
+    dark = np.full((HEIGHT, WIDTH), 3.0)
+    np.save(tmp_path / "dark.npy", dark)
+    output = str(tmp_path / "combined.fits")
+
+    run([BatchJob("stack", output, "fits", [first, second], dark=load_image(str(tmp_path / "dark.npy")),
+                  segment_frames=8)], workers=2)
+    expected = np.concatenate([first_data, second_data]).sum(axis=0, dtype=np.float64) - 32 * dark
+    np.testing.assert_array_equal(load_image(output), expected)
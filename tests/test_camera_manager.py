@@ -0,0 +1,75 @@
+import time
+import numpy as np
+import pytest
+from camera_manager import CameraManager, camera_output_name, parse_camera_list
+from capture_reader import Capture
+
+
+@pytest.fixture
+def manager(sim):
+    manager = CameraManager(check_tags=True)
+    manager.open_all()
+    manager.configure_acquisition(32, 16)
+    yield manager
+    manager.close_all()
+
+
+def check_outputs(manager, output, frames):
+    for camera in manager.cameras:
+        capture = Capture(camera_output_name(output, camera.index))
+        assert len(capture) == frames
+        assert capture.recording.complete
+        assert capture.recording.settings["camera_index"] == camera.index
+        assert capture.recording.settings["tty"] == camera.tty_name
+        # Each camera's frames carry its own counter: no gaps when nothing was dropped
+        assert np.all(np.diff(capture.recording.index["tag"].astype(np.int64)) == 1)
+        assert capture.clock.index == "tag"
+        assert camera.stats.tag_gaps == 0
+
+
+def test_names():
+    assert camera_output_name("run/capture.flr", 1) == "run/capture_cam1.flr"
+    assert parse_camera_list("all") is None
+    assert parse_camera_list("0, 2,") == [0, 2]
+
+
+def test_buffered_recording_on_two_cameras(manager, sim, tmp_path):
+    assert manager.tty_names == {0: "/dev/ttySIM0", 1: "/dev/ttySIM1"}
+    # A live preview on one camera first, so the two frame counters differ
+    manager.cameras[0].start_acquisition("viewer")
+    time.sleep(0.1)
+    manager.cameras[0].stop_acquisition()
+
+    sim.fps = 0  # Unpaced, so the two producers interleave as much as possible
+    manager.prepare_recording(2000)
+    manager.start_acquisition("record")
+    assert manager.wait_for_frames(10)
+    manager.stop_acquisition()
+    assert manager.frames_done(2000)
+    assert manager.start_skew_ns >= 0 and manager.stop_skew_ns >= 0
+
+    output = str(tmp_path / "capture.flr")
+    manager.save_all(output, 4000.0, {"source": "test"})
+    check_outputs(manager, output, 2000)
+    assert "All cameras: " in manager.summary()
+
+
+def test_streamed_recording_on_two_cameras(manager, tmp_path):
+    output = str(tmp_path / "capture.flz")
+    manager.prepare_streams(output, 300, chunk_frames=64, fps=4000.0)
+    manager.start_acquisition("record")
+    assert manager.wait_for_frames(10)
+    manager.stop_acquisition()
+    manager.finish_streams()
+    assert all(camera.writer is None for camera in manager.cameras)
+    check_outputs(manager, output, 300)
+
+
+def test_failed_start_stops_the_other_cameras(manager, sim):
+    manager.prepare_recording(100)
+    failing = manager.cameras[1]
+    failing.close_camera_context()
+    with pytest.raises(RuntimeError, match="Failed to start camera"):
+        manager.start_acquisition("record")
+    assert sim.camera(manager.cameras[0].cam_ctx).thread is None  # Stopped again
+    assert manager.cameras[0].done.is_set()
@@ -0,0 +1,68 @@
+import camera_settings
+from camera_settings import CameraSettings, nominal_fps
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(camera_settings.time, "monotonic", clock)
+    settings = CameraSettings(ttl=10.0)
+    assert settings.stale_names() == ["cropping", "fps", "tint"]
+
+    for name, command in settings.queries.items():
+        assert settings.note_command(command, f"{name} value") == name
+    assert settings.stale_names() == []
+    assert settings.get("fps") == "fps value"
+
+    clock.now += 9.9
+    assert settings.is_fresh("tint")
+    clock.now += 0.2
+    assert settings.stale_names() == ["cropping", "fps", "tint"]
+    assert settings.get("fps") is None
+    assert settings.hits == 3 and settings.misses == 6
+
+
+def test_set_commands_invalidate_what_they_change():
+    settings = CameraSettings()
+    for command in settings.queries.values():
+        settings.note_command(command, "x")
+    assert settings.note_command("SET  fps 200", "") is None
+    assert settings.stale_names() == ["fps", "tint"]
+
+    for command in settings.queries.values():
+        settings.note_command(command, "x")
+    settings.note_command("set mystery 1", "")
+    assert settings.stale_names() == ["cropping", "fps", "tint"]
+
+
+def test_typed_queries_refresh_the_cache():
+    settings = CameraSettings()
+    assert settings.store("fps", "100") is True
+    assert settings.store("fps", "100") is False
+    assert settings.note_command("  Fps   RAW ", "200") == "fps"
+    assert settings.get("fps") == "200"
+    settings.invalidate()
+    assert settings.get("fps") is None
+
+
+def test_nominal_fps(capsys):
+    assert nominal_fps(250.0, "/dev/does-not-exist") == 250.0
+    assert nominal_fps(0.0, "/dev/does-not-exist", timeout=0.1) == 0.0
+    assert "drift will not be computed" in capsys.readouterr().out
+
+
+def test_nominal_fps_from_the_camera():
+    from fli_cli_sim import FliCliEmulator
+    emulator = FliCliEmulator()
+    port = emulator.start()
+    try:
+        assert nominal_fps(0.0, port) == emulator.fps
+    finally:
+        emulator.stop()
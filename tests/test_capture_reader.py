@@ -0,0 +1,67 @@
+import ctypes
+import sys
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+import capture_reader
+from capture_reader import Capture, ReplaySource
+from recording import FrameRecord, FRAME_RECORD_DTYPE, RecordingWriter
+
+HEIGHT = 4
+WIDTH = 6
+PERIOD_NS = 100_000
+
+
+def test_info_dates_frames_by_the_camera_counter(tmp_path, frames, capsys, monkeypatch):
+    kept = np.delete(np.arange(300), np.arange(10, 290, 7))  # The host missed every 7th frame
+    data = frames(300, HEIGHT, WIDTH)[kept]
+    records = (FrameRecord * len(kept))()
+    index = np.frombuffer(records, dtype=FRAME_RECORD_DTYPE)
+    index["seq"] = np.arange(len(kept))
+    index["timestamp_ns"] = 10**9 + kept * PERIOD_NS
+    path = str(tmp_path / "capture.flr")
+    writer = RecordingWriter(path, WIDTH, HEIGHT, 1e9 / PERIOD_NS, chunk_frames=64)
+    writer.open()
+    writer.write_buffer(ctypes.create_string_buffer(data.tobytes()), records, len(kept))
+    writer.close()
+
+    capture = Capture(path)
+    assert capture.clock.index == "tag"
+    wall_times = capture.wall_times()
+    assert wall_times[-1] - wall_times[0] == 299 * PERIOD_NS
+
+    monkeypatch.setattr(sys, "argv", ["capture_reader.py", path])
+    capture_reader.main()
+    first, last = (datetime.fromtimestamp(float(t) / 1e9, tz=timezone.utc).isoformat()
+                   for t in (wall_times[0], wall_times[-1]))
+    assert f"First frame at {first}, last at {last}" in capsys.readouterr().out
+
+
+def test_replay_publishes_every_frame(tmp_path, frames):
+    data = frames(30, HEIGHT, WIDTH)
+    path = str(tmp_path / f"buffer_30frames_{WIDTH}x{HEIGHT}_100.00fps.raw")
+    data.tofile(path)
+    source = ReplaySource(path, speed=0, loop=False)
+    source.start_acquisition()
+    source.thread.join(5)
+    frame, seq, _ = source.get_latest_frame()
+    assert seq == 29
+    np.testing.assert_array_equal(frame, data[29])
+    source.stop_acquisition()
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+@pytest.mark.parametrize("suffix", [".raw", ".flr"])
+def test_replay_of_an_empty_capture_stops(tmp_path, suffix):
+    path = str(tmp_path / f"buffer_0frames_{WIDTH}x{HEIGHT}_100.00fps{suffix}")
+    if suffix == ".raw":
+        open(path, "wb").close()
+    else:
+        writer = RecordingWriter(path, WIDTH, HEIGHT)
+        writer.open()
+        writer.abort()  # Left unclosed before its first chunk
+    source = ReplaySource(path, speed=0, loop=True)
+    source.start_acquisition()
+    source.thread.join(1)
+    assert not source.thread.is_alive()
+    source.stop_acquisition()
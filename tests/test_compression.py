@@ -0,0 +1,79 @@
+import ctypes
+import numpy as np
+import pytest
+from compression import (CompressedRecordingReader, CompressedRecordingWriter, FILTERS, apply_filter,
+                         available_codecs, is_compressed_recording, pack14, undo_filter, unpack14)
+from recording import FrameRecord, FRAME_RECORD_DTYPE
+
+HEIGHT = 8
+WIDTH = 13  # Not a multiple of 4, so pack14 pads
+
+
+def records_for(count, first_seq=0):
+    records = (FrameRecord * count)()
+    index = np.frombuffer(records, dtype=FRAME_RECORD_DTYPE)
+    index["seq"] = np.arange(first_seq, first_seq + count)
+    index["timestamp_ns"] = index["seq"].astype(np.int64) * 1000
+    return records
+
+
+def test_pack14_round_trip():
+    values = np.random.default_rng(1).integers(0, 1 << 14, 64, dtype=np.uint16)
+    packed = pack14(values)
+    assert packed.size == 64 * 7 // 4
+    np.testing.assert_array_equal(unpack14(packed.tobytes(), 64), values)
+
+
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_filters_are_lossless(name, frames):
+    data = frames(5, HEIGHT, WIDTH)
+    code, filtered = apply_filter(data, name)
+    assert code == FILTERS[name]
+    restored = undo_filter(bytes(memoryview(filtered).cast("B")), code, 5, HEIGHT, WIDTH)
+    np.testing.assert_array_equal(restored, data)
+
+
+def test_pack14_falls_back_above_14_bits(frames):
+    data = frames(2, HEIGHT, WIDTH)
+    data[1, 3, 3] = 1 << 15
+    code, filtered = apply_filter(data, "pack14")
+    assert code == FILTERS["none"]
+    np.testing.assert_array_equal(undo_filter(bytes(memoryview(filtered).cast("B")), code, 2, HEIGHT, WIDTH), data)
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_recording_round_trip(tmp_path, frames, codec, name):
+    data = frames(70, HEIGHT, WIDTH)
+    path = str(tmp_path / "capture.flz")
+    writer = CompressedRecordingWriter(path, WIDTH, HEIGHT, 1000.0, {"source": "test"}, chunk_frames=16,
+                                       codec=codec, filter=name, workers=2)
+    writer.open()
+    writer.write_buffer(ctypes.create_string_buffer(data.tobytes()), records_for(70), 70)
+    writer.close()
+
+    assert is_compressed_recording(path)
+    reader = CompressedRecordingReader(path, workers=2)
+    assert reader.complete
+    assert len(reader) == 70
+    np.testing.assert_array_equal(reader.read(0, 70), data)
+    np.testing.assert_array_equal(reader.read(5, 64, 7), data[5:64:7])
+    np.testing.assert_array_equal(reader.frame(69), data[69])
+    np.testing.assert_array_equal(reader.index["seq"], np.arange(70))
+    np.testing.assert_array_equal(reader.index["tag"], np.arange(70))
+
+
+def test_unclosed_recording_is_readable(tmp_path, frames):
+    data = frames(32, HEIGHT, WIDTH)
+    path = str(tmp_path / "unfinished.flz")
+    writer = CompressedRecordingWriter(path, WIDTH, HEIGHT, chunk_frames=16, codec="zlib", workers=1)
+    writer.open()
+    for first in (0, 16):
+        writer.write_chunk(data[first:first + 16], records_for(16, first), 16)
+    while writer.pending:
+        writer._write_completed(block=True)
+
+    reader = CompressedRecordingReader(path)
+    assert not reader.complete
+    np.testing.assert_array_equal(reader.read(0, len(reader)), data)
+    writer.close()
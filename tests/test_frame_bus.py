@@ -0,0 +1,81 @@
+import os
+import uuid
+import numpy as np
+import pytest
+from frame_bus import SharedFrameRing, FrameBusClient
+
+HEIGHT = 4
+WIDTH = 6
+
+
+@pytest.fixture
+def bus():
+    ring = SharedFrameRing(8, HEIGHT, WIDTH, name=f"fli_test_{os.getpid()}_{uuid.uuid4().hex[:8]}")
+    client = FrameBusClient(ring.name, timeout=1.0)
+    yield ring, client
+    client.close()
+    ring.close()
+
+
+def write(ring, first, count):
+    for seq in range(first, first + count):
+        frame = np.full((HEIGHT, WIDTH), seq, dtype=np.uint16)
+        ring.write_frame(frame.ctypes.data, status=seq % 3)
+
+
+def test_client_reads_every_frame_in_order(bus):
+    ring, client = bus
+    write(ring, 0, 5)
+    for seq in range(5):
+        frame, number, _, status = client.next_frame(timeout=0.1)
+        assert number == seq
+        assert int(frame[0, 0]) == seq
+        assert status == seq % 3
+    assert client.next_frame(timeout=0.01) is None
+    assert client.overruns == 0
+
+
+def test_slow_client_counts_overruns(bus):
+    ring, client = bus
+    write(ring, 0, 20)
+    _, number, _, _ = client.next_frame(timeout=0.1)
+    assert number == 20 - 8 + 1
+    assert client.overruns == number
+    frame, _, _ = client.read(19)
+    assert int(frame[0, 0]) == 19
+
+
+def test_frame_being_rewritten_is_not_returned(bus):
+    ring, client = bus
+    write(ring, 0, 3)
+    ring.slot_seq[1] = -1  # What write_frame() does before copying over frame 1's slot
+    assert client.read(1) is None
+    assert not client.is_intact(1)
+    _, number, _, _ = client.next_frame(timeout=0.1)
+    assert number == 0
+    _, number, _, _ = client.next_frame(timeout=0.1)
+    assert number == 2
+    assert client.overruns == 1
+
+
+def test_write_batch_publishes_frames(bus):
+    ring, client = bus
+    frames = np.arange(12, dtype=np.uint16).repeat(HEIGHT * WIDTH).reshape(12, HEIGHT, WIDTH)
+    ring.write_batch(frames, 0, np.arange(12, dtype=np.int64), np.zeros(12, dtype=np.int32))
+    assert client.write_seq == 12
+    # Only the newest frames fit
+    assert client.read(3) is None
+    frame, timestamp, _ = client.read(11)
+    assert int(frame[0, 0]) == 11 and timestamp == 11
+    latest, number, _ = client.get_latest_frame()
+    assert number == 11 and int(latest[0, 0]) == 11
+
+
+def test_reset_starts_a_new_generation(bus):
+    ring, client = bus
+    write(ring, 0, 5)
+    ring.reset()
+    write(ring, 0, 2)
+    assert client.wait_for_frame(10, timeout=0.1) == 1
+    _, number, _, _ = client.next_frame(timeout=0.1)
+    assert number == 0
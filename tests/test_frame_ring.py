@@ -0,0 +1,80 @@
+import numpy as np
+import frame_ring
+from frame_ring import FrameRing
+
+HEIGHT = 4
+WIDTH = 6
+
+
+def write(ring, first, count):
+    """Writes frames first..first+count-1, each filled with its own frame number."""
+    for seq in range(first, first + count):
+        frame = np.full((HEIGHT, WIDTH), seq, dtype=np.uint16)
+        ring.write_frame(frame.ctypes.data, status=seq % 3)
+
+
+def test_frames_come_back_in_order():
+    ring = FrameRing(8, HEIGHT, WIDTH)
+    write(ring, 0, 5)
+    frames, first, timestamps = ring.get_frames_since(-1)
+    assert first == 0
+    assert [int(frame[0, 0]) for frame in frames] == [0, 1, 2, 3, 4]
+    assert np.all(np.diff(timestamps) >= 0)
+
+    frames, first, _ = ring.get_frames_since(2)
+    assert first == 3
+    assert [int(frame[0, 0]) for frame in frames] == [3, 4]
+
+
+def test_overwritten_frames_are_skipped():
+    ring = FrameRing(8, HEIGHT, WIDTH)
+    write(ring, 0, 20)
+    frames, first, _ = ring.get_frames_since(-1)
+    # One slot of margin for the frame being written
+    assert first == 20 - 8 + 1
+    assert [int(frame[0, 0]) for frame in frames] == list(range(first, 20))
+
+
+def test_max_frames_and_out_buffer():
+    ring = FrameRing(8, HEIGHT, WIDTH)
+    write(ring, 0, 6)
+    out = np.zeros((4, HEIGHT, WIDTH), dtype=np.uint16)
+    frames, first, _ = ring.get_frames_since(-1, out=out)
+    assert first == 0
+    assert len(frames) == 4
+    assert np.shares_memory(frames, out)
+    assert [int(frame[0, 0]) for frame in frames] == [0, 1, 2, 3]
+    frames, first, _ = ring.get_frames_since(3, max_frames=1)
+    assert first == 4 and len(frames) == 1
+
+
+def test_frames_torn_during_copy_are_dropped(monkeypatch):
+    ring = FrameRing(8, HEIGHT, WIDTH)
+    write(ring, 0, 7)
+    take = np.take
+
+    def take_then_overwrite(*args, **kwargs):
+        result = take(*args, **kwargs)
+        write(ring, ring.write_seq, 3)  # The producer laps the reader while it copies
+        return result
+
+    monkeypatch.setattr(frame_ring.np, "take", take_then_overwrite)
+    out = np.zeros((8, HEIGHT, WIDTH), dtype=np.uint16)
+    frames, first, timestamps = ring.get_frames_since(-1, out=out)
+    # Frames 0..2 were reused for 7..9, and frame 3's slot is next
+    assert first == 10 - 8 + 1
+    assert [int(frame[0, 0]) for frame in frames] == list(range(first, 7))
+    assert len(timestamps) == len(frames)
+
+
+def test_latest_frame_and_validity():
+    ring = FrameRing(4, HEIGHT, WIDTH)
+    assert ring.get_latest_frame() == (None, -1, 0)
+    write(ring, 0, 6)
+    frame, seq, _ = ring.get_latest_frame()
+    assert seq == 5 and int(frame[0, 0]) == 5
+    assert ring.is_valid(5) and ring.is_valid(3)
+    assert not ring.is_valid(2)  # Its slot is the one written next
+    assert not ring.is_valid(6)
+    ring.reset()
+    assert ring.get_latest_frame() == (None, -1, 0)
@@ -0,0 +1,70 @@
+import numpy as np
+from ingest import BatchedIngest
+
+HEIGHT = 4
+WIDTH = 6
+
+
+class Collector:
+    def __init__(self):
+        self.seqs = []
+        self.batches = 0
+
+    def __call__(self, first_seq, frames, timestamps, statuses):
+        self.batches += 1
+        for offset, frame in enumerate(frames):
+            assert int(frame[0, 0]) == first_seq + offset  # Every frame is intact and numbered right
+            assert statuses[offset] == (first_seq + offset) % 3
+            self.seqs.append(first_seq + offset)
+
+
+def produce(ingest, first, count):
+    for seq in range(first, first + count):
+        frame = np.full((HEIGHT, WIDTH), seq, dtype=np.uint16)
+        ingest.callback(None, frame.ctypes.data, seq % 3)
+
+
+def test_slots_round_up_to_a_power_of_two():
+    assert BatchedIngest(12, HEIGHT, WIDTH, Collector()).num_slots == 16
+
+
+def test_consumer_sees_every_frame_in_batches():
+    handler = Collector()
+    ingest = BatchedIngest(16, HEIGHT, WIDTH, handler)
+    produce(ingest, 0, 10)
+    assert ingest.consume() == 10
+    produce(ingest, 10, 13)
+    assert ingest.consume() == 13
+    assert handler.seqs == list(range(23))
+    assert ingest.overruns == 0
+    assert ingest.consume() == 0
+
+
+def test_lapped_consumer_counts_overruns():
+    handler = Collector()
+    ingest = BatchedIngest(16, HEIGHT, WIDTH, handler)
+    produce(ingest, 0, 40)
+    handled = ingest.consume()
+    assert handler.seqs == list(range(40 - 16 + 1, 40))
+    assert ingest.overruns == 40 - handled
+    assert ingest.consumed_seq == 40
+
+
+def test_frames_overwritten_during_the_copy_are_dropped():
+    ingest = BatchedIngest(16, HEIGHT, WIDTH, None)
+    seen = []
+
+    def handler(first_seq, frames, timestamps, statuses):
+        if not seen:
+            produce(ingest, ingest.write_seq, 10)  # The producer laps the consumer mid-pass
+        seen.extend(range(first_seq, first_seq + len(frames)))
+        assert [int(frame[0, 0]) for frame in frames] == list(range(first_seq, first_seq + len(frames)))
+
+    ingest.handler = handler
+    produce(ingest, 0, 12)
+    ingest.consume()
+    assert seen[:4] == [0, 1, 2, 3]  # The first batch was copied before the producer moved on
+    assert ingest.overruns + len(seen) == 12
+    ingest.consume()
+    assert seen[-1] == 21
+    assert ingest.overruns + len(seen) == 22
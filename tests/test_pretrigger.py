@@ -0,0 +1,77 @@
+import numpy as np
+from camera_sdk import TAG_PIXELS, frame_tags
+from pretrigger import PretriggerRecorder, ThresholdTrigger
+from recording import RecordingReader
+
+HEIGHT = 4
+WIDTH = 6
+PRE = 20
+POST = 30
+
+
+def dark_frames(frames, count, bright=()):
+    """Tagged frames of a flat background, with a bright pixel in the frames listed in `bright`."""
+    data = frames(count, HEIGHT, WIDTH)
+    data.reshape(count, -1)[:, TAG_PIXELS:] = 100
+    data[list(bright), -1, -1] = 5000
+    return data
+
+
+def check_event(event, trigger_seq):
+    reader = RecordingReader(event["output"])
+    assert reader.complete
+    assert len(reader) == PRE + 1 + POST
+    seqs = reader.index["seq"]
+    np.testing.assert_array_equal(seqs, np.arange(trigger_seq - PRE, trigger_seq + POST + 1))
+    # Each saved frame is the one fed with that number, and the trigger frame sits right after the pre window
+    np.testing.assert_array_equal(frame_tags(reader.read(0, len(reader))), seqs)
+    assert reader.index["seq"][PRE] == trigger_seq
+    assert reader.settings["trigger_seq"] == trigger_seq
+    assert event["frames"] == PRE + 1 + POST and event["missed"] == 0
+
+
+def test_threshold_events_with_retrigger(tmp_path, frames):
+    data = dark_frames(frames, 260, bright=[100, 110, 200])
+    recorder = PretriggerRecorder(HEIGHT, WIDTH, PRE, POST, str(tmp_path / "event"),
+                                  condition=ThresholdTrigger(1000))
+    recorder.start()
+    for seq, frame in enumerate(data):
+        recorder.write_frame(frame.ctypes.data)
+        if seq == 120:
+            assert recorder.trigger() is None  # Still inside the first event's post window
+    recorder.stop()
+
+    assert recorder.event_count == 2  # Frame 110 fell in the holdoff too, so it never fired
+    assert recorder.ignored_triggers == 1
+    assert [event["trigger_seq"] for event in recorder.saved] == [100, 200]
+    for event in recorder.saved:
+        assert event["source"] == "threshold"
+        check_event(event, event["trigger_seq"])
+
+
+def test_manual_trigger_takes_the_newest_frame(tmp_path, frames):
+    data = dark_frames(frames, 120)
+    recorder = PretriggerRecorder(HEIGHT, WIDTH, PRE, POST, str(tmp_path / "event"))
+    recorder.start()
+    for seq, frame in enumerate(data):
+        recorder.write_frame(frame.ctypes.data)
+        if seq == 50:
+            assert recorder.trigger().startswith(str(tmp_path / "event_001_"))
+    recorder.stop()
+    assert [event["source"] for event in recorder.saved] == ["manual"]
+    check_event(recorder.saved[0], 50)
+
+
+def test_stop_saves_a_short_post_window(tmp_path, frames):
+    data = dark_frames(frames, 60, bright=[50])
+    recorder = PretriggerRecorder(HEIGHT, WIDTH, PRE, POST, str(tmp_path / "event"),
+                                  condition=ThresholdTrigger(1000))
+    recorder.start()
+    for frame in data:
+        recorder.write_frame(frame.ctypes.data)
+    recorder.stop()  # Acquisition ended 9 frames into the post window
+
+    event = recorder.saved[0]
+    reader = RecordingReader(event["output"])
+    np.testing.assert_array_equal(reader.index["seq"], np.arange(50 - PRE, 60))
+    assert event["frames"] == PRE + 10
@@ -0,0 +1,77 @@
+import numpy as np
+from camera import Camera
+from processing import Centroid, DarkSubtract, FlatField, Pipeline, RoiSums
+
+
+def run_stages(stages, batch):
+    fields = [field for stage in stages for field in stage.result_fields]
+    results = np.zeros(len(batch), dtype=np.dtype([(name, dtype, shape) for name, dtype, shape in fields]))
+    for stage in stages:
+        stage.setup(batch.shape[1], batch.shape[2], len(batch))
+        stage.process(batch, results)
+    return results
+
+
+def test_centroid_of_a_spot():
+    batch = np.zeros((2, 20, 30), dtype=np.float32)
+    batch[0, 5, 7] = 10
+    batch[0, 5, 9] = 10
+    batch[1, 12, 20] = 4
+    results = run_stages([Centroid()], batch)
+    np.testing.assert_allclose(results["centroid"], [[8, 5], [20, 12]])
+    np.testing.assert_allclose(results["total"], [20, 4])
+
+
+def test_centroid_ignores_negative_pixels_after_dark_subtraction():
+    frame = np.full((20, 30), 100, dtype=np.float32)
+    frame[15, 25] = 200
+    dark = np.full((20, 30), 100, dtype=np.float32)
+    dark[0, 0] = 150  # Makes one pixel negative after subtraction
+    results = run_stages([DarkSubtract(dark), Centroid()], frame[None].copy())
+    np.testing.assert_allclose(results["centroid"][0], [25, 15])
+
+
+def test_centroid_threshold_and_empty_frames():
+    batch = np.full((2, 10, 10), 5, dtype=np.float32)
+    batch[0, 2, 3] = 9
+    results = run_stages([Centroid(threshold=5)], batch)
+    np.testing.assert_allclose(results["centroid"][0], [3, 2])
+    assert np.isnan(results["centroid"][1]).all()
+    assert results["total"][1] == 0
+
+
+def test_roi_sums_and_flat_field():
+    batch = np.ones((3, 8, 8), dtype=np.float32)
+    flat = np.ones((8, 8), dtype=np.float32)
+    flat[:, 4:] = 3  # Mean 2: the left half gains 2x, the right half 2/3
+    results = run_stages([FlatField(flat), RoiSums([(0, 0, 4, 8), (4, 0, 8, 8), (2, 2, 3, 3)])], batch)
+    np.testing.assert_allclose(results["roi_sums"], [[64, 64 / 3, 2]] * 3, rtol=1e-6)
+
+
+def test_pipeline_runs_during_a_recording(sim):
+    camera = Camera(check_tags=True)
+    camera.RING_BUFFER_SIZE = 1024
+    camera.configure_acquisition(32, 16)
+    camera.initialize_camera_context()
+    pipeline = Pipeline(camera, 16, 32, max_batch=64)
+    pipeline.add_stage(Centroid())
+    rows = []
+    pipeline.on_results = lambda results: rows.append(results.copy())
+    try:
+        camera.prepare_recording(800)
+        pipeline.start()  # Before acquisition there is nothing to process yet
+        camera.start_acquisition("record")
+        assert camera.wait_for_frames(10)
+        camera.stop_acquisition()
+        pipeline.stop()
+    finally:
+        camera.close_camera_context()
+
+    assert pipeline.frames_missed == 0
+    assert pipeline.frames_processed >= 800
+    results = np.concatenate(rows)[:800]
+    np.testing.assert_array_equal(results["seq"], np.arange(800))
+    # The pipeline saw the same frames that were recorded
+    recorded = np.frombuffer(camera.acq_buffer, dtype=np.uint16).reshape(800, 16, 32).astype(np.float32)
+    expected = run_stages([Centroid()], recorded)
+    np.testing.assert_allclose(results["centroid"], expected["centroid"], rtol=1e-5)
@@ -0,0 +1,72 @@
+import threading
+from profiling import Profiler, load_trace_summary
+
+
+def test_ring_keeps_the_newest_events():
+    profiler = Profiler(capacity=8, enabled=True)
+    stage = profiler.stage("test.step")
+    start = profiler.epoch_ns + 1
+    for k in range(20):
+        profiler.record(stage, start + k, start + k + 1000 * k)
+    starts, values, stages, _ = profiler.events()
+    assert profiler.written == 20
+    assert list(values) == [1000 * k for k in range(12, 20)]  # Oldest first
+    assert list(starts) == [start + k for k in range(12, 20)]
+    assert set(stages) == {stage}
+    summary = profiler.summary()["test.step"]
+    assert summary["count"] == 8
+    assert summary["max_us"] == 19.0
+    assert profiler.chrome_trace()["otherData"]["dropped_events"] == 12
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(capacity=8)
+    with profiler.span("test.block"):
+        pass
+    profiler.count("test.counter")
+    assert profiler.written == 0
+    assert profiler.summary() == {}
+
+
+def test_reset_drops_events_and_counter_totals():
+    profiler = Profiler(capacity=8, enabled=True)
+    with profiler.span("test.block"):
+        pass
+    profiler.count("test.counter", 5)
+    assert profiler.summary()["counters"] == {"test.counter": 5}
+    profiler.reset()
+    assert len(profiler.events()[0]) == 0
+    assert profiler.counters == {"test.counter": 0}
+
+
+def test_threads_never_share_a_slot():
+    profiler = Profiler(capacity=4096, enabled=True)
+    stages = [profiler.stage(f"test.thread{k}") for k in range(4)]
+
+    def work(stage):
+        start = profiler.epoch_ns + 1
+        for _ in range(500):
+            profiler.record(stage, start, start + stage + 1)
+
+    threads = [threading.Thread(target=work, args=(stage,)) for stage in stages]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    _, values, recorded, _ = profiler.events()
+    assert len(values) == 2000
+    assert all(value == stage + 1 for value, stage in zip(values, recorded))
+
+
+def test_trace_export_round_trip(tmp_path):
+    profiler = Profiler(capacity=64, enabled=True)
+    stage = profiler.stage("test.step")
+    for k in range(10):
+        profiler.record(stage, profiler.epoch_ns + k, profiler.epoch_ns + k + 2000)
+    profiler.count("test.frames", 3)
+    path = str(tmp_path / "trace.json")
+    profiler.export_chrome_trace(path)
+    summary = load_trace_summary(path)
+    assert summary["test.step"]["count"] == 10
+    assert abs(summary["test.step"]["p50_us"] - 2.0) < 1e-9
+    assert summary["counters"] == {"test.frames": 3}
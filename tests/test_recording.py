@@ -0,0 +1,71 @@
+import ctypes
+import numpy as np
+from recording import FrameRecord, FRAME_RECORD_DTYPE, RecordingReader, RecordingWriter, is_recording
+
+HEIGHT = 8
+WIDTH = 12
+
+
+def records_for(count, first_seq=0, period_ns=1000):
+    records = (FrameRecord * count)()
+    index = np.frombuffer(records, dtype=FRAME_RECORD_DTYPE)
+    index["seq"] = np.arange(first_seq, first_seq + count)
+    index["timestamp_ns"] = 10**9 + index["seq"].astype(np.int64) * period_ns
+    index["status"] = index["seq"] % 2
+    return records
+
+
+def test_buffer_round_trip(tmp_path, frames):
+    data = frames(50, HEIGHT, WIDTH)
+    path = str(tmp_path / "capture.flr")
+    writer = RecordingWriter(path, WIDTH, HEIGHT, 1000.0, {"source": "test"}, chunk_frames=16)
+    writer.open()
+    writer.write_buffer(ctypes.create_string_buffer(data.tobytes()), records_for(50), 50)
+    writer.close(measured_fps=999.0)
+
+    assert is_recording(path)
+    reader = RecordingReader(path)
+    assert reader.complete
+    assert len(reader) == 50
+    assert reader.chunk_counts == [16, 16, 16, 2]  # Only the last chunk is partial
+    assert reader.settings == {"source": "test"}
+    assert reader.metadata["measured_fps"] == 999.0
+    np.testing.assert_array_equal(reader.read(0, 50), data)
+    np.testing.assert_array_equal(reader.read(3, 47, 5), data[3:47:5])
+    np.testing.assert_array_equal(reader.frame(33), data[33])
+
+    index = reader.index
+    np.testing.assert_array_equal(index["seq"], np.arange(50))
+    np.testing.assert_array_equal(index["status"], np.arange(50) % 2)
+    # The writer stores each frame's tag counter in its record
+    np.testing.assert_array_equal(index["tag"], np.arange(50))
+
+
+def test_chunks_are_readable_before_close(tmp_path, frames):
+    data = frames(40, HEIGHT, WIDTH)
+    path = str(tmp_path / "unfinished.flr")
+    writer = RecordingWriter(path, WIDTH, HEIGHT, chunk_frames=16)
+    writer.open()
+    for first in (0, 16):
+        writer.write_chunk(data[first:first + 16].copy(), records_for(16, first), 16)
+
+    reader = RecordingReader(path)
+    assert not reader.complete
+    assert len(reader) == 32
+    np.testing.assert_array_equal(reader.read(0, 32), data[:32])
+    writer.close()
+    assert len(RecordingReader(path)) == 32
+
+
+def test_clock_model_is_stored(tmp_path, frames):
+    path = str(tmp_path / "clock.flr")
+    writer = RecordingWriter(path, WIDTH, HEIGHT, 1e6, chunk_frames=16)
+    writer.open()
+    writer.write_buffer(ctypes.create_string_buffer(frames(64, HEIGHT, WIDTH).tobytes()), records_for(64), 64)
+    writer.close()
+
+    clock = RecordingReader(path).clock
+    assert clock.index == "tag"
+    assert abs(clock.period_ns - 1000) < 1e-6
+    assert abs(clock.drift_ppm) < 1e-3
+    assert len(clock.anchors) == 2
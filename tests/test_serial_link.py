@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from fli_cli_sim import FliCliEmulator
+from serial_link import SerialLink, clean_response, query
+
+
+@pytest.fixture
+def emulator():
+    emulator = FliCliEmulator()
+    emulator.start()
+    yield emulator
+    emulator.stop()
+
+
+def with_link(emulator, body, **options):
+    async def main():
+        link = SerialLink(emulator.port, **options)
+        await link.open()
+        try:
+            return await body(link)
+        finally:
+            await link.close()
+    return asyncio.run(main())
+
+
+def test_clean_response():
+    assert clean_response(b"\r\n on:0-63:0-63 \r\nfli-cli> fli-cli>") == "on:0-63:0-63"
+
+
+def test_blocking_query(emulator):
+    assert query(emulator.port, "fps raw") == "100.000000000"
+
+
+def test_send_and_send_many(emulator):
+    async def body(link):
+        assert await link.send("set fps 200") == ""
+        return await link.send_many(["fps raw", "cropping raw", "tint raw"])
+
+    assert with_link(emulator, body) == ["200.000000000", "off", "0.001000000"]
+
+
+def test_late_replies_do_not_answer_later_commands(emulator):
+    async def body(link):
+        emulator.delays["query"] = 0.25
+        with pytest.raises(TimeoutError):
+            await link.send_many(["fps raw", "tint raw"])
+        emulator.delays["query"] = 0.002
+        return await link.send("cropping raw"), await link.send("tint raw")
+
+    assert with_link(emulator, body, timeout=0.2) == ("off", "0.001000000")
+
+
+def test_close_fails_pending_commands(emulator):
+    emulator.delays["query"] = 0.5
+
+    async def body(link):
+        in_flight = asyncio.ensure_future(link.send("fps raw"))
+        queued = asyncio.ensure_future(link.send_many(["tint raw"]))
+        await asyncio.sleep(0.05)
+        await link.close()
+        for future in (in_flight, queued):
+            with pytest.raises(ConnectionError):
+                await future
+
+    with_link(emulator, body)
+
+
+def test_unsolicited_output_is_reported(emulator):
+    messages = []
+
+    async def body(link):
+        link.buffer += b"temperature warning\r\n"
+        return await link.send("fps raw")
+
+    assert with_link(emulator, body, on_unsolicited=messages.append) == "100.000000000"
+    assert messages == ["temperature warning"]
@@ -0,0 +1,29 @@
+import ctypes
+import time
+from camera_sdk import frame_tag
+from sim_sdk import SimulatedFliUsb
+
+CALLBACK = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint8), ctypes.c_int)
+
+
+def test_each_camera_tags_its_own_frames():
+    sim = SimulatedFliUsb(fps=0, num_cameras=2)  # Unpaced, so the two producers interleave as much as possible
+    sim.fli_usb_init()
+    tags = {1: [], 2: []}
+
+    @CALLBACK
+    def callback(userctx, frame, status):
+        tags[userctx].append(frame_tag(frame))
+
+    cameras = [sim.fli_usb_open(index, None, None) for index in range(2)]
+    for cam_ctx in cameras:
+        sim.fli_usb_checkTagEnable(cam_ctx, 1)
+    sim.fli_usb_startAcquisition(cameras[0], 32, 16, callback, 1)
+    time.sleep(0.05)  # The second camera's counter lags the first one's
+    sim.fli_usb_startAcquisition(cameras[1], 32, 16, callback, 2)
+    time.sleep(0.2)
+    sim.fli_usb_exit()
+
+    for camera_tags in tags.values():
+        assert len(camera_tags) > 100
+        assert camera_tags == list(range(len(camera_tags)))
@@ -0,0 +1,62 @@
+import errno
+import numpy as np
+import pytest
+from recording import RecordingReader, RecordingWriter
+from stream_writer import StreamWriter
+
+HEIGHT = 4
+WIDTH = 6
+FRAME_SIZE = HEIGHT * WIDTH * 2
+
+
+class FullDiskSink(RecordingWriter):
+    """A .flr sink whose disk fills up after `chunks_ok` chunks."""
+
+    def __init__(self, output_file, chunks_ok):
+        super().__init__(output_file, WIDTH, HEIGHT, chunk_frames=8)
+        self.chunks_ok = chunks_ok
+
+    def write_chunk(self, data, records, nframes):
+        if self.chunks_written == self.chunks_ok:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        super().write_chunk(data, records, nframes)
+
+
+def test_frames_and_batches_round_trip(tmp_path, frames):
+    data = frames(40, HEIGHT, WIDTH)
+    path = str(tmp_path / "capture.flr")
+    writer = StreamWriter(RecordingWriter(path, WIDTH, HEIGHT, chunk_frames=8), FRAME_SIZE, chunk_frames=8)
+    writer.start()
+    for seq in range(13):
+        assert writer.write_frame(data[seq].ctypes.data, seq)
+    assert writer.write_batch(data[13:], 13, np.arange(27), np.zeros(27, dtype=np.int32)) == 27
+    writer.close()
+
+    reader = RecordingReader(path)
+    assert reader.complete
+    np.testing.assert_array_equal(reader.read(0, 40), data)
+    np.testing.assert_array_equal(reader.index["seq"], np.arange(40))
+    assert writer.frames_written == 40 and writer.frames_dropped == 0
+
+
+def test_failed_write_stops_the_writer_and_close_raises(tmp_path, frames):
+    data = frames(40, HEIGHT, WIDTH)
+    path = str(tmp_path / "capture.flr")
+    writer = StreamWriter(FullDiskSink(path, chunks_ok=1), FRAME_SIZE, chunk_frames=8, num_chunks=4)
+    writer.start()
+    for seq in range(16):
+        writer.write_frame(data[seq].ctypes.data, seq)
+    writer.thread.join(5)  # The second chunk fails and ends the writer thread
+    assert isinstance(writer.error, OSError)
+
+    assert not writer.write_frame(data[16].ctypes.data, 16)
+    assert writer.write_batch(data[17:], 17, np.arange(23), np.zeros(23, dtype=np.int32)) == 0
+    assert writer.frames_dropped == 24
+    assert "failed: [Errno 28]" in writer.status()
+    with pytest.raises(RuntimeError, match="after 8 frames"):
+        writer.close()
+
+    # The chunk written before the failure is readable, but the recording is not marked complete
+    reader = RecordingReader(path)
+    assert not reader.complete
+    np.testing.assert_array_equal(reader.read(0, len(reader)), data[:8])
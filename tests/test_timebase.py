@@ -0,0 +1,69 @@
+import numpy as np
+from recording import FRAME_RECORD_DTYPE
+from timebase import ClockModel, FrameClock, tags_are_counter
+
+PERIOD_NS = 105_263  # 9500 fps
+
+
+def make_records(frame_numbers, first_tag=0, jitter_ns=0, seed=0):
+    """Index records of the given camera frames, as the host received them (seq counts received frames)."""
+    frame_numbers = np.asarray(frame_numbers, dtype=np.int64)
+    records = np.zeros(len(frame_numbers), dtype=FRAME_RECORD_DTYPE)
+    records["seq"] = np.arange(len(frame_numbers))
+    noise = np.random.default_rng(seed).integers(-jitter_ns, jitter_ns + 1, len(frame_numbers))
+    records["timestamp_ns"] = 5 * 10**9 + frame_numbers * PERIOD_NS + noise
+    records["tag"] = (first_tag + frame_numbers) % (1 << 32)
+    return records
+
+
+def test_camera_counter_keeps_drops_out_of_the_period():
+    kept = np.flatnonzero(np.random.default_rng(3).random(5000) > 0.05)  # 5% dropped by the host
+    records = make_records(kept - kept[0])
+    clock = FrameClock(nominal_fps=1e9 / PERIOD_NS)
+    for first in range(0, len(records), 256):
+        clock.add_records(records[first:first + 256])
+    model = clock.model()
+    assert model.index == "tag"
+    assert abs(model.period_ns - PERIOD_NS) < 1e-3
+    assert abs(model.drift_ppm) < 0.01
+    assert model.jitter_ns < 1
+
+    # Numbered by the host's count instead, the drops would show as a longer period
+    untagged = records.copy()
+    untagged["tag"] = 0
+    seq_model = ClockModel.fit(untagged)
+    assert seq_model.index == "seq"
+    assert seq_model.period_ns > PERIOD_NS * 1.04
+
+
+def test_counter_wraps_around():
+    records = make_records(np.arange(1000), first_tag=(1 << 32) - 300)
+    model = ClockModel.fit(records)
+    assert model.index == "tag"
+    assert abs(model.period_ns - PERIOD_NS) < 1e-3
+    np.testing.assert_array_equal(model.frame_numbers(records), np.arange(1000))
+
+
+def test_untagged_frames_fall_back_to_seq():
+    records = make_records(np.arange(300))
+    records["tag"] = np.random.default_rng(0).integers(0, 1 << 14, 300)
+    assert not tags_are_counter(records["tag"])
+    model = ClockModel.fit(records)
+    assert model.index == "seq"
+    assert abs(model.period_ns - PERIOD_NS) < 1e-3
+
+
+def test_model_survives_the_header():
+    numbers = np.delete(np.arange(1100), np.arange(7, 1100, 11))  # Every 11th frame missed
+    records = make_records(numbers, jitter_ns=500)
+    clock = FrameClock(nominal_fps=9500.0)
+    clock.add_records(records)
+    model = ClockModel.from_dict(clock.model().to_dict())
+    assert model.index == "tag"
+    assert model.first_tag == 0
+    assert model.nominal_fps == 9500.0
+    assert 100 < model.jitter_ns < 500
+    assert len(model.anchors) == 2
+    # Wall-clock times step by the fitted period per camera frame, across the gaps too
+    times = model.wall_time_ns(model.frame_numbers(records))
+    np.testing.assert_allclose(np.diff(times), np.diff(numbers) * model.period_ns, atol=2)